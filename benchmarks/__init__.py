@@ -0,0 +1 @@
+"""Offline performance benchmarks for dvb. Run modules with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,97 @@
+"""Recorded API fixtures, the parser each one feeds, and synthetic scaling."""
+
+from __future__ import annotations
+
+import copy
+import json
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from dvb.dvb import (
+    _parse_departures,
+    _parse_lines,
+    _parse_pins,
+    _parse_points,
+    _parse_route_changes,
+    _parse_routes,
+    _parse_trip_stops,
+)
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+
+# fixture file -> (endpoint, parser used by the client for that endpoint)
+PARSERS: dict[str, tuple[str, Callable[[dict[str, Any]], Any]]] = {
+    "trips.json": ("tr/trips", _parse_routes),
+    "trip_details.json": ("dm/trip", _parse_trip_stops),
+    "departure_monitor.json": ("dm", _parse_departures),
+    "pins.json": ("map/pins", _parse_pins),
+    "pointfinder.json": ("tr/pointfinder", _parse_points),
+    "lines.json": ("stt/lines", _parse_lines),
+    "route_changes.json": ("rc", _parse_route_changes),
+}
+
+# fixture file -> top-level list that grows when the fixture is scaled up
+ITEMS_KEY = {
+    "trips.json": "Routes",
+    "trip_details.json": "Stops",
+    "departure_monitor.json": "Departures",
+    "pins.json": "Pins",
+    "pointfinder.json": "Points",
+    "lines.json": "Lines",
+    "route_changes.json": "Changes",
+}
+
+_DATE_RE = re.compile(r"/Date\((\d+)")
+_MINUTE_MS = 60_000
+
+
+def read_fixture(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+def load_fixture(name: str) -> dict[str, Any]:
+    data: dict[str, Any] = json.loads(read_fixture(name))
+    return data
+
+
+def _shift_dates(value: Any, minutes: int) -> Any:
+    """Shift every /Date(...)/ string in ``value`` by whole minutes."""
+    if isinstance(value, str):
+        return _DATE_RE.sub(lambda m: f"/Date({int(m.group(1)) + minutes * _MINUTE_MS}", value)
+    if isinstance(value, list):
+        return [_shift_dates(v, minutes) for v in value]
+    if isinstance(value, dict):
+        return {k: _shift_dates(v, minutes) for k, v in value.items()}
+    return value
+
+
+def _polyline(mode: str, vertices: int, seed: int) -> str:
+    lat, lng = 5657496 + seed * 7, 4621684 - seed * 3
+    coords = "|".join(f"{lat + i * 3}|{lng + i * 2}" for i in range(vertices))
+    return f"{mode}|{coords}"
+
+
+def scale(name: str, items: int, *, map_vertices: int = 0) -> dict[str, Any]:
+    """Grow a fixture's main list to ``items`` entries.
+
+    Copies are spread over consecutive minutes, so timestamps repeat the way
+    they do in real responses. For ``trips.json``, ``map_vertices`` replaces
+    every leg's map data with a polyline of that many vertices.
+    """
+    data = load_fixture(name)
+    key = ITEMS_KEY[name]
+    template = data[key]
+    grown = []
+    for i in range(items):
+        item = copy.deepcopy(template[i % len(template)])
+        grown.append(_shift_dates(item, i // len(template)))
+    data[key] = grown
+
+    if name == "trips.json" and map_vertices:
+        for seed, route in enumerate(data["Routes"]):
+            route["MapData"] = [
+                _polyline(md.split("|", 1)[0], map_vertices, seed) for md in route["MapData"]
+            ]
+    return data
@@ -0,0 +1,63 @@
+"""Microbenchmark for parse_date against the original regex-only implementation.
+
+Usage: ``python -m benchmarks.bench_dates``
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import timeit
+from datetime import datetime, timezone
+
+from dvb._utils import parse_date
+
+_DATE_RE = re.compile(r"/Date\((\d+)([+-]\d{4})\)/")
+
+
+def parse_date_regex(s: str) -> datetime:
+    m = _DATE_RE.search(s)
+    if not m:
+        msg = f"Invalid date string: {s}"
+        raise ValueError(msg)
+    return datetime.fromtimestamp(int(m.group(1)) / 1000, tz=timezone.utc)
+
+
+def make_samples(n: int, distinct: int, seed: int = 0) -> list[str]:
+    """Build ``n`` date strings drawn from ``distinct`` whole-minute timestamps."""
+    rng = random.Random(seed)
+    base = 1512769800000
+    minutes = [base + 60_000 * i for i in range(distinct)]
+    return [f"/Date({rng.choice(minutes)}-0000)/" for _ in range(n)]
+
+
+def bench(samples: list[str], repeat: int = 5, number: int = 20) -> dict[str, float]:
+    def run_regex() -> None:
+        for s in samples:
+            parse_date_regex(s)
+
+    def run_fast() -> None:
+        parse_date.cache_clear()
+        for s in samples:
+            parse_date(s)
+
+    regex = min(timeit.repeat(run_regex, repeat=repeat, number=number)) / number
+    fast = min(timeit.repeat(run_fast, repeat=repeat, number=number)) / number
+    return {"regex_s": regex, "fast_s": fast, "speedup": regex / fast}
+
+
+def main() -> None:
+    cases = {
+        "shared minutes (10k dates, 240 distinct)": make_samples(10_000, 240),
+        "all distinct (10k dates)": make_samples(10_000, 10_000),
+    }
+    for name, samples in cases.items():
+        r = bench(samples)
+        print(
+            f"{name:45} regex {r['regex_s'] * 1e3:8.2f} ms   "
+            f"fast {r['fast_s'] * 1e3:8.2f} ms   x{r['speedup']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark JSON backends: decode plus model construction for every fixture.
+
+Usage: ``python -m benchmarks.bench_json``
+
+Only backends that are installed are measured; the stdlib ``json`` is always
+included.
+"""
+
+from __future__ import annotations
+
+import timeit
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from dvb._utils import JSONLoads, available_json_backends, parse_date
+
+from ._fixtures import PARSERS, read_fixture
+
+
+def _decode_and_parse(loads: JSONLoads, parse: Callable[[Any], Any], raw: bytes) -> None:
+    parse_date.cache_clear()
+    parse(loads(raw))
+
+
+def bench(repeat: int = 5, number: int = 200) -> dict[str, dict[str, float]]:
+    """Return seconds per decode+parse, keyed by fixture then backend."""
+    results: dict[str, dict[str, float]] = {}
+    backends = available_json_backends()
+    for fixture, (_, parse) in PARSERS.items():
+        raw = read_fixture(fixture)
+        results[fixture] = {}
+        for name, loads in backends.items():
+            run = partial(_decode_and_parse, loads, parse, raw)
+            best = min(timeit.repeat(run, repeat=repeat, number=number))
+            results[fixture][name] = best / number
+    return results
+
+
+def main() -> None:
+    results = bench()
+    backends = list(next(iter(results.values())))
+    print(f"{'fixture':25}" + "".join(f"{name:>14}" for name in backends))
+    for fixture, timings in results.items():
+        row = "".join(f"{timings[name] * 1e6:11.1f} us" for name in backends)
+        print(f"{fixture:25}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Offline benchmark suite for every response parser and client endpoint.
+
+Replays the recorded fixtures from ``tests/fixtures``, scaled up to realistic
+response sizes, and reports throughput and memory per benchmark. No network
+access is needed: endpoint benchmarks serve the scaled fixtures through a
+local requests transport adapter.
+
+Usage::
+
+    python -m benchmarks.run                      # human-readable table
+    python -m benchmarks.run --json results.json  # also write machine-readable results
+    python -m benchmarks.run --compare baseline.json --threshold 0.15
+    python -m benchmarks.run --filter parse_route --quick
+
+``--compare`` exits with status 1 if any benchmark got slower than the
+baseline by more than ``--threshold`` (a fraction).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import requests
+from requests.adapters import BaseAdapter
+
+import dvb
+from dvb._utils import parse_date, parse_point
+from dvb.dvb import _parse_map_data
+
+from ._fixtures import ITEMS_KEY, PARSERS, scale
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    items: int  # model objects produced per operation
+    run: Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    items: int
+    ops: int
+    seconds_per_op: float
+    ops_per_sec: float
+    items_per_sec: float
+    peak_bytes: int
+    retained_bytes: int
+
+
+class _FixtureAdapter(BaseAdapter):
+    """Answers every request with a canned JSON body for its endpoint path."""
+
+    def __init__(self, bodies: Mapping[str, bytes]) -> None:
+        super().__init__()
+        self._bodies = bodies
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        path = (request.path_url or "/").split("?", 1)[0].lstrip("/")
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url or ""
+        response.request = request
+        response._content = self._bodies[path]
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def _uncached(fn: Callable[[], Any]) -> Callable[[], Any]:
+    def run() -> Any:
+        parse_date.cache_clear()
+        return fn()
+
+    return run
+
+
+def _parser_benchmarks() -> list[Benchmark]:
+    sizes = {
+        "trips.json": 6,
+        "trip_details.json": 60,
+        "departure_monitor.json": 100,
+        "pins.json": 5000,
+        "pointfinder.json": 50,
+        "lines.json": 40,
+        "route_changes.json": 200,
+    }
+    benchmarks = []
+    for fixture, (_, parse) in PARSERS.items():
+        n = sizes[fixture]
+        data = scale(fixture, n)
+        name = f"{parse.__name__.lstrip('_')}[{n}]"
+        benchmarks.append(Benchmark(name, n, _uncached(lambda d=data, p=parse: p(d))))
+
+    trips = scale("trips.json", 6, map_vertices=1000)
+    benchmarks.append(
+        Benchmark(
+            "parse_routes[6x1000 vertices]",
+            6,
+            _uncached(lambda: PARSERS["trips.json"][1](trips)),
+        )
+    )
+    map_str = trips["Routes"][0]["MapData"][0]
+    benchmarks.append(Benchmark("parse_map_data[1000]", 1000, lambda: _parse_map_data(map_str)))
+    point = "33000742|||Helmholtzstraße|5655904|4621157|0||"
+    benchmarks.append(Benchmark("parse_point", 1, lambda: parse_point(point)))
+    return benchmarks
+
+
+def _endpoint_benchmarks() -> list[Benchmark]:
+    sizes = {"trips.json": 6, "departure_monitor.json": 100, "pins.json": 5000}
+    bodies: dict[str, bytes] = {}
+    for fixture, (endpoint, _) in PARSERS.items():
+        n = sizes.get(fixture, 20)
+        data = scale(fixture, n, map_vertices=1000 if fixture == "trips.json" else 0)
+        bodies[endpoint] = json.dumps(data).encode()
+
+    client = dvb.Client(user_agent="dvb-benchmarks/1.0 (offline)")
+    client._session.mount("https://", _FixtureAdapter(bodies))
+    t = datetime(2017, 12, 6, 13, 24, 41, tzinfo=timezone.utc)
+
+    def count(endpoint: str) -> int:
+        data = json.loads(bodies[endpoint])
+        fixture = next(f for f, (e, _) in PARSERS.items() if e == endpoint)
+        return len(data[ITEMS_KEY[fixture]])
+
+    calls: dict[str, tuple[str, Callable[[], Any]]] = {
+        "find": ("tr/pointfinder", lambda: client.find("Helmholtz")),
+        "monitor": ("dm", lambda: client.monitor("33000742")),
+        "route": ("tr/trips", lambda: client.route("33000028", "33000016", time=t)),
+        "pins": ("map/pins", lambda: client.pins(51.0, 13.7, 51.1, 13.8)),
+        "lines": ("stt/lines", lambda: client.lines("33000742")),
+        "route_changes": ("rc", lambda: client.route_changes()),
+        "trip_details": ("dm/trip", lambda: client.trip_details("71313709", t, "33000077")),
+    }
+    return [
+        Benchmark(f"client.{name}", count(endpoint), _uncached(fn))
+        for name, (endpoint, fn) in calls.items()
+    ]
+
+
+def all_benchmarks() -> list[Benchmark]:
+    return _parser_benchmarks() + _endpoint_benchmarks()
+
+
+def measure(bench: Benchmark, *, min_time: float = 0.2, repeat: int = 5) -> Result:
+    timer = timeit.Timer(bench.run)
+    ops, _ = timer.autorange()
+    ops = max(1, int(ops * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=ops)) / ops
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = bench.run()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return Result(
+        name=bench.name,
+        items=bench.items,
+        ops=ops,
+        seconds_per_op=best,
+        ops_per_sec=1 / best,
+        items_per_sec=bench.items / best,
+        peak_bytes=peak - before,
+        retained_bytes=after - before,
+    )
+
+
+def compare(
+    results: list[Result], baseline: Mapping[str, Any], threshold: float
+) -> list[tuple[str, float]]:
+    """Return ``(name, slowdown)`` for benchmarks slower than the baseline by > threshold."""
+    previous = {r["name"]: r["seconds_per_op"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        if r.name in previous:
+            slowdown = r.seconds_per_op / previous[r.name] - 1
+            if slowdown > threshold:
+                regressions.append((r.name, slowdown))
+    return regressions
+
+
+def _metadata() -> dict[str, Any]:
+    return {
+        "dvb_version": dvb.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON ('-' for stdout)")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this")
+    parser.add_argument("--quick", action="store_true", help="shorter runs, noisier numbers")
+    args = parser.parse_args(argv)
+
+    min_time, repeat = (0.05, 3) if args.quick else (0.2, 5)
+    results = []
+    for bench in all_benchmarks():
+        if args.filter in bench.name:
+            results.append(measure(bench, min_time=min_time, repeat=repeat))
+
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'benchmark':34}{'time/op':>12}{'items/s':>14}{'peak':>12}{'retained':>12}", file=out)
+    for r in results:
+        print(
+            f"{r.name:34}{r.seconds_per_op * 1e6:9.1f} us{r.items_per_sec:14,.0f}"
+            f"{r.peak_bytes / 1024:9.1f} KiB{r.retained_bytes / 1024:9.1f} KiB",
+            file=out,
+        )
+
+    if args.json:
+        report = {"meta": _metadata(), "results": [asdict(r) for r in results]}
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, slowdown in regressions:
+            print(f"REGRESSION {name}: {slowdown:+.1%}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,36 +4,107 @@ An unofficial Python module for querying Dresden's public transport system (VVO/
 
 __version__ = "3.0.0"
 
+from ._stream import ResponseStream
+from .aio import AsyncClient
+from .cache import (
+    Cache,
+    CacheStats,
+    ResponseCache,
+    ResponseCacheStats,
+    SQLiteCache,
+    TTLCache,
+)
+from .columnar import DepartureBatch
 from .dvb import Client
-from .exceptions import APIError, ConnectionError, DVBError
+from .exceptions import APIError, CircuitOpenError, ConnectionError, DVBError
+from .instrumentation import EndpointStats, Histogram, RequestEvent, RequestHook, RequestStats
+from .matrix import ODMatrix, plan_matrix
 from .models import (
     Coords,
     Departure,
+    DepartureTrip,
     Line,
     PartialRoute,
     Pin,
     Platform,
+    Polyline,
     RegularStop,
     Route,
     RouteChange,
     Stop,
     ValidityPeriod,
 )
+from .polling import (
+    AsyncDeparturePoller,
+    DepartureEvent,
+    DeparturePoller,
+    PollSchedule,
+    diff_departures,
+)
+from .ratelimit import FileTokenBucketLimiter, RateLimiter, RateLimitStats, TokenBucketLimiter
+from .retry import CircuitBreaker, RetryPolicy
+from .spatial import Neighbor, SpatialIndex
+from .stop_index import StopIndex, StopMatch
+from .tiles import AsyncPinTiles, PinTiles
 
 __all__ = [
     # Client
+    "AsyncClient",
     "Client",
+    "ResponseStream",
+    # Caching
+    "Cache",
+    "CacheStats",
+    "ResponseCache",
+    "ResponseCacheStats",
+    "SQLiteCache",
+    "TTLCache",
+    # Resilience
+    "CircuitBreaker",
+    "FileTokenBucketLimiter",
+    "RateLimiter",
+    "RateLimitStats",
+    "RetryPolicy",
+    "TokenBucketLimiter",
+    # Local lookups
+    "Neighbor",
+    "SpatialIndex",
+    "StopIndex",
+    "StopMatch",
+    # Live polling
+    "AsyncDeparturePoller",
+    "DepartureEvent",
+    "DeparturePoller",
+    "PollSchedule",
+    "diff_departures",
+    # Departure history
+    "DepartureBatch",
+    # Network analysis
+    "ODMatrix",
+    "plan_matrix",
+    # Map tiles
+    "AsyncPinTiles",
+    "PinTiles",
+    # Instrumentation
+    "EndpointStats",
+    "Histogram",
+    "RequestEvent",
+    "RequestHook",
+    "RequestStats",
     # Exceptions
     "APIError",
+    "CircuitOpenError",
     "ConnectionError",
     "DVBError",
     # Models
     "Coords",
     "Departure",
+    "DepartureTrip",
     "Line",
     "PartialRoute",
     "Pin",
     "Platform",
+    "Polyline",
     "RegularStop",
     "Route",
     "RouteChange",
@@ -0,0 +1,99 @@
+"""Deduplication of identical concurrent calls (single-flight)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, TypeVar
+
+from .columnar import DepartureBatch
+
+T = TypeVar("T")
+
+
+def call_key(method: str, endpoint: str, payload: dict[str, Any], parse: Any) -> Hashable:
+    """Build the key identifying an API call, including how its response is parsed."""
+    if isinstance(parse, partial):
+        parse = (parse.func, parse.args, tuple(sorted(parse.keywords.items())))
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return method, endpoint, body, parse
+
+
+def share(result: T) -> T:
+    """Give a follower its own copy of a mutable result, so callers cannot affect each other.
+
+    Lists are copied shallowly; their items, e.g. ``Departure`` objects, are frozen.
+    """
+    if isinstance(result, list):
+        return list(result)  # type: ignore[return-value]
+    if isinstance(result, DepartureBatch):
+        return result.copy()  # type: ignore[return-value]
+    return result
+
+
+class SingleFlight:
+    """Runs concurrent calls with the same key only once, sharing the outcome.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result or
+    exception. Once it finishes, the next call starts a new flight.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Return ``(result, leader)``; ``leader`` is False if the result was shared."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+        if not leader:
+            return share(future.result()), False
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Asyncio counterpart of :class:`SingleFlight`.
+
+    The call runs as a task of its own, so cancelling one waiting caller,
+    including the first, does not cancel the call for the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        task = self._calls.get(key)
+        leader = task is None
+        if task is None:
+
+            async def run() -> T:
+                return await fn()
+
+            task = self._calls[key] = asyncio.ensure_future(run())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        result = await asyncio.shield(task)
+        return (result, True) if leader else (share(result), False)
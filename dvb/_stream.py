@@ -0,0 +1,210 @@
+"""Incremental parsing of large JSON API responses."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from collections.abc import Callable, Iterable, Iterator
+from types import TracebackType
+from typing import Any, Generic, TypeVar
+
+from .exceptions import APIError
+
+T = TypeVar("T")
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _IncompleteValueError(Exception):
+    pass
+
+
+class _ObjectParser:
+    """Parses a top-level JSON object from a stream of byte chunks.
+
+    Only the part of the document that has not been consumed yet is kept in
+    memory, so peak memory is bounded by the largest single value rather
+    than the whole response.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, min_chars: int = 1) -> None:
+        """Append at least ``min_chars`` characters to the buffer unless the input ends."""
+        if self._pos > 65536 and self._pos * 2 > len(self._buf):
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        wanted = len(self._buf) + min_chars
+        parts = [self._buf]
+        size = len(self._buf)
+        while size < wanted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._text.decode(b"", final=True))
+                self._eof = True
+                break
+            text = self._text.decode(chunk)
+            parts.append(text)
+            size += len(text)
+        self._buf = "".join(parts)
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if self._eof:
+                msg = "Unexpected end of JSON response"
+                raise APIError(msg)
+            self._read()
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            msg = f"Malformed JSON response: expected {char!r} at offset {self._pos}"
+            raise APIError(msg)
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+                # A value ending exactly at the buffer end may be a truncated number
+                if end == len(self._buf) and not self._eof:
+                    raise _IncompleteValueError
+            except (json.JSONDecodeError, _IncompleteValueError) as e:
+                if self._eof:
+                    msg = f"Malformed JSON response: {e}"
+                    raise APIError(msg) from e
+                # Grow geometrically so re-decoding a large value stays linear overall
+                self._read(max(len(self._buf) - self._pos, 1))
+                continue
+            self._pos = end
+            return value
+
+    def members(self, stream_keys: frozenset[str]) -> Iterator[tuple[str, Any]]:
+        """Yield ``(key, value)`` for each top-level member.
+
+        Array members named in ``stream_keys`` are yielded element by element
+        as ``(key, element)`` instead of as a whole.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in stream_keys and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._peek() == "]":
+                            self._pos += 1
+                            break
+                        self._expect(",")
+            else:
+                yield key, self._value()
+            if self._peek() == "}":
+                return
+            self._expect(",")
+
+
+def iter_members(chunks: Iterable[bytes], stream_keys: Iterable[str]) -> Iterator[tuple[str, Any]]:
+    """Incrementally parse a JSON object from byte chunks.
+
+    See :meth:`_ObjectParser.members`.
+    """
+    return _ObjectParser(chunks).members(frozenset(stream_keys))
+
+
+class ResponseStream(Generic[T]):
+    """Iterator over the items of a streamed API response.
+
+    Items are parsed and yielded as soon as they have been received. The
+    remaining top-level members of the response, such as ``SessionId``, are
+    collected in :attr:`members` as they arrive; the API usually sends them
+    after the items, so they are only complete once the stream is exhausted.
+
+    The underlying HTTP response is closed when the stream is exhausted,
+    when :meth:`close` is called, or when used as a context manager. The
+    ``close`` callback receives the exception that ended the stream, or None.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        key: str,
+        parse: Callable[[Any], T],
+        close: Callable[[BaseException | None], None] = lambda error: None,
+    ) -> None:
+        self.members: dict[str, Any] = {}
+        self._events = iter_members(chunks, (key,))
+        self._key = key
+        self._parse = parse
+        self._close = close
+        self._closed = False
+
+    @property
+    def session_id(self) -> str | None:
+        """The ``SessionId`` member, if it has been received yet."""
+        return self.members.get("SessionId")
+
+    def __iter__(self) -> ResponseStream[T]:
+        return self
+
+    def __next__(self) -> T:
+        if self._closed:
+            raise StopIteration
+        try:
+            for key, value in self._events:
+                if key == self._key:
+                    return self._parse(value)
+                self.members[key] = value
+                if key == "Status":
+                    self._check_status()
+            self._check_status()
+        except BaseException as e:
+            self._finish(e)
+            raise
+        self.close()
+        raise StopIteration
+
+    def _check_status(self) -> None:
+        status = (self.members.get("Status") or {}).get("Code", "")
+        if status != "Ok":
+            msg = f"API returned status: {status}"
+            raise APIError(msg)
+
+    def _finish(self, error: BaseException | None) -> None:
+        if not self._closed:
+            self._closed = True
+            self._close(error)
+
+    def close(self) -> None:
+        self._finish(None)
+
+    def __enter__(self) -> ResponseStream[T]:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import importlib
+import json
 import re
+from array import array
+from collections.abc import Callable, Iterable, Sequence
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any
 
 import pyproj
 
@@ -11,17 +17,76 @@ from .models import Coords, Stop
 _gk4_to_wgs_transformer = pyproj.Transformer.from_crs("EPSG:5678", "EPSG:4326", always_xy=True)
 _wgs_to_gk4_transformer = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:5678", always_xy=True)
 
-_DATE_RE = re.compile(r"/Date\((\d+)([+-]\d{4})\)/")
+JSONLoads = Callable[[bytes], Any]
 
+# Optional third-party decoders, fastest first
+_FAST_JSON_BACKENDS = ("orjson", "ujson")
+
+
+def load_json_backend(name: str) -> JSONLoads:
+    """Return the ``loads`` function of a JSON library, e.g. ``"json"`` or ``"orjson"``.
+
+    Raises:
+        ImportError: If the library is not installed.
+    """
+    if name == "json":
+        return json.loads
+    module = importlib.import_module(name)
+    loads: JSONLoads = module.loads
+    return loads
+
+
+def default_json_loads() -> JSONLoads:
+    """Return the fastest installed JSON decoder, falling back to the stdlib."""
+    for name in _FAST_JSON_BACKENDS:
+        try:
+            return load_json_backend(name)
+        except ImportError:
+            continue
+    return json.loads
+
+
+def available_json_backends() -> dict[str, JSONLoads]:
+    """Return all installed JSON decoders by name, always including ``"json"``."""
+    backends = {"json": load_json_backend("json")}
+    for name in _FAST_JSON_BACKENDS:
+        try:
+            backends[name] = load_json_backend(name)
+        except ImportError:
+            continue
+    return backends
+
+
+_DATE_RE = re.compile(r"/Date\((\d+)([+-]\d{4})\)/", re.ASCII)
+
+
+def _epoch_ms(s: str) -> int:
+    """Return the milliseconds of a Microsoft JSON date: /Date(milliseconds+timezone)/."""
+    # Fast path for the exact format the API sends, e.g. /Date(1487778279147+0100)/
+    if s.startswith("/Date(") and s.endswith(")/") and s[-7:-6] in ("+", "-"):
+        digits, offset = s[6:-7], s[-6:-2]
+        if digits.isascii() and digits.isdigit() and offset.isascii() and offset.isdigit():
+            return int(digits)
 
-def parse_date(s: str) -> datetime:
-    """Parse Microsoft JSON date format: /Date(milliseconds+timezone)/."""
     m = _DATE_RE.search(s)
     if not m:
         msg = f"Invalid date string: {s}"
         raise ValueError(msg)
-    ms = int(m.group(1))
-    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return int(m.group(1))
+
+
+@lru_cache(maxsize=4096)
+def parse_date(s: str) -> datetime:
+    """Parse Microsoft JSON date format: /Date(milliseconds+timezone)/.
+
+    Results are memoized, as stops in large responses share many timestamps.
+    """
+    return datetime.fromtimestamp(_epoch_ms(s) / 1000, tz=timezone.utc)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a stop search query for use as a cache key."""
+    return " ".join(query.casefold().split())
 
 
 def format_date(dt: datetime) -> str:
@@ -30,26 +95,116 @@ def format_date(dt: datetime) -> str:
     return f"/Date({ms}-0000)/"
 
 
-def parse_point(s: str) -> Stop:
-    """Parse a pipe-delimited point string into a Stop.
-
-    Format: id|type|city|name|lat|lng|distance||shortcut
-    """
+def _split_point(s: str) -> tuple[str, str, str, str, str]:
     parts = s.split("|")
     stop_id = parts[0]
     city = parts[2] if len(parts) > 2 else ""
     name = parts[3] if len(parts) > 3 else ""
     lat_str = parts[4] if len(parts) > 4 else "0"
     lng_str = parts[5] if len(parts) > 5 else "0"
+    return stop_id, city, name, lat_str, lng_str
+
 
-    coords = None
-    if lat_str and lng_str and lat_str != "0" and lng_str != "0":
-        if "." in lat_str or "." in lng_str:
-            coords = Coords(lat=float(lat_str), lng=float(lng_str))
-        else:
-            coords = coords_gk4_to_wgs(int(lat_str), int(lng_str))
+def parse_point(s: str) -> Stop:
+    """Parse a pipe-delimited point string into a Stop.
+
+    Format: id|type|city|name|lat|lng|distance||shortcut
+    """
+    return parse_points([s])[0]
+
+
+def parse_points(strings: Iterable[str]) -> list[Stop]:
+    """Parse many point strings, converting all GK4 coordinates in one batch."""
+    batch = CoordBatch()
+    pending: list[tuple[str, str, str, Coords | int | None]] = []
+    for s in strings:
+        stop_id, city, name, lat_str, lng_str = _split_point(s)
+        coords: Coords | int | None = None
+        if lat_str and lng_str and lat_str != "0" and lng_str != "0":
+            if "." in lat_str or "." in lng_str:
+                coords = Coords(lat=float(lat_str), lng=float(lng_str))
+            else:
+                coords = batch.add(int(lat_str), int(lng_str))
+        pending.append((stop_id, city, name, coords))
+
+    converted = batch.convert()
+    return [
+        Stop(
+            id=stop_id,
+            name=name,
+            city=city,
+            coords=converted[coords] if isinstance(coords, int) else coords,
+        )
+        for stop_id, city, name, coords in pending
+    ]
+
+
+class CoordBatch:
+    """Collects GK4 points from a response so they can be converted in one transformer call.
+
+    ``add`` and ``add_many`` return positions into the list produced by ``convert``.
+    """
+
+    __slots__ = ("_lats", "_lngs")
+
+    def __init__(self) -> None:
+        self._lats: array[float] = array("d")
+        self._lngs: array[float] = array("d")
+
+    def __len__(self) -> int:
+        return len(self._lats)
+
+    def add(self, lat: float, lng: float) -> int:
+        self._lats.append(lat)
+        self._lngs.append(lng)
+        return len(self._lats) - 1
+
+    def add_many(self, lats: Iterable[float], lngs: Iterable[float]) -> tuple[int, int]:
+        start = len(self._lats)
+        self._lats.extend(lats)
+        self._lngs.extend(lngs)
+        return start, len(self._lats)
+
+    def convert_arrays(self) -> tuple[array[float], array[float]]:
+        """Convert all collected points, returning WGS84 ``(lats, lngs)`` arrays."""
+        return gk4_to_wgs_arrays(self._lats, self._lngs)
+
+    def convert(self) -> list[Coords]:
+        """Convert all collected points to ``Coords``, in insertion order."""
+        lats, lngs = self.convert_arrays()
+        return [Coords(lat=lat, lng=lng) for lat, lng in zip(lats, lngs, strict=True)]
 
-    return Stop(id=stop_id, name=name, city=city, coords=coords)
+
+def gk4_to_wgs_arrays(
+    lats: Sequence[float], lngs: Sequence[float]
+) -> tuple[array[float], array[float]]:
+    """Convert many GK4 points to WGS84 with a single transformer call.
+
+    Returns ``(lats, lngs)`` as ``array('d')``.
+    """
+    if not lats:
+        return array("d"), array("d")
+    wgs_lngs, wgs_lats = _gk4_to_wgs_transformer.transform(_as_doubles(lngs), _as_doubles(lats))
+    return wgs_lats, wgs_lngs
+
+
+def wgs_to_gk4_arrays(
+    lats: Sequence[float], lngs: Sequence[float]
+) -> tuple[array[float], array[float]]:
+    """Convert many WGS84 points to GK4 with a single transformer call.
+
+    Returns ``(lats, lngs)`` as ``array('d')``.
+    """
+    if not lats:
+        return array("d"), array("d")
+    gk4_lngs, gk4_lats = _wgs_to_gk4_transformer.transform(_as_doubles(lngs), _as_doubles(lats))
+    return gk4_lats, gk4_lngs
+
+
+def _as_doubles(values: Sequence[float]) -> array[float]:
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    return array("d", values)
 
 
 def coords_gk4_to_wgs(lat: int, lng: int) -> Coords:
@@ -58,7 +213,19 @@ def coords_gk4_to_wgs(lat: int, lng: int) -> Coords:
     return Coords(lat=wgs_lat, lng=wgs_lng)
 
 
+def coords_gk4_to_wgs_many(lats: Sequence[float], lngs: Sequence[float]) -> list[Coords]:
+    """Convert many GK4 integer coordinates to WGS84 in one batch."""
+    wgs_lats, wgs_lngs = gk4_to_wgs_arrays(lats, lngs)
+    return [Coords(lat=lat, lng=lng) for lat, lng in zip(wgs_lats, wgs_lngs, strict=True)]
+
+
 def coords_wgs_to_gk4(lat: float, lng: float) -> tuple[int, int]:
     """Convert WGS84 coordinates to GK4 integers."""
     gk4_lng, gk4_lat = _wgs_to_gk4_transformer.transform(lng, lat)
     return int(gk4_lat), int(gk4_lng)
+
+
+def coords_wgs_to_gk4_many(lats: Sequence[float], lngs: Sequence[float]) -> list[tuple[int, int]]:
+    """Convert many WGS84 coordinates to GK4 integers in one batch."""
+    gk4_lats, gk4_lngs = wgs_to_gk4_arrays(lats, lngs)
+    return [(int(lat), int(lng)) for lat, lng in zip(gk4_lats, gk4_lngs, strict=True)]
@@ -0,0 +1,738 @@
+"""Asynchronous DVB/VVO API client built on httpx."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from time import perf_counter
+from types import TracebackType
+from typing import Any, Literal, cast
+
+from ._singleflight import AsyncSingleFlight, call_key
+from ._utils import JSONLoads, format_date, normalize_query
+from .cache import Cache, ResponseCache, TTLCache
+from .columnar import DepartureBatch
+from .dvb import (
+    _STOP_CACHE_SIZE,
+    _STOP_CACHE_TTL,
+    _TIMEOUT,
+    _TRIP_CACHE_SIZE,
+    _TRIP_CACHE_TTL,
+    BASE_URL,
+    _address_params,
+    _check_status,
+    _departure_trip,
+    _learn_address,
+    _parse_address,
+    _parse_departures,
+    _parse_lines,
+    _parse_pins,
+    _parse_points,
+    _parse_route_changes,
+    _parse_routes,
+    _parse_trip_stops,
+    _pins_payload,
+    _resolve_json_loads,
+    _route_payload,
+    _RouteWindow,
+    _stop_cache_entries,
+    _trip_key,
+    _trip_ttl,
+)
+from .exceptions import APIError, CircuitOpenError, DVBError
+from .exceptions import ConnectionError as DVBConnectionError
+from .instrumentation import RequestHook, _Timing, emit
+from .models import Departure, DepartureTrip, Line, Pin, RegularStop, Route, RouteChange, Stop
+from .ratelimit import FileTokenBucketLimiter, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy, is_server_failure, parse_retry_after
+from .spatial import SpatialIndex, as_stop
+from .stop_index import StopIndex
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the extra installed
+    httpx = None  # type: ignore[assignment]
+
+
+def _connection_error(e: httpx.HTTPError) -> DVBConnectionError:
+    """Wrap an httpx exception, keeping what the retry policy needs to know."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return DVBConnectionError(
+            str(e),
+            status=e.response.status_code,
+            retry_after=parse_retry_after(e.response.headers.get("Retry-After")),
+        )
+    # The request never left the client if no connection could be established
+    sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+    return DVBConnectionError(str(e), sent=sent)
+
+
+class AsyncClient:
+    """Asynchronous DVB/VVO API client.
+
+    Mirrors :class:`dvb.Client` method for method, but every API call is a
+    coroutine. A single pooled ``httpx.AsyncClient`` is kept open for the
+    lifetime of the instance, so many requests can run concurrently on one
+    event loop. Requires the ``async`` extra (``pip install dvb[async]``).
+
+    Calls may run concurrently on the client's event loop; the client must not
+    be shared between event loops or threads.
+
+    Use as an async context manager, or call :meth:`aclose` when done::
+
+        async with AsyncClient(user_agent="my-app/1.0 (me@example.com)") as client:
+            departures = await client.monitor("Helmholtzstraße")
+
+    Args:
+        user_agent: A User-Agent string identifying your project and providing
+            contact details, e.g. ``"my-app/1.0 (me@example.com)"``.
+        max_connections: Maximum number of concurrent connections in the pool.
+        max_keepalive_connections: Maximum number of idle connections kept
+            open. ``0`` disables keep-alive.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        http2: Use HTTP/2 where the server supports it, multiplexing all
+            concurrent requests over one connection. Requires the ``http2``
+            extra (``pip install dvb[http2]``).
+        transport: Optional custom httpx transport, e.g. for testing.
+        stop_cache: Cache mapping normalized stop names to stop IDs. See
+            :class:`dvb.Client`.
+        response_cache: Optional ``ResponseCache``. Stale entries are refreshed
+            in a background task on the running event loop.
+        trip_cache: Cache for the stop sequences fetched by
+            :meth:`monitor_with_trips`. See :class:`dvb.Client`.
+        json_loads: JSON decoder or library name. See :class:`dvb.Client`.
+        hooks: Request hooks receiving a ``RequestEvent`` per API call. See
+            :class:`dvb.Client`.
+        stop_index: Optional local ``StopIndex``. See :class:`dvb.Client`.
+        spatial_index: Optional local ``SpatialIndex``. See :class:`dvb.Client`.
+        timeout: Seconds to wait for a response.
+        endpoint_timeouts: Per-endpoint timeouts overriding ``timeout``.
+        base_url: API base URL, e.g. for a caching proxy.
+        retry: Optional ``RetryPolicy``. See :class:`dvb.Client`.
+        circuit_breaker: Optional ``CircuitBreaker``. See :class:`dvb.Client`.
+        rate_limiter: Optional ``RateLimiter``. See :class:`dvb.Client`.
+        coalesce: Share one request between concurrent identical calls. See
+            :class:`dvb.Client`.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+        stop_cache: Cache | None = None,
+        response_cache: ResponseCache | None = None,
+        trip_cache: Cache | None = None,
+        json_loads: JSONLoads | str | None = None,
+        hooks: Iterable[RequestHook] = (),
+        stop_index: StopIndex | None = None,
+        spatial_index: SpatialIndex[Any] | None = None,
+        timeout: float = _TIMEOUT,
+        endpoint_timeouts: Mapping[str, float] | None = None,
+        base_url: str = BASE_URL,
+        retry: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        rate_limiter: RateLimiter | None = None,
+        coalesce: bool = True,
+    ) -> None:
+        if not user_agent or not user_agent.strip():
+            msg = "user_agent must be a non-empty string identifying your project"
+            raise ValueError(msg)
+        if httpx is None:
+            msg = "AsyncClient requires httpx; install it with `pip install dvb[async]`"
+            raise ImportError(msg)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"User-Agent": user_agent},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+            transport=transport,
+        )
+        self.timeout = timeout
+        self.endpoint_timeouts: dict[str, float] = dict(endpoint_timeouts or {})
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self._inflight = AsyncSingleFlight() if coalesce else None
+        self.stop_cache: Cache = (
+            stop_cache
+            if stop_cache is not None
+            else TTLCache(maxsize=_STOP_CACHE_SIZE, ttl=_STOP_CACHE_TTL)
+        )
+        self.response_cache = response_cache
+        self.trip_cache: Cache = (
+            trip_cache
+            if trip_cache is not None
+            else TTLCache(maxsize=_TRIP_CACHE_SIZE, ttl=_TRIP_CACHE_TTL)
+        )
+        self._json_loads = _resolve_json_loads(json_loads)
+        self.hooks: list[RequestHook] = list(hooks)
+        self.stop_index = stop_index
+        self.spatial_index = spatial_index
+        self._background: set[asyncio.Task[None]] = set()
+
+    def _timeout(self, endpoint: str) -> float:
+        return self.endpoint_timeouts.get(endpoint, self.timeout)
+
+    async def __aenter__(self) -> AsyncClient:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Wait for background refreshes to finish and close all pooled connections."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        await self._http.aclose()
+
+    async def _post(
+        self,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None = None,
+        *,
+        raw: bool = False,
+    ) -> Any:
+        return await self._request("POST", endpoint, payload, None if raw else parse)
+
+    async def _get(
+        self,
+        endpoint: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None = None,
+        *,
+        raw: bool = False,
+    ) -> Any:
+        return await self._request("GET", endpoint, params, None if raw else parse)
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None,
+    ) -> Any:
+        payload["format"] = "json"
+        timing = _Timing()
+        start = perf_counter()
+        error: BaseException | None = None
+        try:
+            if self._inflight is None:
+                return await self._fetch_parsed(method, endpoint, payload, parse, timing)
+            key = call_key(method, endpoint, payload, parse)
+            result, leader = await self._inflight.do(
+                key, partial(self._fetch_parsed, method, endpoint, payload, parse, timing)
+            )
+            if not leader:
+                timing.cache = "coalesced"
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.hooks:
+                total = perf_counter() - start
+                emit(self.hooks, timing.event(endpoint, method, total, error))
+
+    async def _fetch_parsed(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None,
+        timing: _Timing,
+    ) -> Any:
+        data = await self._cached_fetch(method, endpoint, payload, timing)
+        if parse is None:
+            return data
+        parse_start = perf_counter()
+        result = parse(data)
+        timing.parse_time = perf_counter() - parse_start
+        return result
+
+    async def _cached_fetch(
+        self, method: str, endpoint: str, payload: dict[str, Any], timing: _Timing
+    ) -> dict[str, Any]:
+        cache = self.response_cache
+        if cache is None or not cache.caches(endpoint):
+            return await self._fetch(method, endpoint, payload, timing)
+
+        key = cache.key(endpoint, payload)
+        cached, fresh = cache.lookup(endpoint, key)
+        if cached is not None:
+            timing.cache = "hit" if fresh else "stale"
+            if not fresh and cache.claim_refresh(key):
+                task = asyncio.create_task(self._refresh(cache, method, endpoint, payload, key))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return cast(dict[str, Any], cached)
+
+        timing.cache = "miss"
+        try:
+            data = await self._fetch(method, endpoint, payload, timing)
+        except DVBConnectionError:
+            stale = cache.lookup_stale(endpoint, key)
+            if stale is None:
+                raise
+            timing.cache = "stale"
+            return cast(dict[str, Any], stale)
+        cache.store(endpoint, key, data)
+        return data
+
+    async def _refresh(
+        self,
+        cache: ResponseCache,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        key: str,
+    ) -> None:
+        timing = _Timing(cache="refresh")
+        start = perf_counter()
+        error: BaseException | None = None
+        try:
+            cache.store(endpoint, key, await self._fetch(method, endpoint, payload, timing))
+        except DVBError as e:
+            error = e  # keep serving the stale entry until it expires
+        finally:
+            cache.release_refresh(key)
+            if self.hooks:
+                total = perf_counter() - start
+                emit(self.hooks, timing.event(endpoint, method, total, error))
+
+    async def _fetch(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        timing: _Timing | None = None,
+    ) -> dict[str, Any]:
+        """Send a request, retrying and tracking failures as configured."""
+        breaker = self.circuit_breaker
+        attempt = 1
+        while True:
+            if breaker is not None and not breaker.allow(endpoint):
+                msg = f"Circuit breaker open for endpoint: {endpoint}"
+                raise CircuitOpenError(msg)
+            try:
+                await self._throttle(endpoint, timing)
+                data = await self._send(method, endpoint, payload, timing)
+            except DVBConnectionError as e:
+                if breaker is not None:
+                    if is_server_failure(e):
+                        breaker.record_failure(endpoint)
+                    else:
+                        breaker.record_success(endpoint)
+                retry = self.retry
+                if retry is None or not retry.should_retry(e, method, endpoint, attempt):
+                    raise
+                await asyncio.sleep(retry.delay(attempt, e))
+                attempt += 1
+                if timing is not None:
+                    timing.retries += 1
+                continue
+            except APIError:
+                if breaker is not None:
+                    breaker.record_success(endpoint)  # the server answered
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release(endpoint)  # cancelled or interrupted, no answer
+                raise
+            if breaker is not None:
+                breaker.record_success(endpoint)
+            return data
+
+    async def _throttle(self, endpoint: str, timing: _Timing | None = None) -> None:
+        """Wait for the rate limiter, if any, to allow a request to ``endpoint``."""
+        if self.rate_limiter is None:
+            return
+        if isinstance(self.rate_limiter, FileTokenBucketLimiter):
+            # takes an flock, which may block while another process holds it
+            wait = await asyncio.to_thread(self.rate_limiter.reserve, endpoint)
+        else:
+            wait = self.rate_limiter.reserve(endpoint)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if timing is not None:
+            timing.rate_limit_wait += wait
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        timing: _Timing | None = None,
+    ) -> dict[str, Any]:
+        start = perf_counter()
+        try:
+            if method == "POST":
+                r = await self._http.post(
+                    f"/{endpoint}",
+                    json=payload,
+                    headers={"Content-Type": "application/json; charset=UTF-8"},
+                    timeout=self._timeout(endpoint),
+                )
+            else:
+                r = await self._http.get(
+                    f"/{endpoint}", params=payload, timeout=self._timeout(endpoint)
+                )
+            r.raise_for_status()
+        except httpx.HTTPError as e:
+            raise _connection_error(e) from e
+
+        decode_start = perf_counter()
+        content = r.content
+        if timing is not None:
+            timing.latency = decode_start - start
+            timing.response_bytes = len(content)
+        try:
+            data = self._json_loads(content)
+        except ValueError as e:
+            msg = f"Invalid JSON in response: {e}"
+            raise APIError(msg) from e
+        finally:
+            if timing is not None:
+                timing.decode_time = perf_counter() - decode_start
+        return _check_status(data)
+
+    async def _resolve_stop_id(self, stop: str) -> str:
+        if stop.isdigit():
+            return stop
+        key = normalize_query(stop)
+        cached = self.stop_cache.get(key)
+        if cached is not None:
+            return str(cached)
+        if self._inflight is None:
+            return await self._lookup_stop_id(stop, key)
+        lookup = partial(self._lookup_stop_id, stop, key)
+        stop_id, _ = await self._inflight.do(("resolve", key), lookup)
+        return stop_id
+
+    async def _lookup_stop_id(self, stop: str, key: str) -> str:
+        if self.stop_index is not None:
+            local = self.stop_index.resolve(stop)
+            if local is not None:
+                return local.id
+        results = await self.find(stop)
+        if not isinstance(results, list) or not results:
+            msg = f"No stops found for query: {stop}"
+            raise APIError(msg)
+        self.stop_cache.set(key, results[0].id)
+        return results[0].id
+
+    def warm_stop_cache(
+        self,
+        entries: Mapping[str, str] | Iterable[tuple[str, str]] | str | os.PathLike[str],
+    ) -> None:
+        """Pre-populate the stop cache. See :meth:`dvb.Client.warm_stop_cache`."""
+        for key, stop_id in _stop_cache_entries(entries):
+            self.stop_cache.set(key, stop_id)
+
+    async def find(self, query: str, *, raw: bool = False) -> list[Stop] | dict[str, Any]:
+        """Find stops by name. See :meth:`dvb.Client.find`."""
+        index = None if raw else self.stop_index
+        if index is not None:
+            local = index.find(query)
+            if local:
+                return local
+        results = await self._get(
+            "tr/pointfinder", {"query": query, "stopsOnly": "true"}, _parse_points, raw=raw
+        )
+        if index is not None:
+            index.add(results)
+        return results
+
+    async def monitor(
+        self,
+        stop: str,
+        *,
+        offset: int = 0,
+        limit: int = 10,
+        raw: bool = False,
+    ) -> list[Departure] | dict[str, Any]:
+        """Get departures from a stop. See :meth:`dvb.Client.monitor`."""
+        stop_id = await self._resolve_stop_id(stop)
+        payload: dict[str, Any] = {"stopid": stop_id, "limit": limit}
+        if offset:
+            now = datetime.now(tz=timezone.utc)
+            payload["time"] = now.isoformat()
+
+        return await self._post("dm", payload, _parse_departures, raw=raw)
+
+    async def monitor_batch(self, stop: str, *, limit: int = 10) -> DepartureBatch:
+        """Get departures as a ``DepartureBatch``. See :meth:`dvb.Client.monitor_batch`."""
+        stop_id = await self._resolve_stop_id(stop)
+        payload: dict[str, Any] = {"stopid": stop_id, "limit": limit}
+        parse = partial(DepartureBatch.from_response, stop=stop_id)
+        return cast(DepartureBatch, await self._post("dm", payload, parse))
+
+    async def monitor_many(
+        self,
+        stops: Iterable[str],
+        *,
+        limit: int = 10,
+        concurrency: int = 8,
+        timeout: float | None = None,
+    ) -> dict[str, list[Departure] | DVBError]:
+        """Get departures for many stops at once. See :meth:`dvb.Client.monitor_many`.
+
+        At most ``concurrency`` requests are in flight at the same time.
+        """
+        unique = list(dict.fromkeys(stops))
+        results: dict[str, list[Departure] | DVBError] = {}
+        if not unique:
+            return results
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(stop: str) -> list[Departure]:
+            async with semaphore:
+                return cast(list[Departure], await self.monitor(stop, limit=limit))
+
+        tasks = {stop: asyncio.ensure_future(fetch(stop)) for stop in unique}
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for stop, task in tasks.items():
+            if task in pending:
+                results[stop] = DVBConnectionError(f"Timed out waiting for departures: {stop}")
+                continue
+            exc = task.exception()
+            if exc is None:
+                results[stop] = task.result()
+            elif isinstance(exc, DVBError):
+                results[stop] = exc
+            else:
+                raise exc
+        return results
+
+    async def monitor_with_trips(
+        self, stop: str, *, limit: int = 10, concurrency: int = 8
+    ) -> list[DepartureTrip]:
+        """Get departures with the stops of each trip. See :meth:`dvb.Client.monitor_with_trips`.
+
+        At most ``concurrency`` trip requests are in flight at the same time.
+        """
+        stop_id = await self._resolve_stop_id(stop)
+        departures = cast(list[Departure], await self.monitor(stop_id, limit=limit))
+        trips: dict[str, list[RegularStop] | DVBError] = {}
+        missing: dict[str, Departure] = {}
+        for dep in departures:
+            key = _trip_key(dep)
+            cached = self.trip_cache.get(key)
+            if cached is not None:
+                trips[key] = cached
+            else:
+                missing.setdefault(key, dep)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(dep: Departure) -> list[RegularStop] | DVBError:
+            try:
+                async with semaphore:
+                    stops = await self.trip_details(dep.id, dep.scheduled, stop_id, mapdata=False)
+            except DVBError as e:
+                return e
+            stops = cast(list[RegularStop], stops)
+            self.trip_cache.set(_trip_key(dep), stops, _trip_ttl(stops))
+            return stops
+
+        fetched = await asyncio.gather(*(fetch(dep) for dep in missing.values()))
+        trips.update(zip(missing, fetched, strict=True))
+        return [_departure_trip(dep, trips[_trip_key(dep)]) for dep in departures]
+
+    async def route(
+        self,
+        origin: str,
+        destination: str,
+        *,
+        time: datetime | None = None,
+        arrival: bool = False,
+        lazy_paths: bool = False,
+        raw: bool = False,
+    ) -> list[Route] | dict[str, Any]:
+        """Plan a trip between two stops. See :meth:`dvb.Client.route`."""
+        origin_id = await self._resolve_stop_id(origin)
+        dest_id = await self._resolve_stop_id(destination)
+
+        return await self._post(
+            "tr/trips",
+            _route_payload(origin_id, dest_id, time, arrival),
+            partial(_parse_routes, lazy_paths=lazy_paths),
+            raw=raw,
+        )
+
+    async def pins(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        *,
+        pin_types: tuple[str, ...] = ("Stop",),
+        raw: bool = False,
+    ) -> list[Pin] | dict[str, Any]:
+        """Get map pins within a bounding box. See :meth:`dvb.Client.pins`."""
+        payload = _pins_payload(sw_lat, sw_lng, ne_lat, ne_lng, pin_types)
+        return await self._post("map/pins", payload, _parse_pins, raw=raw)
+
+    async def address(
+        self,
+        lat: float,
+        lng: float,
+        *,
+        raw: bool = False,
+    ) -> Stop | None | dict[str, Any]:
+        """Reverse geocode coordinates to the nearest stop. See :meth:`dvb.Client.address`."""
+        index = None if raw else self.spatial_index
+        if index is not None:
+            nearest = index.nearest(lat, lng, max_distance=index.max_distance)
+            if nearest:
+                return as_stop(nearest[0].item)
+        result = await self._get(
+            "tr/pointfinder", _address_params(lat, lng), _parse_address, raw=raw
+        )
+        if raw:
+            return cast(dict[str, Any], result)
+        return _learn_address(result, index)
+
+    async def lines(
+        self,
+        stop: str,
+        *,
+        raw: bool = False,
+    ) -> list[Line] | dict[str, Any]:
+        """Get lines servicing a stop. See :meth:`dvb.Client.lines`."""
+        stop_id = await self._resolve_stop_id(stop)
+        return await self._post("stt/lines", {"stopid": stop_id}, _parse_lines, raw=raw)
+
+    async def route_changes(self, *, raw: bool = False) -> list[RouteChange] | dict[str, Any]:
+        """Get current route changes and disruptions. See :meth:`dvb.Client.route_changes`."""
+        return await self._post("rc", {"shortterm": True}, _parse_route_changes, raw=raw)
+
+    async def trip_details(
+        self,
+        trip_id: str,
+        time: datetime,
+        stop_id: str,
+        *,
+        mapdata: bool = True,
+        raw: bool = False,
+    ) -> list[RegularStop] | dict[str, Any]:
+        """Get all stops for a specific trip/departure. See :meth:`dvb.Client.trip_details`."""
+        return await self._post(
+            "dm/trip",
+            {"tripid": trip_id, "time": format_date(time), "stopid": stop_id, "mapdata": mapdata},
+            _parse_trip_stops,
+            raw=raw,
+        )
+
+    def iter_routes(
+        self,
+        origin: str,
+        destination: str,
+        *,
+        until: datetime | timedelta,
+        time: datetime | None = None,
+        direction: Literal["later", "earlier"] = "later",
+        max_pages: int = 20,
+        lazy_paths: bool = False,
+    ) -> AsyncIterator[Route]:
+        """Iterate over all connections within a time window. See :meth:`dvb.Client.iter_routes`.
+
+        The next page is requested in a background task while the caller
+        consumes the current one.
+        """
+        if direction not in ("later", "earlier"):
+            msg = f"direction must be 'later' or 'earlier', not {direction!r}"
+            raise ValueError(msg)
+        start = time or datetime.now(tz=timezone.utc)
+        window = _RouteWindow(start, until, direction == "later")
+        return self._iter_routes(origin, destination, start, window, max_pages, lazy_paths)
+
+    async def _iter_routes(
+        self,
+        origin: str,
+        destination: str,
+        start: datetime,
+        window: _RouteWindow,
+        max_pages: int,
+        lazy_paths: bool,
+    ) -> AsyncIterator[Route]:
+        origin_id = await self._resolve_stop_id(origin)
+        dest_id = await self._resolve_stop_id(destination)
+        routes = cast(
+            list[Route], await self.route(origin_id, dest_id, time=start, lazy_paths=lazy_paths)
+        )
+        task: asyncio.Task[Any] | None = None
+        try:
+            pages = 1
+            while True:
+                new, done = window.page(routes)
+                session_id = next((r.session_id for r in routes if r.session_id), None)
+                task = None
+                if not done and session_id and pages < max_pages:
+                    task = asyncio.ensure_future(
+                        self.earlier_later(
+                            origin_id,
+                            dest_id,
+                            session_id,
+                            previous=not window.later,
+                            lazy_paths=lazy_paths,
+                        )
+                    )
+                    pages += 1
+                for route in new:
+                    yield route
+                if task is None:
+                    return
+                routes = cast(list[Route], await task)
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def earlier_later(
+        self,
+        origin: str,
+        destination: str,
+        session_id: str,
+        *,
+        previous: bool = True,
+        lazy_paths: bool = False,
+        raw: bool = False,
+    ) -> list[Route] | dict[str, Any]:
+        """Paginate trip results. See :meth:`dvb.Client.earlier_later`."""
+        origin_id = await self._resolve_stop_id(origin)
+        dest_id = await self._resolve_stop_id(destination)
+
+        payload: dict[str, Any] = {
+            "origin": origin_id,
+            "destination": dest_id,
+            "sessionId": session_id,
+            "previous": previous,
+        }
+
+        return await self._post(
+            "tr/prevnext", payload, partial(_parse_routes, lazy_paths=lazy_paths), raw=raw
+        )
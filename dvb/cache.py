@@ -0,0 +1,541 @@
+"""Caches used by the clients to avoid repeated API round trips."""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from .instrumentation import logger
+
+
+class Cache(Protocol):
+    """Minimal interface for a client cache backend.
+
+    ``get`` returns ``None`` for missing or expired keys, so ``None`` itself
+    cannot be cached.
+    """
+
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache:
+    """Thread-safe in-memory LRU cache with per-entry expiry.
+
+    Args:
+        maxsize: Maximum number of entries. The least recently used entry is
+            evicted when full. ``0`` disables caching.
+        ttl: Default lifetime of an entry in seconds.
+        clock: Monotonic time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize < 0:
+            msg = "maxsize must be >= 0"
+            raise ValueError(msg)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._data[key]
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        if self.maxsize == 0:
+            return
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def update(
+        self, entries: Mapping[str, Any] | Iterable[tuple[str, Any]], ttl: float | None = None
+    ) -> None:
+        """Insert many entries at once, e.g. to pre-warm the cache."""
+        items = entries.items() if isinstance(entries, Mapping) else entries
+        for key, value in items:
+            self.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> list[tuple[str, Any]]:
+        """Return a snapshot of all unexpired entries, least recently used first."""
+        now = self._clock()
+        with self._lock:
+            return [(k, v) for k, (expires, v) in self._data.items() if expires > now]
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._data),
+            )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS dvb_cache ("
+    " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+    " expires REAL NOT NULL, accessed REAL NOT NULL,"
+    " PRIMARY KEY (namespace, key)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS dvb_cache_accessed ON dvb_cache (namespace, accessed)",
+)
+
+
+class SQLiteCache:
+    """Persistent cache in an SQLite database, shared by all processes using one file.
+
+    Entries survive restarts, so e.g. gunicorn workers pointing at the same
+    ``path`` share resolved stop IDs, pin tiles and cached responses instead
+    of each warming up from scratch. The database runs in WAL mode, so
+    readers never block each other or a writer. Every thread gets its own
+    connection, and a forked process opens new ones.
+
+    Several caches can live in one file under different ``namespace`` names;
+    ``maxsize`` applies to each namespace separately. When it is exceeded,
+    expired entries are dropped first, then the least recently used ones.
+    Access times are only written back once per ``touch_interval``, so
+    reads stay read-only most of the time.
+
+    Values are stored with :mod:`pickle`, so only use a database that no
+    untrusted party can write to. A value that cannot be pickled, or a
+    database error such as a lock held longer than ``timeout``, is logged to
+    the ``dvb`` logger instead of raised: lookups report a miss, and writes
+    and deletions are skipped. Only :meth:`items` and ``len()`` raise
+    ``sqlite3.Error``.
+
+    Args:
+        path: Database file, created if missing.
+        namespace: Name separating this cache from others in the same file.
+        maxsize: Maximum number of entries in the namespace. ``0`` disables
+            caching.
+        ttl: Default lifetime of an entry in seconds.
+        timeout: Seconds to wait for a lock held by another connection.
+        touch_interval: Minimum seconds between access time updates of an entry.
+        clock: Wall-clock time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        namespace: str = "default",
+        maxsize: int = 10_000,
+        ttl: float = 3600.0,
+        timeout: float = 5.0,
+        touch_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if maxsize < 0:
+            msg = "maxsize must be >= 0"
+            raise ValueError(msg)
+        self.path = os.fspath(path)
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self._clock = clock
+        self._local = threading.local()
+        self._connections: list[tuple[int, sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._connect()  # create the schema and fail early on an unusable path
+
+    def _connect(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == pid:
+            return conn
+        # Autocommit mode; writes open their own IMMEDIATE transactions
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        self._local.conn = conn
+        self._local.pid = pid
+        with self._lock:
+            self._connections.append((pid, conn))
+        return conn
+
+    def get(self, key: str) -> Any | None:
+        now = self._clock()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires, accessed FROM dvb_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._count_miss()
+                return None
+            value = pickle.loads(row[0])
+        except Exception as e:  # a broken cache must not break requests
+            logger.warning("Reading %r from cache %s failed: %s", key, self.path, e)
+            self._count_miss()
+            return None
+        with self._lock:
+            self._hits += 1
+        if now - row[2] >= self.touch_interval:
+            try:
+                conn.execute(
+                    "UPDATE dvb_cache SET accessed = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+            except sqlite3.Error as e:  # e.g. a busy writer; the hit stands
+                logger.debug("Updating access time of %r in %s failed: %s", key, self.path, e)
+        return value
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self.update([(key, value)], ttl)
+
+    def update(
+        self, entries: Mapping[str, Any] | Iterable[tuple[str, Any]], ttl: float | None = None
+    ) -> None:
+        """Insert many entries in a single transaction, e.g. to pre-warm the cache."""
+        if self.maxsize == 0:
+            return
+        now = self._clock()
+        expires = now + (self.ttl if ttl is None else ttl)
+        items = entries.items() if isinstance(entries, Mapping) else entries
+        rows = []
+        for key, value in items:
+            try:
+                rows.append(
+                    (
+                        self.namespace,
+                        key,
+                        pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                        expires,
+                        now,
+                    )
+                )
+            except Exception as e:
+                logger.warning("Cannot cache %r in %s: %s", key, self.path, e)
+        if not rows:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.executemany("INSERT OR REPLACE INTO dvb_cache VALUES (?, ?, ?, ?, ?)", rows)
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning("Writing to cache %s failed: %s", self.path, e)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Taking the write lock up front avoids two readers deadlocking on an upgrade
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:  # also after a failed COMMIT, or the connection stays stuck
+                conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        (size,) = conn.execute(
+            "SELECT COUNT(*) FROM dvb_cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        if size <= self.maxsize:
+            return
+        expired = conn.execute(
+            "DELETE FROM dvb_cache WHERE namespace = ? AND expires <= ?", (self.namespace, now)
+        ).rowcount
+        excess = size - expired - self.maxsize
+        if excess <= 0:
+            return
+        evicted = conn.execute(
+            "DELETE FROM dvb_cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM dvb_cache WHERE namespace = ? ORDER BY accessed LIMIT ?)",
+            (self.namespace, self.namespace, excess),
+        ).rowcount
+        with self._lock:
+            self._evictions += evicted
+
+    def _delete(self, where: str, params: tuple[Any, ...]) -> int:
+        try:
+            with self._transaction() as conn:
+                return conn.execute(
+                    f"DELETE FROM dvb_cache WHERE namespace = ?{where}", (self.namespace, *params)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("Deleting from cache %s failed: %s", self.path, e)
+            return 0
+
+    def delete(self, key: str) -> None:
+        self._delete(" AND key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove all entries of this namespace."""
+        self._delete("", ())
+
+    def purge(self) -> int:
+        """Remove the expired entries of this namespace and return how many there were."""
+        return self._delete(" AND expires <= ?", (self._clock(),))
+
+    def items(self) -> list[tuple[str, Any]]:
+        """Return a snapshot of all unexpired entries, least recently used first."""
+        rows = self._connect().execute(
+            "SELECT key, value FROM dvb_cache WHERE namespace = ? AND expires > ?"
+            " ORDER BY accessed",
+            (self.namespace, self._clock()),
+        )
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def close(self) -> None:
+        """Close the connections this process opened. The cache reconnects when used again."""
+        pid = os.getpid()
+        with self._lock:
+            mine = [conn for owner, conn in self._connections if owner == pid]
+            self._connections = [(o, c) for o, c in self._connections if o != pid]
+        for conn in mine:
+            conn.close()
+        self._local = threading.local()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hits, misses and evictions of this process; ``size`` covers all processes."""
+        size = len(self)
+        with self._lock:
+            return CacheStats(
+                hits=self._hits, misses=self._misses, evictions=self._evictions, size=size
+            )
+
+    def __len__(self) -> int:
+        (size,) = (
+            self._connect()
+            .execute(
+                "SELECT COUNT(*) FROM dvb_cache WHERE namespace = ? AND expires > ?",
+                (self.namespace, self._clock()),
+            )
+            .fetchone()
+        )
+        return int(size)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT 1 FROM dvb_cache WHERE namespace = ? AND key = ? AND expires > ?",
+                    (self.namespace, key, self._clock()),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            logger.warning("Reading %r from cache %s failed: %s", key, self.path, e)
+            return False
+        return row is not None
+
+
+DEFAULT_RESPONSE_TTLS: dict[str, float] = {
+    "stt/lines": 24 * 60 * 60,
+    "map/pins": 24 * 60 * 60,
+    "rc": 10 * 60,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ResponseCacheStats:
+    hits: int
+    stale_hits: int
+    misses: int
+    refreshes: int
+    error_hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+
+class ResponseCache:
+    """Cache for decoded API responses with per-endpoint lifetimes.
+
+    Only endpoints listed in ``ttls`` are cached. Once an entry is older than
+    its endpoint's TTL it is served stale for up to ``stale_ttl`` more seconds
+    while the client refreshes it in the background (stale-while-revalidate).
+    If a request fails with a connection error, or the endpoint's circuit
+    breaker is open, a response up to ``stale_if_error`` seconds past its TTL
+    is served instead of raising (stale-if-error).
+
+    Cached responses are shared between callers and must be treated as
+    read-only, including those returned with ``raw=True``.
+
+    Args:
+        ttls: Seconds a response stays fresh, keyed by endpoint, e.g.
+            ``{"stt/lines": 3600}``. Defaults to ``DEFAULT_RESPONSE_TTLS``.
+        stale_ttl: Seconds an expired response may still be served while it
+            is being refreshed. ``0`` disables stale-while-revalidate.
+        stale_if_error: Seconds an expired response may still be served when
+            fetching a new one fails. ``0`` disables stale-if-error.
+        backend: Storage for the entries. Defaults to an in-memory ``TTLCache``.
+        clock: Wall-clock time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] | None = None,
+        *,
+        stale_ttl: float = 0.0,
+        stale_if_error: float = 0.0,
+        backend: Cache | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttls = dict(DEFAULT_RESPONSE_TTLS if ttls is None else ttls)
+        self.stale_ttl = stale_ttl
+        self.stale_if_error = stale_if_error
+        self._backend: Cache = backend if backend is not None else TTLCache(maxsize=1024)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._error_hits = 0
+
+    def caches(self, endpoint: str) -> bool:
+        return endpoint in self.ttls
+
+    @staticmethod
+    def key(endpoint: str, payload: Mapping[str, Any]) -> str:
+        """Build a canonical key from the endpoint and its normalized payload."""
+        return f"{endpoint}:{json.dumps(payload, sort_keys=True, separators=(',', ':'))}"
+
+    def lookup(self, endpoint: str, key: str) -> tuple[Any | None, bool]:
+        """Return ``(data, fresh)``, or ``(None, False)`` on a miss."""
+        entry = self._backend.get(key)
+        now = self._clock()
+        if entry is not None:
+            stored_at, data = entry
+            age = now - stored_at
+            if age < self.ttls[endpoint]:
+                with self._lock:
+                    self._hits += 1
+                return data, True
+            if age < self.ttls[endpoint] + self.stale_ttl:
+                with self._lock:
+                    self._stale_hits += 1
+                return data, False
+        with self._lock:
+            self._misses += 1
+        return None, False
+
+    def lookup_stale(self, endpoint: str, key: str) -> Any | None:
+        """Return an expired response still within ``stale_if_error``, or None."""
+        if self.stale_if_error <= 0:
+            return None
+        entry = self._backend.get(key)
+        if entry is None:
+            return None
+        stored_at, data = entry
+        if self._clock() - stored_at >= self.ttls[endpoint] + self.stale_if_error:
+            return None
+        with self._lock:
+            self._error_hits += 1
+        return data
+
+    def store(self, endpoint: str, key: str, data: Any) -> None:
+        keep = max(self.stale_ttl, self.stale_if_error)
+        self._backend.set(key, (self._clock(), data), ttl=self.ttls[endpoint] + keep)
+
+    def claim_refresh(self, key: str) -> bool:
+        """Mark ``key`` as being refreshed. Returns False if a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._refreshes += 1
+            return True
+
+    def release_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    @property
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(
+                hits=self._hits,
+                stale_hits=self._stale_hits,
+                misses=self._misses,
+                refreshes=self._refreshes,
+                error_hits=self._error_hits,
+            )
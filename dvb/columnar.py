@@ -0,0 +1,358 @@
+"""Columnar storage of departure monitor snapshots."""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timezone
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Literal, Union
+
+from ._utils import _epoch_ms
+from .exceptions import APIError
+from .models import Departure, Platform
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MISSING = -(2**63)  # also numpy's NaT, so missing times become NaT in to_numpy()
+
+_TIME_COLUMNS = ("fetched", "scheduled", "real_time")
+_STRING_COLUMNS = (
+    "stop",
+    "id",
+    "line",
+    "direction",
+    "mode",
+    "state",
+    "occupancy",
+    "platform",
+    "platform_type",
+)
+
+_MAGIC = b"DVBDEPS\0"
+_FORMAT_VERSION = 1
+# magic, version, reserved, rows, number of strings, string bytes
+_HEADER = struct.Struct("<8sIIQQQ")
+
+Column = Union["array[int]", memoryview]
+
+
+def _to_ms(dt: datetime) -> int:
+    return round(dt.timestamp() * 1000)
+
+
+def _from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def _little_endian(column: Column, typecode: str) -> Column:
+    if sys.byteorder == "little":
+        return column
+    swapped = array(typecode, column)
+    swapped.byteswap()
+    return swapped
+
+
+class DepartureBatch:
+    """Departures of any number of monitor snapshots, stored column by column.
+
+    Times are ``array('q')`` columns of milliseconds since the epoch, with
+    :data:`MISSING` for departures without a real-time estimate. Strings are
+    interned into the shared :attr:`strings` table and stored as
+    ``array('i')`` codes into it, ``-1`` standing for None. A departure takes
+    60 bytes this way, and repeated snapshots of the same stops add few new
+    strings.
+
+    Batches are built straight from ``dm`` responses with :meth:`add` or
+    :meth:`from_response`, without creating ``Departure`` objects, and are
+    combined with :meth:`extend`. :meth:`save` writes a compact binary file
+    that :meth:`load` memory-maps back in without copying the columns.
+    Loaded batches are read-only.
+
+    Example::
+
+        archive = DepartureBatch()
+        for stop in stops:
+            archive.extend(client.monitor_batch(stop, limit=50))
+        archive.save("2024-05-01T12-00.deps")
+
+        with DepartureBatch.load("2024-05-01T12-00.deps") as batch:
+            times = batch.to_numpy()
+            delays = times["real_time"] - times["scheduled"]
+
+    Time columns: ``fetched`` (when the snapshot was taken), ``scheduled``
+    and ``real_time``. String columns: ``stop`` (as passed to :meth:`add`;
+    the resolved stop ID in batches from :meth:`dvb.Client.monitor_batch`),
+    ``id``, ``line``, ``direction``, ``mode``, ``state``, ``occupancy``,
+    ``platform`` and ``platform_type``.
+    """
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+        self._columns: dict[str, Column] = {name: array("q") for name in _TIME_COLUMNS}
+        self._columns.update({name: array("i") for name in _STRING_COLUMNS})
+        self._rows = 0
+        self._mmap: mmap.mmap | None = None
+        self._view: memoryview | None = None
+
+    @classmethod
+    def from_response(
+        cls, data: Mapping[str, Any], *, stop: str = "", fetched: datetime | None = None
+    ) -> DepartureBatch:
+        """Build a batch from a decoded ``dm`` response. See :meth:`add`."""
+        batch = cls()
+        batch.add(data, stop=stop, fetched=fetched)
+        return batch
+
+    def _intern(self, s: str) -> int:
+        code = self._index.get(s)
+        if code is None:
+            code = self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return code
+
+    def _check_writable(self) -> None:
+        if self._mmap is not None:
+            msg = "DepartureBatch loaded from a file is read-only"
+            raise TypeError(msg)
+
+    def add(
+        self, data: Mapping[str, Any], *, stop: str = "", fetched: datetime | None = None
+    ) -> None:
+        """Append the departures of a decoded ``dm`` response.
+
+        Args:
+            data: The response, e.g. from ``client.monitor(stop, raw=True)``.
+            stop: The monitored stop, stored in the ``stop`` column.
+            fetched: When the response was received. Defaults to now.
+
+        Raises:
+            APIError: If a departure has a missing or invalid ``ScheduledTime``.
+                The departures before it have been added.
+        """
+        self._check_writable()
+        fetched_ms = _to_ms(fetched or datetime.now(tz=timezone.utc))
+        columns: dict[str, Any] = self._columns
+        intern = self._intern
+        stop_code = intern(stop)
+        for dep in data.get("Departures", []):
+            try:
+                scheduled = _epoch_ms(dep["ScheduledTime"])
+            except (KeyError, TypeError, ValueError) as e:
+                msg = f"Invalid departure {dep.get('Id', '')!r}: bad ScheduledTime ({e})"
+                raise APIError(msg) from e
+            real_time = dep.get("RealTime")
+            try:
+                real_time_ms = _epoch_ms(real_time) if real_time else MISSING
+            except (TypeError, ValueError):
+                real_time_ms = MISSING
+            platform = dep.get("Platform")
+            # Intern and append only once the row is known to be valid, so a
+            # bad departure cannot leave the columns with different lengths.
+            columns["fetched"].append(fetched_ms)
+            columns["scheduled"].append(scheduled)
+            columns["real_time"].append(real_time_ms)
+            columns["stop"].append(stop_code)
+            columns["id"].append(intern(dep.get("Id", "")))
+            columns["line"].append(intern(dep.get("LineName", "")))
+            columns["direction"].append(intern(dep.get("Direction", "")))
+            columns["mode"].append(intern(dep.get("Mot", "")))
+            columns["state"].append(intern(dep.get("State", "")))
+            columns["occupancy"].append(intern(dep.get("Occupancy", "Unknown")))
+            if platform:
+                columns["platform"].append(intern(platform.get("Name", "")))
+                columns["platform_type"].append(intern(platform.get("Type", "")))
+            else:
+                columns["platform"].append(-1)
+                columns["platform_type"].append(-1)
+            self._rows += 1
+
+    def extend(self, other: DepartureBatch) -> None:
+        """Append all rows of another batch, merging its string table into this one."""
+        self._check_writable()
+        columns: dict[str, Any] = self._columns
+        for name in _TIME_COLUMNS:
+            columns[name].extend(other._columns[name])
+        codes = [self._intern(s) for s in other.strings]
+        for name in _STRING_COLUMNS:
+            columns[name].extend(codes[c] if c >= 0 else -1 for c in other._columns[name])
+        self._rows += len(other)
+
+    def copy(self) -> DepartureBatch:
+        """Return a writable copy, also of a batch loaded from a file."""
+        batch = DepartureBatch()
+        batch.extend(self)
+        return batch
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def column(self, name: str) -> Column:
+        """Return a time column, or the codes of a string column."""
+        return self._columns[name]
+
+    def strings_of(self, name: str) -> list[str | None]:
+        """Return the values of a string column."""
+        strings = self.strings
+        return [strings[c] if c >= 0 else None for c in self._columns[name]]
+
+    def __getitem__(self, i: int) -> Departure:
+        """Rebuild the ``Departure`` of row ``i``."""
+        i = range(self._rows)[i]
+        c = self._columns
+        strings = self.strings
+        platform = c["platform"][i]
+        real_time = c["real_time"][i]
+        return Departure(
+            id=strings[c["id"][i]],
+            line=strings[c["line"][i]],
+            direction=strings[c["direction"][i]],
+            scheduled=_from_ms(c["scheduled"][i]),
+            real_time=None if real_time == MISSING else _from_ms(real_time),
+            state=strings[c["state"][i]],
+            platform=(
+                None
+                if platform < 0
+                else Platform(name=strings[platform], type=strings[c["platform_type"][i]])
+            ),
+            mode=strings[c["mode"][i]],
+            occupancy=strings[c["occupancy"][i]],
+        )
+
+    def __iter__(self) -> Iterator[Departure]:
+        for i in range(self._rows):
+            yield self[i]
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Return every column as a NumPy array sharing memory with the batch.
+
+        Time columns are ``datetime64[ms]``, with NaT where missing; string
+        columns are ``int32`` codes into :attr:`strings`.
+        """
+        import numpy as np
+
+        arrays = {
+            name: np.frombuffer(self._columns[name], dtype=np.int64).view("datetime64[ms]")
+            for name in _TIME_COLUMNS
+        }
+        arrays.update(
+            {name: np.frombuffer(self._columns[name], dtype=np.int32) for name in _STRING_COLUMNS}
+        )
+        return arrays
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Write the batch to a binary file, replacing it atomically.
+
+        The file holds a header, every column as a little-endian array
+        aligned to 8 bytes, and the string table as UTF-8 with offsets.
+        """
+        encoded = [s.encode() for s in self.strings]
+        offsets = array("Q", [0])
+        for s in encoded:
+            offsets.append(offsets[-1] + len(s))
+        tmp = f"{os.fspath(path)}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, 0, self._rows, len(encoded), offsets[-1]))
+            for name in (*_TIME_COLUMNS, *_STRING_COLUMNS):
+                column = self._columns[name]
+                f.write(_little_endian(column, "q" if name in _TIME_COLUMNS else "i"))
+                f.write(b"\0" * _padding(len(column) * column.itemsize))
+            f.write(_little_endian(offsets, "Q"))
+            f.write(b"".join(encoded))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> DepartureBatch:
+        """Memory-map a file written by :meth:`save`.
+
+        The columns are views into the mapping, so loading takes time only
+        for the string table. Close the batch, or use it as a context
+        manager, to release the file.
+
+        Raises:
+            ValueError: If the file is not a departure batch of this version.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                msg = f"{os.fspath(path)} is not a departure batch file"
+                raise ValueError(msg)
+            magic, version, _, rows, count, string_bytes = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _FORMAT_VERSION:
+                msg = f"{os.fspath(path)} is not a version {_FORMAT_VERSION} departure batch file"
+                raise ValueError(msg)
+            times = rows * 8
+            codes = rows * 4 + _padding(rows * 4)
+            expected = (
+                _HEADER.size
+                + len(_TIME_COLUMNS) * times
+                + len(_STRING_COLUMNS) * codes
+                + (count + 1) * 8
+                + string_bytes
+            )
+            if size < expected:
+                msg = f"{os.fspath(path)} is truncated"
+                raise ValueError(msg)
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        batch = cls()
+        view = memoryview(mapping)
+        pos = _HEADER.size
+
+        def take(typecode: Literal["q", "i", "Q"], length: int) -> Column:
+            nonlocal pos
+            nbytes = length * struct.calcsize(typecode)
+            column = _little_endian(view[pos : pos + nbytes].cast(typecode), typecode)
+            pos += nbytes + _padding(nbytes)
+            return column
+
+        for name in _TIME_COLUMNS:
+            batch._columns[name] = take("q", rows)
+        for name in _STRING_COLUMNS:
+            batch._columns[name] = take("i", rows)
+        offsets = take("Q", count + 1)
+        blob = bytes(view[pos : pos + string_bytes])
+        batch.strings = [blob[offsets[i] : offsets[i + 1]].decode() for i in range(count)]
+        batch._index = {s: i for i, s in enumerate(batch.strings)}
+        batch._rows = rows
+        batch._mmap = mapping
+        batch._view = view
+        if isinstance(offsets, memoryview):
+            offsets.release()
+        return batch
+
+    def close(self) -> None:
+        """Release the file of a loaded batch. Arrays from :meth:`to_numpy` must be gone."""
+        if self._mmap is None:
+            return
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._columns = {}
+        self._rows = 0
+        self._mmap.close()
+
+    def __enter__(self) -> DepartureBatch:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
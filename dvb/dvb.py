@@ -2,30 +2,76 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any
+import json
+import os
+import threading
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from time import perf_counter, sleep
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Literal, TypeVar, cast
 
 import requests
-
-from ._utils import coords_gk4_to_wgs, coords_wgs_to_gk4, format_date, parse_date, parse_point
-from .exceptions import APIError
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from ._singleflight import SingleFlight, call_key
+from ._stream import ResponseStream
+from ._utils import (
+    CoordBatch,
+    JSONLoads,
+    coords_wgs_to_gk4,
+    default_json_loads,
+    format_date,
+    gk4_to_wgs_arrays,
+    load_json_backend,
+    normalize_query,
+    parse_date,
+    parse_point,
+    parse_points,
+)
+from .cache import Cache, ResponseCache, TTLCache
+from .columnar import DepartureBatch
+from .exceptions import APIError, CircuitOpenError, DVBError
 from .exceptions import ConnectionError as DVBConnectionError
+from .instrumentation import RequestHook, _Timing, emit
 from .models import (
     Coords,
     Departure,
+    DepartureTrip,
     Line,
     PartialRoute,
     Pin,
     Platform,
+    Polyline,
     RegularStop,
     Route,
     RouteChange,
     Stop,
     ValidityPeriod,
 )
+from .ratelimit import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy, is_server_failure, parse_retry_after
+from .spatial import SpatialIndex, as_stop
+from .stop_index import StopIndex
+
+if TYPE_CHECKING:
+    from urllib3._base_connection import BaseHTTPConnection
+
+T = TypeVar("T")
 
 BASE_URL = "https://webapi.vvo-online.de"
-_TIMEOUT = 15
+_TIMEOUT = 15.0
+_STREAM_CHUNK_SIZE = 64 * 1024
+_STOP_CACHE_SIZE = 4096
+_STOP_CACHE_TTL = 24 * 60 * 60
+_TRIP_CACHE_SIZE = 2048
+_TRIP_CACHE_TTL = 60 * 60  # for trips without stop times
+_TRIP_GRACE = 10 * 60  # keep trips cached this long after their last stop
 
 
 def _parse_platform(data: dict[str, Any] | None) -> Platform | None:
@@ -34,13 +80,25 @@ def _parse_platform(data: dict[str, Any] | None) -> Platform | None:
     return Platform(name=data.get("Name", ""), type=data.get("Type", ""))
 
 
-def _parse_regular_stop(data: dict[str, Any]) -> RegularStop:
-    coords = None
+def _add_stop_coords(batch: CoordBatch, data: dict[str, Any]) -> int | None:
     lat = data.get("Latitude")
     lng = data.get("Longitude")
     if lat and lng:
-        coords = coords_gk4_to_wgs(int(lat), int(lng))
+        return batch.add(int(lat), int(lng))
+    return None
+
 
+def _parse_regular_stops(items: list[dict[str, Any]]) -> list[RegularStop]:
+    batch = CoordBatch()
+    refs = [_add_stop_coords(batch, data) for data in items]
+    converted = batch.convert()
+    return [
+        _parse_regular_stop(data, None if ref is None else converted[ref])
+        for data, ref in zip(items, refs, strict=True)
+    ]
+
+
+def _parse_regular_stop(data: dict[str, Any], coords: Coords | None) -> RegularStop:
     arrival = _try_parse_date(data.get("ArrivalTime") or data.get("Time"))
     departure = _try_parse_date(data.get("DepartureTime") or data.get("Time"))
     arrival_rt = _try_parse_date(data.get("ArrivalRealTime") or data.get("RealTime"))
@@ -69,17 +127,41 @@ def _try_parse_date(s: str | None) -> datetime | None:
         return None
 
 
-def _parse_route(route_data: dict[str, Any], session_id: str | None = None) -> Route:
-    legs: list[PartialRoute] = []
+def _parse_route(
+    route_data: dict[str, Any], session_id: str | None = None, *, lazy_paths: bool = False
+) -> Route:
+    # Collect every stop and path vertex first so the whole route is
+    # reprojected with a single transformer call. Lazy paths keep their raw
+    # map data string and are decoded on first access instead.
+    batch = CoordBatch()
+    route_map_data = route_data.get("MapData", [])
+    pending: list[tuple[dict[str, Any], list[int | None], tuple[int, int] | Polyline | None]] = []
     for pr in route_data.get("PartialRoutes", []):
-        mot = pr.get("Mot", {})
-        stops = [_parse_regular_stop(rs) for rs in pr.get("RegularStops", [])]
-
-        path: list[Coords] | None = None
+        stop_refs = [_add_stop_coords(batch, rs) for rs in pr.get("RegularStops", [])]
+        path_ref: tuple[int, int] | Polyline | None = None
         map_data_index = pr.get("MapDataIndex")
-        route_map_data = route_data.get("MapData", [])
         if map_data_index is not None and map_data_index < len(route_map_data):
-            path = _parse_map_data(route_map_data[map_data_index])
+            map_str = route_map_data[map_data_index]
+            if lazy_paths:
+                path_ref = _parse_map_data(map_str, lazy=True)
+            else:
+                path_ref = batch.add_many(*_split_map_data(map_str))
+        pending.append((pr, stop_refs, path_ref))
+
+    lats, lngs = batch.convert_arrays()
+    legs: list[PartialRoute] = []
+    for pr, stop_refs, path_ref in pending:
+        mot = pr.get("Mot", {})
+        stops = [
+            _parse_regular_stop(rs, None if ref is None else Coords(lat=lats[ref], lng=lngs[ref]))
+            for rs, ref in zip(pr.get("RegularStops", []), stop_refs, strict=True)
+        ]
+        path = None
+        if isinstance(path_ref, Polyline):
+            path = path_ref
+        elif path_ref is not None:
+            start, end = path_ref
+            path = Polyline.from_arrays(lats[start:end], lngs[start:end])
 
         legs.append(
             PartialRoute(
@@ -105,20 +187,30 @@ def _parse_route(route_data: dict[str, Any], session_id: str | None = None) -> R
     )
 
 
-def _parse_map_data(map_str: str) -> list[Coords]:
+def _split_map_data(map_str: str) -> tuple[array[float], array[float]]:
     parts = map_str.split("|")
     # First element is the transport mode, then alternating lat/lng pairs
-    coords: list[Coords] = []
-    i = 1
-    while i + 1 < len(parts):
+    lats: array[float] = array("d")
+    lngs: array[float] = array("d")
+    for i in range(1, len(parts) - 1, 2):
         try:
             lat = int(parts[i])
             lng = int(parts[i + 1])
-            coords.append(coords_gk4_to_wgs(lat, lng))
-        except (ValueError, IndexError):
-            pass
-        i += 2
-    return coords
+        except ValueError:
+            continue
+        lats.append(lat)
+        lngs.append(lng)
+    return lats, lngs
+
+
+def _decode_map_data(map_str: str) -> tuple[array[float], array[float]]:
+    return gk4_to_wgs_arrays(*_split_map_data(map_str))
+
+
+def _parse_map_data(map_str: str, *, lazy: bool = False) -> Polyline:
+    if lazy:
+        return Polyline.lazy(partial(_decode_map_data, map_str))
+    return Polyline.from_arrays(*_decode_map_data(map_str))
 
 
 def _pin_type_from_id(pin_id: str) -> str:
@@ -139,72 +231,800 @@ def _pin_type_from_id(pin_id: str) -> str:
     return "Unknown"
 
 
+def _check_status(data: dict[str, Any]) -> dict[str, Any]:
+    status = data.get("Status", {}).get("Code", "")
+    if status != "Ok":
+        msg = f"API returned status: {status}"
+        raise APIError(msg)
+    return data
+
+
+def _parse_points(data: dict[str, Any]) -> list[Stop]:
+    return parse_points(p for p in data.get("Points", []) if p)
+
+
+def _parse_address(data: dict[str, Any]) -> tuple[Stop, bool] | None:
+    """Return the nearest point and whether it is a stop rather than e.g. an address."""
+    points = data.get("Points", [])
+    if not points:
+        return None
+    parts = points[0].split("|", 2)
+    return parse_point(points[0]), len(parts) < 2 or not parts[1]
+
+
+def _learn_address(found: tuple[Stop, bool] | None, index: SpatialIndex[Any] | None) -> Stop | None:
+    """Unpack an ``address`` result, adding it to the spatial index if it is a stop."""
+    if found is None:
+        return None
+    stop, is_stop = found
+    if index is not None and is_stop:
+        index.add([stop])
+    return stop
+
+
+def _parse_departures(data: dict[str, Any]) -> list[Departure]:
+    departures: list[Departure] = []
+    for dep in data.get("Departures", []):
+        try:
+            scheduled = parse_date(dep["ScheduledTime"])
+        except (KeyError, TypeError, ValueError) as e:
+            msg = f"Invalid departure {dep.get('Id', '')!r}: bad ScheduledTime ({e})"
+            raise APIError(msg) from e
+        real_time = _try_parse_date(dep.get("RealTime"))
+
+        departures.append(
+            Departure(
+                id=dep.get("Id", ""),
+                line=dep.get("LineName", ""),
+                direction=dep.get("Direction", ""),
+                scheduled=scheduled,
+                real_time=real_time,
+                state=dep.get("State", ""),
+                platform=_parse_platform(dep.get("Platform")),
+                mode=dep.get("Mot", ""),
+                occupancy=dep.get("Occupancy", "Unknown"),
+            )
+        )
+    return departures
+
+
+def _parse_routes(data: dict[str, Any], *, lazy_paths: bool = False) -> list[Route]:
+    session_id = data.get("SessionId")
+    return [_parse_route(r, session_id, lazy_paths=lazy_paths) for r in data.get("Routes", [])]
+
+
+def _parse_pins(data: dict[str, Any]) -> list[Pin]:
+    batch = CoordBatch()
+    pending: list[tuple[str, str, str, int | None]] = []
+    for pin_str in data.get("Pins", []):
+        if not pin_str:
+            continue
+        parts = pin_str.split("|")
+        pin_id = parts[0] if parts else ""
+        city = parts[2] if len(parts) > 2 else ""
+        name = parts[3] if len(parts) > 3 else ""
+
+        ref = None
+        if len(parts) > 5:
+            lat_str = parts[4]
+            lng_str = parts[5]
+            if lat_str and lng_str and lat_str != "0" and lng_str != "0":
+                ref = batch.add(int(lat_str), int(lng_str))
+        pending.append((pin_id, city, name, ref))
+
+    converted = batch.convert()
+    return [
+        Pin(
+            id=pin_id,
+            name=name,
+            city=city,
+            coords=None if ref is None else converted[ref],
+            type=_pin_type_from_id(pin_id),
+        )
+        for pin_id, city, name, ref in pending
+    ]
+
+
+def _parse_lines(data: dict[str, Any]) -> list[Line]:
+    result: list[Line] = []
+    for line_data in data.get("Lines", []):
+        directions = [d["Name"] for d in line_data.get("Directions", [])]
+        result.append(
+            Line(
+                name=line_data.get("Name", ""),
+                mode=line_data.get("Mot", ""),
+                directions=directions,
+            )
+        )
+    return result
+
+
+def _parse_route_changes(data: dict[str, Any]) -> list[RouteChange]:
+    result: list[RouteChange] = []
+    for change in data.get("Changes", []):
+        validity_periods = []
+        for vp in change.get("ValidityPeriods", []):
+            begin = _try_parse_date(vp.get("Begin"))
+            end = _try_parse_date(vp.get("End"))
+            if begin and end:
+                validity_periods.append(ValidityPeriod(begin=begin, end=end))
+
+        result.append(
+            RouteChange(
+                id=change.get("Id", ""),
+                title=change.get("Title", ""),
+                description=change.get("Description", ""),
+                type=change.get("Type", ""),
+                validity_periods=validity_periods,
+                lines=change.get("LineIds", []),
+            )
+        )
+    return result
+
+
+def _parse_stream_stop(data: dict[str, Any]) -> RegularStop:
+    return _parse_regular_stops([data])[0]
+
+
+def _parse_trip_stops(data: dict[str, Any]) -> list[RegularStop]:
+    return _parse_regular_stops(data.get("Stops", []))
+
+
+def _trip_key(departure: Departure) -> str:
+    return f"{departure.id}@{format_date(departure.scheduled)}"
+
+
+def _trip_ttl(stops: list[RegularStop]) -> float:
+    """Seconds until a trip with ``stops`` has ended, plus a grace period."""
+    times = [
+        t
+        for stop in stops
+        for t in (stop.arrival_real_time, stop.arrival, stop.departure_real_time, stop.departure)
+        if t is not None
+    ]
+    if not times:
+        return _TRIP_CACHE_TTL
+    remaining = (max(times) - datetime.now(tz=timezone.utc)).total_seconds()
+    return max(60.0, remaining + _TRIP_GRACE)
+
+
+def _departure_trip(departure: Departure, trip: list[RegularStop] | DVBError) -> DepartureTrip:
+    if isinstance(trip, DVBError):
+        return DepartureTrip(departure, [], trip)
+    return DepartureTrip(departure, list(trip))  # the cached list stays private
+
+
+def _pins_payload(
+    sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float, pin_types: tuple[str, ...]
+) -> dict[str, Any]:
+    sw_gk4_lat, sw_gk4_lng = coords_wgs_to_gk4(sw_lat, sw_lng)
+    ne_gk4_lat, ne_gk4_lng = coords_wgs_to_gk4(ne_lat, ne_lng)
+    return {
+        "swlat": str(sw_gk4_lat),
+        "swlng": str(sw_gk4_lng),
+        "nelat": str(ne_gk4_lat),
+        "nelng": str(ne_gk4_lng),
+        "pintypes": list(pin_types),
+    }
+
+
+def _route_departure(route: Route) -> datetime | None:
+    """Scheduled departure of a route from its first stop."""
+    for leg in route.legs:
+        for stop in leg.stops:
+            if stop.departure is not None:
+                return stop.departure
+    return None
+
+
+def _route_key(route: Route) -> tuple[Any, ...]:
+    """Identify a connection independently of the result page it appeared on."""
+    return tuple(
+        (
+            leg.line,
+            leg.mode,
+            leg.direction,
+            leg.stops[0].id if leg.stops else None,
+            leg.stops[0].departure if leg.stops else None,
+            leg.stops[-1].id if leg.stops else None,
+        )
+        for leg in route.legs
+    )
+
+
+class _RouteWindow:
+    """Filters route pages to a departure time window, dropping repeated connections."""
+
+    def __init__(self, start: datetime, until: datetime | timedelta, later: bool) -> None:
+        # Parsed departures are aware; naive bounds are local time, as in route()
+        if start.tzinfo is None:
+            start = start.astimezone()
+        if isinstance(until, datetime) and until.tzinfo is None:
+            until = until.astimezone()
+        if isinstance(until, timedelta):
+            until = start + abs(until) if later else start - abs(until)
+        if (until < start) if later else (until > start):
+            msg = "until must lie in the paging direction from the start time"
+            raise ValueError(msg)
+        self.low, self.high = (start, until) if later else (until, start)
+        self.later = later
+        self._seen: set[tuple[Any, ...]] = set()
+
+    def page(self, routes: list[Route]) -> tuple[list[Route], bool]:
+        """Return the new routes inside the window and whether paging is done."""
+        new: list[Route] = []
+        fresh = False
+        times: list[datetime] = []
+        for route in routes:
+            key = _route_key(route)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            fresh = True
+            departure = _route_departure(route)
+            if departure is None:
+                continue
+            times.append(departure)
+            if self.low <= departure <= self.high:
+                new.append(route)
+        if not fresh:
+            return new, True  # an empty or repeated page: no more connections
+        if self.later:
+            return new, bool(times) and max(times) >= self.high
+        return new, bool(times) and min(times) <= self.low
+
+
+def _route_payload(
+    origin_id: str, dest_id: str, time: datetime | None, arrival: bool
+) -> dict[str, Any]:
+    if time is None:
+        time = datetime.now(tz=timezone.utc)
+    return {
+        "origin": origin_id,
+        "destination": dest_id,
+        "time": time.isoformat(),
+        "isarrivaltime": arrival,
+        "shorttermchanges": True,
+    }
+
+
+def _address_params(lat: float, lng: float) -> dict[str, Any]:
+    gk4_lat, gk4_lng = coords_wgs_to_gk4(lat, lng)
+    return {"query": f"coord:{gk4_lng}:{gk4_lat}", "assignedstops": "true"}
+
+
+def _connection_error(e: requests.RequestException) -> DVBConnectionError:
+    """Wrap a requests exception, keeping what the retry policy needs to know."""
+    response = e.response
+    if response is not None:
+        return DVBConnectionError(
+            str(e),
+            status=response.status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+    # The request never left the client if no connection could be established
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    sent = not (isinstance(e, requests.ConnectTimeout) or isinstance(reason, NewConnectionError))
+    return DVBConnectionError(str(e), sent=sent)
+
+
+class _ClosingHTTPConnectionPool(HTTPConnectionPool):
+    """Pool that closes each connection when it is returned, so none is reused."""
+
+    def _put_conn(self, conn: BaseHTTPConnection | None) -> None:
+        if conn is not None:
+            conn.close()  # reconnects on its next request
+        super()._put_conn(conn)
+
+
+class _ClosingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _put_conn(self, conn: BaseHTTPConnection | None) -> None:
+        if conn is not None:
+            conn.close()
+        super()._put_conn(conn)
+
+
+class _NoKeepAliveAdapter(HTTPAdapter):
+    """Adapter opening a new connection for every request.
+
+    Sending ``Connection: close`` alone is not enough: urllib3 returns the
+    connection to its pool unless the server also answers with it, and may
+    then reuse a socket the server has already closed.
+    """
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _ClosingHTTPConnectionPool,
+            "https": _ClosingHTTPSConnectionPool,
+        }
+
+
+def _resolve_json_loads(json_loads: JSONLoads | str | None) -> JSONLoads:
+    if json_loads is None:
+        return default_json_loads()
+    if isinstance(json_loads, str):
+        return load_json_backend(json_loads)
+    return json_loads
+
+
+def _stop_cache_entries(
+    entries: Mapping[str, str] | Iterable[tuple[str, str]] | str | os.PathLike[str],
+) -> list[tuple[str, str]]:
+    if isinstance(entries, (str, os.PathLike)):
+        with open(entries, encoding="utf-8") as f:
+            loaded: dict[str, str] = json.load(f)
+        items: Iterable[tuple[str, str]] = loaded.items()
+    elif isinstance(entries, Mapping):
+        items = entries.items()
+    else:
+        items = entries
+    return [(normalize_query(query), str(stop_id)) for query, stop_id in items]
+
+
 class Client:
     """DVB/VVO API client.
 
+    A client is safe to share between threads: all API methods may be called
+    concurrently, and they share one connection pool, so connections are kept
+    alive and reused across threads. The caches and indexes it uses lock
+    internally, and hooks may be called from several threads at once.
+    Configuration attributes such as :attr:`hooks` or :attr:`timeout` should
+    only be changed while no calls are in flight.
+
     Args:
         user_agent: A User-Agent string identifying your project and providing
             contact details, e.g. ``"my-app/1.0 (me@example.com)"``.
+        stop_cache: Cache mapping normalized stop names to stop IDs, consulted
+            before every name lookup. Defaults to an in-memory ``TTLCache``;
+            pass ``TTLCache(maxsize=0)`` to disable caching.
+        response_cache: Optional ``ResponseCache`` for whole API responses of
+            slowly changing endpoints such as ``stt/lines`` or ``map/pins``.
+        trip_cache: Cache for the stop sequences fetched by
+            :meth:`monitor_with_trips`, keyed by trip ID and scheduled time.
+            Entries expire once the trip has ended. Defaults to an in-memory
+            ``TTLCache``.
+        json_loads: Function decoding response bodies from bytes, or the name
+            of a JSON library (``"json"``, ``"orjson"``, ``"ujson"``). Defaults
+            to the fastest installed library, falling back to the stdlib.
+        hooks: Callables receiving a ``RequestEvent`` with the endpoint,
+            latency, response size, decode and parse time and cache status
+            of every API call. More can be appended to :attr:`hooks` later.
+        stop_index: Optional ``StopIndex`` answering :meth:`find` and stop
+            name resolution locally. Only queries without a good local match
+            go to the API, and their results are added to the index.
+        spatial_index: Optional ``SpatialIndex`` of stops or pins answering
+            :meth:`address` locally when an indexed item lies within its
+            ``max_distance``.
+        timeout: Seconds to wait for a response.
+        endpoint_timeouts: Timeouts for individual endpoints overriding
+            ``timeout``, e.g. ``{"dm": 5, "tr/trips": 30}``.
+        pool_connections: Number of per-host connection pools to keep.
+        pool_maxsize: Maximum number of connections kept open per host. Should
+            be at least the number of threads sharing the client.
+        pool_block: If True, requests wait for a free connection once
+            ``pool_maxsize`` connections are in use instead of opening extra,
+            unpooled ones.
+        keep_alive: If False, every request uses a new connection.
+        base_url: API base URL, e.g. for a caching proxy.
+        retry: Optional ``RetryPolicy`` for retrying requests after network
+            errors, timeouts and server errors.
+        circuit_breaker: Optional ``CircuitBreaker`` failing requests to an
+            endpoint fast while it keeps failing. Combine with a response
+            cache with ``stale_if_error`` to serve stale data meanwhile.
+        rate_limiter: Optional ``RateLimiter`` every request waits for, e.g.
+            a ``TokenBucketLimiter`` shared by all threads or a
+            ``FileTokenBucketLimiter`` shared by all worker processes.
+        coalesce: If True, concurrent identical calls, i.e. with the same
+            endpoint, payload and output format, share one request and one
+            parsed result, and concurrent resolutions of the same stop name
+            share one lookup. Every caller gets its own list or
+            ``DepartureBatch``; shared raw responses must be treated as read-only.
     """
 
-    def __init__(self, user_agent: str) -> None:
+    def __init__(
+        self,
+        user_agent: str,
+        *,
+        stop_cache: Cache | None = None,
+        response_cache: ResponseCache | None = None,
+        trip_cache: Cache | None = None,
+        json_loads: JSONLoads | str | None = None,
+        hooks: Iterable[RequestHook] = (),
+        stop_index: StopIndex | None = None,
+        spatial_index: SpatialIndex[Any] | None = None,
+        timeout: float = _TIMEOUT,
+        endpoint_timeouts: Mapping[str, float] | None = None,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        base_url: str = BASE_URL,
+        retry: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        rate_limiter: RateLimiter | None = None,
+        coalesce: bool = True,
+    ) -> None:
         if not user_agent or not user_agent.strip():
             msg = "user_agent must be a non-empty string identifying your project"
             raise ValueError(msg)
         self._session = requests.Session()
         self._session.headers["User-Agent"] = user_agent
+        if not keep_alive:
+            self._session.headers["Connection"] = "close"
+        adapter = (HTTPAdapter if keep_alive else _NoKeepAliveAdapter)(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.endpoint_timeouts: dict[str, float] = dict(endpoint_timeouts or {})
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self._inflight = SingleFlight() if coalesce else None
+        self.stop_cache: Cache = (
+            stop_cache
+            if stop_cache is not None
+            else TTLCache(maxsize=_STOP_CACHE_SIZE, ttl=_STOP_CACHE_TTL)
+        )
+        self.response_cache = response_cache
+        self.trip_cache: Cache = (
+            trip_cache
+            if trip_cache is not None
+            else TTLCache(maxsize=_TRIP_CACHE_SIZE, ttl=_TRIP_CACHE_TTL)
+        )
+        self._json_loads = _resolve_json_loads(json_loads)
+        self.hooks: list[RequestHook] = list(hooks)
+        self.stop_index = stop_index
+        self.spatial_index = spatial_index
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._session.close()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _timeout(self, endpoint: str) -> float:
+        return self.endpoint_timeouts.get(endpoint, self.timeout)
+
+    def _post(
+        self,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None = None,
+        *,
+        raw: bool = False,
+    ) -> Any:
+        return self._request("POST", endpoint, payload, None if raw else parse)
+
+    def _get(
+        self,
+        endpoint: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None = None,
+        *,
+        raw: bool = False,
+    ) -> Any:
+        return self._request("GET", endpoint, params, None if raw else parse)
 
-    def _post(self, endpoint: str, payload: dict[str, Any]) -> dict[str, Any]:
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None,
+    ) -> Any:
+        """Fetch (or look up) a response and parse it, reporting timings to the hooks."""
         payload["format"] = "json"
+        timing = _Timing()
+        start = perf_counter()
+        error: BaseException | None = None
         try:
-            r = self._session.post(
-                f"{BASE_URL}/{endpoint}",
-                json=payload,
-                headers={"Content-Type": "application/json; charset=UTF-8"},
-                timeout=_TIMEOUT,
+            if self._inflight is None:
+                return self._fetch_parsed(method, endpoint, payload, parse, timing)
+            key = call_key(method, endpoint, payload, parse)
+            result, leader = self._inflight.do(
+                key, partial(self._fetch_parsed, method, endpoint, payload, parse, timing)
             )
-            r.raise_for_status()
-        except requests.RequestException as e:
-            raise DVBConnectionError(str(e)) from e
+            if not leader:
+                timing.cache = "coalesced"
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.hooks:
+                total = perf_counter() - start
+                emit(self.hooks, timing.event(endpoint, method, total, error))
+
+    def _fetch_parsed(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        parse: Callable[[dict[str, Any]], Any] | None,
+        timing: _Timing,
+    ) -> Any:
+        data = self._cached_fetch(method, endpoint, payload, timing)
+        if parse is None:
+            return data
+        parse_start = perf_counter()
+        result = parse(data)
+        timing.parse_time = perf_counter() - parse_start
+        return result
 
-        data: dict[str, Any] = r.json()
-        status = data.get("Status", {}).get("Code", "")
-        if status != "Ok":
-            msg = f"API returned status: {status}"
-            raise APIError(msg)
+    def _cached_fetch(
+        self, method: str, endpoint: str, payload: dict[str, Any], timing: _Timing
+    ) -> dict[str, Any]:
+        cache = self.response_cache
+        if cache is None or not cache.caches(endpoint):
+            return self._fetch(method, endpoint, payload, timing)
+
+        key = cache.key(endpoint, payload)
+        cached, fresh = cache.lookup(endpoint, key)
+        if cached is not None:
+            timing.cache = "hit" if fresh else "stale"
+            if not fresh and cache.claim_refresh(key):
+                threading.Thread(
+                    target=self._refresh,
+                    args=(cache, method, endpoint, payload, key),
+                    name="dvb-refresh",
+                    daemon=True,
+                ).start()
+            return cast(dict[str, Any], cached)
+
+        timing.cache = "miss"
+        try:
+            data = self._fetch(method, endpoint, payload, timing)
+        except DVBConnectionError:
+            stale = cache.lookup_stale(endpoint, key)
+            if stale is None:
+                raise
+            timing.cache = "stale"
+            return cast(dict[str, Any], stale)
+        cache.store(endpoint, key, data)
         return data
 
-    def _get(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
-        params["format"] = "json"
+    def _refresh(
+        self,
+        cache: ResponseCache,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        key: str,
+    ) -> None:
+        timing = _Timing(cache="refresh")
+        start = perf_counter()
+        error: BaseException | None = None
         try:
-            r = self._session.get(
-                f"{BASE_URL}/{endpoint}",
-                params=params,
-                timeout=_TIMEOUT,
-            )
+            cache.store(endpoint, key, self._fetch(method, endpoint, payload, timing))
+        except DVBError as e:
+            error = e  # keep serving the stale entry until it expires
+        finally:
+            cache.release_refresh(key)
+            if self.hooks:
+                total = perf_counter() - start
+                emit(self.hooks, timing.event(endpoint, method, total, error))
+
+    def _fetch(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        timing: _Timing | None = None,
+    ) -> dict[str, Any]:
+        """Send a request, retrying and tracking failures as configured."""
+        return self._attempt(
+            method, endpoint, partial(self._send, method, endpoint, payload, timing), timing
+        )
+
+    def _attempt(
+        self, method: str, endpoint: str, send: Callable[[], T], timing: _Timing | None
+    ) -> T:
+        """Call ``send`` behind the circuit breaker, rate limiter and retry policy."""
+        breaker = self.circuit_breaker
+        attempt = 1
+        while True:
+            if breaker is not None and not breaker.allow(endpoint):
+                msg = f"Circuit breaker open for endpoint: {endpoint}"
+                raise CircuitOpenError(msg)
+            try:
+                self._throttle(endpoint, timing)
+                result = send()
+            except DVBConnectionError as e:
+                if breaker is not None:
+                    if is_server_failure(e):
+                        breaker.record_failure(endpoint)
+                    else:
+                        breaker.record_success(endpoint)
+                retry = self.retry
+                if retry is None or not retry.should_retry(e, method, endpoint, attempt):
+                    raise
+                sleep(retry.delay(attempt, e))
+                attempt += 1
+                if timing is not None:
+                    timing.retries += 1
+                continue
+            except APIError:
+                if breaker is not None:
+                    breaker.record_success(endpoint)  # the server answered
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release(endpoint)  # cancelled or interrupted, no answer
+                raise
+            if breaker is not None:
+                breaker.record_success(endpoint)
+            return result
+
+    def _throttle(self, endpoint: str, timing: _Timing | None = None) -> None:
+        """Wait for the rate limiter, if any, to allow a request to ``endpoint``."""
+        if self.rate_limiter is None:
+            return
+        wait = self.rate_limiter.reserve(endpoint)
+        if wait > 0:
+            sleep(wait)
+        if timing is not None:
+            timing.rate_limit_wait += wait
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        timing: _Timing | None = None,
+    ) -> dict[str, Any]:
+        start = perf_counter()
+        try:
+            if method == "POST":
+                r = self._session.post(
+                    f"{self.base_url}/{endpoint}",
+                    json=payload,
+                    headers={"Content-Type": "application/json; charset=UTF-8"},
+                    timeout=self._timeout(endpoint),
+                )
+            else:
+                r = self._session.get(
+                    f"{self.base_url}/{endpoint}",
+                    params=payload,
+                    timeout=self._timeout(endpoint),
+                )
             r.raise_for_status()
+            content = r.content
         except requests.RequestException as e:
-            raise DVBConnectionError(str(e)) from e
+            raise _connection_error(e) from e
 
-        data: dict[str, Any] = r.json()
-        status = data.get("Status", {}).get("Code", "")
-        if status != "Ok":
-            msg = f"API returned status: {status}"
-            raise APIError(msg)
-        return data
+        decode_start = perf_counter()
+        if timing is not None:
+            timing.latency = decode_start - start
+            timing.response_bytes = len(content)
+        try:
+            data = self._json_loads(content)
+        except ValueError as e:
+            msg = f"Invalid JSON in response: {e}"
+            raise APIError(msg) from e
+        finally:
+            if timing is not None:
+                timing.decode_time = perf_counter() - decode_start
+        return _check_status(data)
+
+    def _stream(
+        self, endpoint: str, payload: dict[str, Any], key: str, parse: Callable[[Any], T]
+    ) -> ResponseStream[T]:
+        """Open a streamed ``POST`` request, reporting to the hooks once it is closed."""
+        payload["format"] = "json"
+        timing = _Timing()
+        start = perf_counter()
+        try:
+            r = self._attempt(
+                "POST", endpoint, partial(self._open_stream, endpoint, payload, timing), timing
+            )
+        except BaseException as e:
+            if self.hooks:
+                emit(self.hooks, timing.event(endpoint, "POST", perf_counter() - start, e))
+            raise
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                for chunk in r.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                    timing.response_bytes += len(chunk)
+                    yield chunk
+            except requests.RequestException as e:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure(endpoint)
+                raise DVBConnectionError(str(e)) from e
+
+        def timed_parse(value: Any) -> T:
+            parse_start = perf_counter()
+            try:
+                return parse(value)
+            finally:
+                timing.parse_time += perf_counter() - parse_start
+
+        def close(error: BaseException | None) -> None:
+            r.close()
+            if self.hooks:
+                emit(self.hooks, timing.event(endpoint, "POST", perf_counter() - start, error))
+
+        return ResponseStream(chunks(), key, timed_parse, close=close)
+
+    def _open_stream(
+        self, endpoint: str, payload: dict[str, Any], timing: _Timing
+    ) -> requests.Response:
+        start = perf_counter()
+        try:
+            r = self._session.post(
+                f"{self.base_url}/{endpoint}",
+                json=payload,
+                headers={"Content-Type": "application/json; charset=UTF-8"},
+                timeout=self._timeout(endpoint),
+                stream=True,
+            )
+        except requests.RequestException as e:
+            raise _connection_error(e) from e
+        try:
+            r.raise_for_status()
+        except requests.RequestException as e:
+            r.close()  # return the connection to the pool, the body is not read
+            raise _connection_error(e) from e
+        timing.latency = perf_counter() - start
+        return r
 
     def _resolve_stop_id(self, stop: str) -> str:
         if stop.isdigit():
             return stop
+        key = normalize_query(stop)
+        cached = self.stop_cache.get(key)
+        if cached is not None:
+            return str(cached)
+        if self._inflight is None:
+            return self._lookup_stop_id(stop, key)
+        lookup = partial(self._lookup_stop_id, stop, key)
+        stop_id, _ = self._inflight.do(("resolve", key), lookup)
+        return stop_id
+
+    def _lookup_stop_id(self, stop: str, key: str) -> str:
+        if self.stop_index is not None:
+            local = self.stop_index.resolve(stop)
+            if local is not None:
+                return local.id
         results = self.find(stop)
         if not isinstance(results, list) or not results:
             msg = f"No stops found for query: {stop}"
             raise APIError(msg)
+        self.stop_cache.set(key, results[0].id)
         return results[0].id
 
+    def warm_stop_cache(
+        self,
+        entries: Mapping[str, str] | Iterable[tuple[str, str]] | str | os.PathLike[str],
+    ) -> None:
+        """Pre-populate the stop cache so the given names resolve without a lookup.
+
+        Args:
+            entries: A mapping or iterable of ``(name, stop_id)`` pairs, or the
+                path to a JSON file containing an object of names to stop IDs.
+        """
+        for key, stop_id in _stop_cache_entries(entries):
+            self.stop_cache.set(key, stop_id)
+
     def find(self, query: str, *, raw: bool = False) -> list[Stop] | dict[str, Any]:
         """Find stops by name.
 
+        With a ``stop_index``, matches found locally are returned without an
+        API request.
+
         Args:
             query: Search query string.
             raw: If True, return the raw API response dict.
@@ -216,13 +1036,17 @@ class Client:
             APIError: If the API returns an error status.
             ConnectionError: If the request fails.
         """
-        data = self._get("tr/pointfinder", {"query": query, "stopsOnly": "true"})
-
-        if raw:
-            return data
-
-        points = data.get("Points", [])
-        return [parse_point(p) for p in points if p]
+        index = None if raw else self.stop_index
+        if index is not None:
+            local = index.find(query)
+            if local:
+                return local
+        results = self._get(
+            "tr/pointfinder", {"query": query, "stopsOnly": "true"}, _parse_points, raw=raw
+        )
+        if index is not None:
+            index.add(results)
+        return results
 
     def monitor(
         self,
@@ -253,31 +1077,126 @@ class Client:
             now = datetime.now(tz=timezone.utc)
             payload["time"] = now.isoformat()
 
-        data = self._post("dm", payload)
+        return self._post("dm", payload, _parse_departures, raw=raw)
 
-        if raw:
-            return data
+    def monitor_batch(self, stop: str, *, limit: int = 10) -> DepartureBatch:
+        """Get departures from a stop as a columnar ``DepartureBatch``.
 
-        departures: list[Departure] = []
-        for dep in data.get("Departures", []):
-            scheduled = parse_date(dep["ScheduledTime"])
-            real_time = _try_parse_date(dep.get("RealTime"))
-
-            departures.append(
-                Departure(
-                    id=dep.get("Id", ""),
-                    line=dep.get("LineName", ""),
-                    direction=dep.get("Direction", ""),
-                    scheduled=scheduled,
-                    real_time=real_time,
-                    state=dep.get("State", ""),
-                    platform=_parse_platform(dep.get("Platform")),
-                    mode=dep.get("Mot", ""),
-                    occupancy=dep.get("Occupancy", "Unknown"),
-                )
-            )
+        The response is converted straight into columns without creating
+        ``Departure`` objects, which suits recording departure history. The
+        ``stop`` column holds the resolved stop ID.
+
+        Raises:
+            APIError: If the API returns an error or stop not found.
+            ConnectionError: If the request fails.
+        """
+        stop_id = self._resolve_stop_id(stop)
+        payload: dict[str, Any] = {"stopid": stop_id, "limit": limit}
+        parse = partial(DepartureBatch.from_response, stop=stop_id)
+        return cast(DepartureBatch, self._post("dm", payload, parse))
+
+    def monitor_many(
+        self,
+        stops: Iterable[str],
+        *,
+        limit: int = 10,
+        max_workers: int = 8,
+        timeout: float | None = None,
+    ) -> dict[str, list[Departure] | DVBError]:
+        """Get departures for many stops at once.
+
+        Requests are spread over a thread pool. Repeated stops are only queried
+        once. A failing stop does not affect the others: its entry in the result
+        holds the raised exception instead of a departure list.
+
+        Args:
+            stops: Stop names or numeric stop IDs.
+            limit: Maximum number of departures to return per stop.
+            max_workers: Maximum number of requests in flight at the same time.
+            timeout: Seconds to wait for the whole batch. Stops that have not
+                finished by then are reported as ``ConnectionError``.
+
+        Returns:
+            Dict mapping each distinct stop to its departures or its error,
+            in the order the stops were first given.
+        """
+        unique = list(dict.fromkeys(stops))
+        results: dict[str, list[Departure] | DVBError] = {}
+        if not unique:
+            return results
+
+        def fetch(stop: str) -> list[Departure]:
+            return cast(list[Departure], self.monitor(stop, limit=limit))
 
-        return departures
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dvb-monitor")
+        try:
+            futures: dict[str, Future[list[Departure]]] = {
+                stop: executor.submit(fetch, stop) for stop in unique
+            }
+            wait(futures.values(), timeout=timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for stop, future in futures.items():
+            if not future.done():
+                results[stop] = DVBConnectionError(f"Timed out waiting for departures: {stop}")
+                continue
+            try:
+                results[stop] = future.result()
+            except DVBError as e:
+                results[stop] = e
+        return results
+
+    def monitor_with_trips(
+        self, stop: str, *, limit: int = 10, concurrency: int = 8
+    ) -> list[DepartureTrip]:
+        """Get departures from a stop together with the stops of each trip.
+
+        The trip details of all departures are fetched concurrently on a
+        thread pool and kept in :attr:`trip_cache` until the trip has ended,
+        so repeated calls for a board only fetch the trips that are new. A
+        failing trip request does not affect the others: its departure is
+        returned with no stops and the raised exception as ``error``. Cached
+        stop sequences keep the real-time data of when they were fetched.
+
+        Args:
+            stop: Stop name or numeric stop ID.
+            limit: Maximum number of departures to return.
+            concurrency: Maximum number of trip requests in flight at once.
+
+        Raises:
+            APIError: If the departure monitor returns an error or the stop is not found.
+            ConnectionError: If the departure monitor request fails.
+        """
+        stop_id = self._resolve_stop_id(stop)
+        departures = cast(list[Departure], self.monitor(stop_id, limit=limit))
+        trips: dict[str, list[RegularStop] | DVBError] = {}
+        missing: dict[str, Departure] = {}
+        for dep in departures:
+            key = _trip_key(dep)
+            cached = self.trip_cache.get(key)
+            if cached is not None:
+                trips[key] = cached
+            else:
+                missing.setdefault(key, dep)
+
+        def fetch(dep: Departure) -> list[RegularStop] | DVBError:
+            try:
+                stops = self.trip_details(dep.id, dep.scheduled, stop_id, mapdata=False)
+            except DVBError as e:
+                return e
+            stops = cast(list[RegularStop], stops)
+            self.trip_cache.set(_trip_key(dep), stops, _trip_ttl(stops))
+            return stops
+
+        if len(missing) == 1:
+            trips.update((key, fetch(dep)) for key, dep in missing.items())
+        elif missing:
+            with ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="dvb-trips"
+            ) as executor:
+                trips.update(zip(missing, executor.map(fetch, missing.values()), strict=True))
+        return [_departure_trip(dep, trips[_trip_key(dep)]) for dep in departures]
 
     def route(
         self,
@@ -286,6 +1205,7 @@ class Client:
         *,
         time: datetime | None = None,
         arrival: bool = False,
+        lazy_paths: bool = False,
         raw: bool = False,
     ) -> list[Route] | dict[str, Any]:
         """Plan a trip between two stops.
@@ -295,6 +1215,8 @@ class Client:
             destination: Destination stop name or ID.
             time: Departure or arrival time. Defaults to now.
             arrival: If True, interpret time as arrival time.
+            lazy_paths: If True, keep each leg's map data undecoded until its
+                ``path`` is first accessed.
             raw: If True, return the raw API response dict.
 
         Returns:
@@ -307,24 +1229,146 @@ class Client:
         origin_id = self._resolve_stop_id(origin)
         dest_id = self._resolve_stop_id(destination)
 
-        if time is None:
-            time = datetime.now(tz=timezone.utc)
+        return self._post(
+            "tr/trips",
+            _route_payload(origin_id, dest_id, time, arrival),
+            partial(_parse_routes, lazy_paths=lazy_paths),
+            raw=raw,
+        )
 
-        payload: dict[str, Any] = {
-            "origin": origin_id,
-            "destination": dest_id,
-            "time": time.isoformat(),
-            "isarrivaltime": arrival,
-            "shorttermchanges": True,
-        }
+    def iter_routes(
+        self,
+        origin: str,
+        destination: str,
+        *,
+        until: datetime | timedelta,
+        time: datetime | None = None,
+        direction: Literal["later", "earlier"] = "later",
+        max_pages: int = 20,
+        lazy_paths: bool = False,
+    ) -> Iterator[Route]:
+        """Iterate over all connections departing within a time window.
+
+        The stops are resolved once. The first page comes from
+        :meth:`route`, and further pages from ``tr/prevnext`` until the
+        window is covered. While the caller consumes a page, the next one
+        is already being requested in a background thread. Connections that
+        appear on more than one page are yielded only once. Routes are
+        yielded page by page in the API's order, so with
+        ``direction="earlier"`` the pages run backwards in time.
 
-        data = self._post("tr/trips", payload)
+        Args:
+            origin: Origin stop name or ID.
+            destination: Destination stop name or ID.
+            until: End of the window, as a time or as a duration from ``time``.
+            time: Start of the window. Defaults to now.
+            direction: ``"later"`` to page forward from ``time``, ``"earlier"``
+                to page backward.
+            max_pages: Maximum number of pages requested, including the first.
+            lazy_paths: If True, decode each leg's map data on first access.
 
-        if raw:
-            return data
+        Raises:
+            ValueError: If ``until`` lies in the wrong direction.
+            APIError: If the API returns an error or stops not found.
+            ConnectionError: If a request fails.
+        """
+        if direction not in ("later", "earlier"):
+            msg = f"direction must be 'later' or 'earlier', not {direction!r}"
+            raise ValueError(msg)
+        later = direction == "later"
+        start = time or datetime.now(tz=timezone.utc)
+        window = _RouteWindow(start, until, later)
+        return self._iter_routes(origin, destination, start, window, max_pages, lazy_paths)
+
+    def _iter_routes(
+        self,
+        origin: str,
+        destination: str,
+        start: datetime,
+        window: _RouteWindow,
+        max_pages: int,
+        lazy_paths: bool,
+    ) -> Iterator[Route]:
+        origin_id = self._resolve_stop_id(origin)
+        dest_id = self._resolve_stop_id(destination)
+        routes = cast(
+            list[Route], self.route(origin_id, dest_id, time=start, lazy_paths=lazy_paths)
+        )
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dvb-routes")
+        try:
+            pages = 1
+            while True:
+                new, done = window.page(routes)
+                session_id = next((r.session_id for r in routes if r.session_id), None)
+                future = None
+                if not done and session_id and pages < max_pages:
+                    future = executor.submit(
+                        self.earlier_later,
+                        origin_id,
+                        dest_id,
+                        session_id,
+                        previous=not window.later,
+                        lazy_paths=lazy_paths,
+                    )
+                    pages += 1
+                yield from new
+                if future is None:
+                    return
+                routes = cast(list[Route], future.result())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_routes(
+        self,
+        origin: str,
+        destination: str,
+        *,
+        time: datetime | None = None,
+        arrival: bool = False,
+        lazy_paths: bool = False,
+    ) -> ResponseStream[Route]:
+        """Plan a trip, yielding each route as soon as it has been received.
+
+        Unlike :meth:`route`, the response is parsed incrementally, so the
+        first route is available before the whole (possibly multi-megabyte)
+        response has arrived, and only one route is held in memory at a time.
+
+        The API sends the session ID after the routes, so the yielded routes
+        have ``session_id=None``. Read :attr:`ResponseStream.session_id` once
+        the stream is exhausted to paginate with :meth:`earlier_later`.
+
+        The request goes through the circuit breaker, rate limiter, retry
+        policy and request hooks like any other, but only until the response
+        headers have arrived: a connection error while the body is streamed
+        is raised from the iterator and not retried, since routes may
+        already have been yielded. Streamed responses are neither stored in
+        nor served from the response cache, and identical streams are not
+        coalesced. The hooks are called once the stream is closed; see
+        :class:`RequestEvent` for how its timings differ.
+
+        Args:
+            origin: Origin stop name or ID.
+            destination: Destination stop name or ID.
+            time: Departure or arrival time. Defaults to now.
+            arrival: If True, interpret time as arrival time.
+            lazy_paths: If True, keep each leg's map data undecoded until its
+                ``path`` is first accessed.
 
-        session_id = data.get("SessionId")
-        return [_parse_route(r, session_id) for r in data.get("Routes", [])]
+        Returns:
+            An iterator of Route objects.
+
+        Raises:
+            APIError: If the API returns an error or stops not found.
+            ConnectionError: If the request fails.
+        """
+        origin_id = self._resolve_stop_id(origin)
+        dest_id = self._resolve_stop_id(destination)
+        return self._stream(
+            "tr/trips",
+            _route_payload(origin_id, dest_id, time, arrival),
+            "Routes",
+            partial(_parse_route, lazy_paths=lazy_paths),
+        )
 
     def pins(
         self,
@@ -353,43 +1397,8 @@ class Client:
             APIError: If the API returns an error status.
             ConnectionError: If the request fails.
         """
-        sw_gk4_lat, sw_gk4_lng = coords_wgs_to_gk4(sw_lat, sw_lng)
-        ne_gk4_lat, ne_gk4_lng = coords_wgs_to_gk4(ne_lat, ne_lng)
-
-        payload: dict[str, Any] = {
-            "swlat": str(sw_gk4_lat),
-            "swlng": str(sw_gk4_lng),
-            "nelat": str(ne_gk4_lat),
-            "nelng": str(ne_gk4_lng),
-            "pintypes": list(pin_types),
-        }
-
-        data = self._post("map/pins", payload)
-
-        if raw:
-            return data
-
-        result: list[Pin] = []
-        for pin_str in data.get("Pins", []):
-            if not pin_str:
-                continue
-            parts = pin_str.split("|")
-            pin_id = parts[0] if parts else ""
-            city = parts[2] if len(parts) > 2 else ""
-            name = parts[3] if len(parts) > 3 else ""
-
-            coords = None
-            if len(parts) > 5:
-                lat_str = parts[4]
-                lng_str = parts[5]
-                if lat_str and lng_str and lat_str != "0" and lng_str != "0":
-                    coords = coords_gk4_to_wgs(int(lat_str), int(lng_str))
-
-            pin_type = _pin_type_from_id(pin_id)
-
-            result.append(Pin(id=pin_id, name=name, city=city, coords=coords, type=pin_type))
-
-        return result
+        payload = _pins_payload(sw_lat, sw_lng, ne_lat, ne_lng, pin_types)
+        return self._post("map/pins", payload, _parse_pins, raw=raw)
 
     def address(
         self,
@@ -400,6 +1409,10 @@ class Client:
     ) -> Stop | None | dict[str, Any]:
         """Reverse geocode coordinates to the nearest stop.
 
+        With a spatial index, coordinates near an indexed stop are answered
+        locally, and results that are stops are added to the index. Other
+        points, such as streets or addresses, are returned but not indexed.
+
         Args:
             lat: Latitude (WGS84).
             lng: Longitude (WGS84).
@@ -412,20 +1425,15 @@ class Client:
             APIError: If the API returns an error status.
             ConnectionError: If the request fails.
         """
-        gk4_lat, gk4_lng = coords_wgs_to_gk4(lat, lng)
-        data = self._get(
-            "tr/pointfinder",
-            {"query": f"coord:{gk4_lng}:{gk4_lat}", "assignedstops": "true"},
-        )
-
+        index = None if raw else self.spatial_index
+        if index is not None:
+            nearest = index.nearest(lat, lng, max_distance=index.max_distance)
+            if nearest:
+                return as_stop(nearest[0].item)
+        result = self._get("tr/pointfinder", _address_params(lat, lng), _parse_address, raw=raw)
         if raw:
-            return data
-
-        points = data.get("Points", [])
-        if not points:
-            return None
-
-        return parse_point(points[0])
+            return cast(dict[str, Any], result)
+        return _learn_address(result, index)
 
     def lines(
         self,
@@ -447,23 +1455,7 @@ class Client:
             ConnectionError: If the request fails.
         """
         stop_id = self._resolve_stop_id(stop)
-        data = self._post("stt/lines", {"stopid": stop_id})
-
-        if raw:
-            return data
-
-        result: list[Line] = []
-        for line_data in data.get("Lines", []):
-            directions = [d["Name"] for d in line_data.get("Directions", [])]
-            result.append(
-                Line(
-                    name=line_data.get("Name", ""),
-                    mode=line_data.get("Mot", ""),
-                    directions=directions,
-                )
-            )
-
-        return result
+        return self._post("stt/lines", {"stopid": stop_id}, _parse_lines, raw=raw)
 
     def route_changes(self, *, raw: bool = False) -> list[RouteChange] | dict[str, Any]:
         """Get current route changes and disruptions.
@@ -478,32 +1470,7 @@ class Client:
             APIError: If the API returns an error status.
             ConnectionError: If the request fails.
         """
-        data = self._post("rc", {"shortterm": True})
-
-        if raw:
-            return data
-
-        result: list[RouteChange] = []
-        for change in data.get("Changes", []):
-            validity_periods = []
-            for vp in change.get("ValidityPeriods", []):
-                begin = _try_parse_date(vp.get("Begin"))
-                end = _try_parse_date(vp.get("End"))
-                if begin and end:
-                    validity_periods.append(ValidityPeriod(begin=begin, end=end))
-
-            result.append(
-                RouteChange(
-                    id=change.get("Id", ""),
-                    title=change.get("Title", ""),
-                    description=change.get("Description", ""),
-                    type=change.get("Type", ""),
-                    validity_periods=validity_periods,
-                    lines=change.get("LineIds", []),
-                )
-            )
-
-        return result
+        return self._post("rc", {"shortterm": True}, _parse_route_changes, raw=raw)
 
     def trip_details(
         self,
@@ -511,6 +1478,7 @@ class Client:
         time: datetime,
         stop_id: str,
         *,
+        mapdata: bool = True,
         raw: bool = False,
     ) -> list[RegularStop] | dict[str, Any]:
         """Get all stops for a specific trip/departure.
@@ -519,6 +1487,7 @@ class Client:
             trip_id: The departure ID from a monitor response.
             time: Departure time (e.g. from Departure.scheduled).
             stop_id: ID of a stop on the route.
+            mapdata: If False, ask the API to omit map data from the response.
             raw: If True, return the raw API response dict.
 
         Returns:
@@ -528,15 +1497,42 @@ class Client:
             APIError: If the API returns an error status.
             ConnectionError: If the request fails.
         """
-        data = self._post(
+        return self._post(
             "dm/trip",
-            {"tripid": trip_id, "time": format_date(time), "stopid": stop_id, "mapdata": True},
+            {"tripid": trip_id, "time": format_date(time), "stopid": stop_id, "mapdata": mapdata},
+            _parse_trip_stops,
+            raw=raw,
         )
 
-        if raw:
-            return data
+    def stream_trip_details(
+        self,
+        trip_id: str,
+        time: datetime,
+        stop_id: str,
+        *,
+        mapdata: bool = True,
+    ) -> ResponseStream[RegularStop]:
+        """Get all stops for a trip, yielding each stop as soon as it has been received.
 
-        return [_parse_regular_stop(s) for s in data.get("Stops", [])]
+        Incremental counterpart of :meth:`trip_details`. As described in
+        :meth:`stream_routes`, the circuit breaker, rate limiter and retry
+        policy apply until the response headers have arrived, while the
+        response cache and the trip cache are bypassed and identical
+        streams are not coalesced.
+
+        Returns:
+            An iterator of RegularStop objects.
+
+        Raises:
+            APIError: If the API returns an error status.
+            ConnectionError: If the request fails.
+        """
+        return self._stream(
+            "dm/trip",
+            {"tripid": trip_id, "time": format_date(time), "stopid": stop_id, "mapdata": mapdata},
+            "Stops",
+            _parse_stream_stop,
+        )
 
     def earlier_later(
         self,
@@ -545,6 +1541,7 @@ class Client:
         session_id: str,
         *,
         previous: bool = True,
+        lazy_paths: bool = False,
         raw: bool = False,
     ) -> list[Route] | dict[str, Any]:
         """Paginate trip results using a session ID from a previous route() call.
@@ -554,6 +1551,8 @@ class Client:
             destination: Destination stop name or ID.
             session_id: Session ID from a previous route() response.
             previous: If True, get earlier connections; if False, get later ones.
+            lazy_paths: If True, keep each leg's map data undecoded until its
+                ``path`` is first accessed.
             raw: If True, return the raw API response dict.
 
         Returns:
@@ -573,10 +1572,6 @@ class Client:
             "previous": previous,
         }
 
-        data = self._post("tr/prevnext", payload)
-
-        if raw:
-            return data
-
-        new_session_id = data.get("SessionId")
-        return [_parse_route(r, new_session_id) for r in data.get("Routes", [])]
+        return self._post(
+            "tr/prevnext", payload, partial(_parse_routes, lazy_paths=lazy_paths), raw=raw
+        )
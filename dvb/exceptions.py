@@ -7,4 +7,32 @@ class APIError(DVBError):
 
 
 class ConnectionError(DVBError):  # noqa: A001
-    """Network failure or timeout."""
+    """Network failure or timeout.
+
+    Attributes:
+        status: HTTP status code, if the server answered with an error status.
+        retry_after: Seconds the server asked to wait before retrying, from a
+            ``Retry-After`` header.
+        sent: False if the request certainly never reached the server, e.g.
+            when the connection could not be established.
+    """
+
+    def __init__(
+        self,
+        message: str = "",
+        *,
+        status: int | None = None,
+        retry_after: float | None = None,
+        sent: bool = True,
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.sent = sent
+
+
+class CircuitOpenError(ConnectionError):
+    """The endpoint's circuit breaker is open, so no request was sent."""
+
+    def __init__(self, message: str = "") -> None:
+        super().__init__(message, sent=False)
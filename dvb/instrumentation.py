@@ -0,0 +1,260 @@
+"""Per-request instrumentation hooks and a built-in statistics aggregator."""
+
+from __future__ import annotations
+
+import copy
+import logging
+import math
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+logger = logging.getLogger("dvb")
+
+CacheStatus = Literal["bypass", "miss", "hit", "stale", "refresh", "coalesced"]
+
+
+@dataclass(frozen=True, slots=True)
+class RequestEvent:
+    """Timings of a single API call, passed to every request hook.
+
+    All durations are in seconds. ``latency``, ``response_bytes`` and
+    ``decode_time`` are zero when the response was served from the response
+    cache or shared with an identical call; ``parse_time`` is zero for
+    ``raw=True`` and shared calls.
+
+    For streamed responses (:meth:`dvb.Client.stream_routes` and
+    :meth:`dvb.Client.stream_trip_details`), the event is emitted when the
+    stream is closed: ``latency`` ends when the response headers arrive,
+    ``decode_time`` is zero because decoding is interleaved with receiving
+    the body, and ``total_time`` includes the time the caller spent between
+    items.
+
+    Attributes:
+        endpoint: API endpoint, e.g. ``"dm"`` or ``"tr/trips"``.
+        method: HTTP method, ``"GET"`` or ``"POST"``.
+        cache: ``"bypass"`` if the endpoint is not cached, ``"miss"``,
+            ``"hit"`` or ``"stale"`` for response cache lookups,
+            ``"refresh"`` for background refreshes of stale entries, and
+            ``"coalesced"`` for calls that shared the response of an
+            identical call already in flight.
+        latency: Time from sending the request until the body was received.
+        response_bytes: Size of the response body.
+        decode_time: Time spent decoding the JSON body.
+        parse_time: Time spent building model objects.
+        total_time: Wall time of the whole call.
+        retries: Number of times the request was retried.
+        rate_limit_wait: Time spent waiting for the client's rate limiter.
+        error: The exception raised by the call, if it failed.
+    """
+
+    endpoint: str
+    method: str
+    cache: CacheStatus
+    latency: float
+    response_bytes: int
+    decode_time: float
+    parse_time: float
+    total_time: float
+    retries: int = 0
+    rate_limit_wait: float = 0.0
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+RequestHook = Callable[[RequestEvent], None]
+
+
+@dataclass(slots=True)
+class _Timing:
+    """Mutable timings collected while a request is in progress."""
+
+    cache: CacheStatus = "bypass"
+    latency: float = 0.0
+    response_bytes: int = 0
+    decode_time: float = 0.0
+    parse_time: float = 0.0
+    retries: int = 0
+    rate_limit_wait: float = 0.0
+
+    def event(
+        self, endpoint: str, method: str, total_time: float, error: BaseException | None
+    ) -> RequestEvent:
+        return RequestEvent(
+            endpoint=endpoint,
+            method=method,
+            cache=self.cache,
+            latency=self.latency,
+            response_bytes=self.response_bytes,
+            decode_time=self.decode_time,
+            parse_time=self.parse_time,
+            total_time=total_time,
+            retries=self.retries,
+            rate_limit_wait=self.rate_limit_wait,
+            error=error,
+        )
+
+
+def emit(hooks: Iterable[RequestHook], event: RequestEvent) -> None:
+    """Call every hook with ``event``. A failing hook is logged, never raised."""
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("Request hook %r failed", hook)
+
+
+class Histogram:
+    """Histogram with logarithmic buckets and bounded memory.
+
+    Percentiles are accurate to within half a bucket, i.e. about 5 % relative
+    error with the default ``growth``. Zero values are counted separately.
+
+    Args:
+        growth: Ratio between the bounds of neighbouring buckets.
+        min_value: Smallest value distinguished from its neighbours; smaller
+            positive values share the first bucket.
+    """
+
+    def __init__(self, growth: float = 1.1, min_value: float = 1e-6) -> None:
+        if growth <= 1:
+            msg = "growth must be > 1"
+            raise ValueError(msg)
+        self.growth = growth
+        self.min_value = min_value
+        self._log_growth = math.log(growth)
+        self._buckets: Counter[int] = Counter()
+        self._zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = max(0, math.floor(math.log(value / self.min_value) / self._log_growth))
+        self._buckets[index] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Return the approximate ``q``-th percentile (0-100), or 0.0 if empty."""
+        if not 0 <= q <= 100:
+            msg = "q must be between 0 and 100"
+            raise ValueError(msg)
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        if rank <= self._zeros:
+            return 0.0
+        seen = self._zeros
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                middle = self.min_value * self.growth ** (index + 0.5)
+                return min(max(middle, self.min), self.max)
+        return self.max
+
+    def copy(self) -> Histogram:
+        return copy.deepcopy(self)
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Aggregated timings of all requests to one endpoint."""
+
+    count: int = 0
+    errors: int = 0
+    retries: int = 0
+    cache: Counter[str] = field(default_factory=Counter)
+    latency: Histogram = field(default_factory=Histogram)
+    response_bytes: Histogram = field(default_factory=lambda: Histogram(min_value=1))
+    decode_time: Histogram = field(default_factory=Histogram)
+    parse_time: Histogram = field(default_factory=Histogram)
+    total_time: Histogram = field(default_factory=Histogram)
+    rate_limit_wait: Histogram = field(default_factory=Histogram)
+
+    def add(self, event: RequestEvent) -> None:
+        self.count += 1
+        self.errors += not event.ok
+        self.retries += event.retries
+        self.cache[event.cache] += 1
+        self.total_time.add(event.total_time)
+        if event.cache not in ("hit", "stale", "coalesced"):
+            self.rate_limit_wait.add(event.rate_limit_wait)
+            self.latency.add(event.latency)
+            self.response_bytes.add(event.response_bytes)
+            self.decode_time.add(event.decode_time)
+        if event.cache not in ("refresh", "coalesced"):
+            self.parse_time.add(event.parse_time)
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99)) -> dict[str, Any]:
+        """Return the counts and the given percentiles of every histogram as a plain dict."""
+        qs = tuple(percentiles)
+        result: dict[str, Any] = {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache": dict(self.cache),
+        }
+        for name in (
+            "latency",
+            "response_bytes",
+            "decode_time",
+            "parse_time",
+            "total_time",
+            "rate_limit_wait",
+        ):
+            hist: Histogram = getattr(self, name)
+            result[name] = {"mean": hist.mean, **{f"p{q:g}": hist.percentile(q) for q in qs}}
+        return result
+
+
+class RequestStats:
+    """Request hook keeping per-endpoint histograms of every timing.
+
+    Pass an instance as a hook and read the numbers back at any time::
+
+        stats = RequestStats()
+        client = Client(user_agent="...", hooks=[stats])
+        ...
+        print(stats.summary()["tr/trips"]["latency"]["p99"])
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        with self._lock:
+            stats = self._endpoints.get(event.endpoint)
+            if stats is None:
+                stats = self._endpoints[event.endpoint] = EndpointStats()
+            stats.add(event)
+
+    def snapshot(self) -> dict[str, EndpointStats]:
+        """Return an independent copy of the statistics of every endpoint seen so far."""
+        with self._lock:
+            return copy.deepcopy(self._endpoints)
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99)) -> dict[str, dict[str, Any]]:
+        """Return :meth:`EndpointStats.summary` for every endpoint."""
+        qs = tuple(percentiles)
+        return {endpoint: s.summary(qs) for endpoint, s in self.snapshot().items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
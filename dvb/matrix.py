@@ -0,0 +1,274 @@
+"""Origin-destination travel time matrices."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import sleep
+from typing import TYPE_CHECKING, Any, cast
+
+from .exceptions import DVBError
+from .models import Route
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .dvb import Client
+    from .ratelimit import RateLimiter
+
+_FORMAT_VERSION = 1
+_MISSING = -1
+
+
+@dataclass(frozen=True, slots=True)
+class ODMatrix:
+    """Travel times between every pair of a set of stops.
+
+    ``durations`` and ``interchanges`` are row-major ``array('i')`` buffers
+    of ``n * n`` values, where row ``i`` holds the connections starting at
+    ``stops[i]``. Pairs without a connection, and pairs whose request failed,
+    hold ``-1``; see :attr:`errors` for the latter.
+
+    Attributes:
+        names: The stops as given.
+        stops: The resolved stop IDs, in the same order.
+        time: Departure (or arrival) time all connections were planned for.
+        durations: Duration of the fastest connection per pair, in minutes.
+        interchanges: Number of interchanges of that connection.
+        routes: The fastest ``Route`` per ``(origin index, destination index)``,
+            if requested. Pairs restored from a checkpoint have no route.
+        errors: Error message per pair whose request failed.
+    """
+
+    names: list[str]
+    stops: list[str]
+    time: datetime
+    durations: array[int]
+    interchanges: array[int]
+    routes: dict[tuple[int, int], Route] = field(default_factory=dict)
+    errors: dict[tuple[int, int], str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def index(self, stop: str) -> int:
+        """Return the row of a stop, given by name as passed in or by ID."""
+        if stop in self.names:
+            return self.names.index(stop)
+        return self.stops.index(stop)
+
+    def duration(self, origin: str, destination: str) -> int | None:
+        """Minutes of the fastest connection, or None if there is none."""
+        value = self.durations[self.index(origin) * len(self) + self.index(destination)]
+        return None if value == _MISSING else value
+
+    def interchange_count(self, origin: str, destination: str) -> int | None:
+        value = self.interchanges[self.index(origin) * len(self) + self.index(destination)]
+        return None if value == _MISSING else value
+
+    def route(self, origin: str, destination: str) -> Route | None:
+        return self.routes.get((self.index(origin), self.index(destination)))
+
+    def to_numpy(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(durations, interchanges)`` as ``(n, n)`` int32 arrays sharing memory."""
+        import numpy as np
+
+        n = len(self)
+        return (
+            np.frombuffer(self.durations, dtype=np.int32).reshape(n, n),
+            np.frombuffer(self.interchanges, dtype=np.int32).reshape(n, n),
+        )
+
+
+def _best_route(routes: list[Route]) -> Route | None:
+    candidates = [r for r in routes if not r.cancelled] or routes
+    return min(candidates, key=lambda r: (r.duration, r.interchanges), default=None)
+
+
+class _Checkpoint:
+    """Append-only JSON Lines log of finished pairs.
+
+    The first line describes the matrix; every further line records one
+    pair. Lines are flushed as they are written, so an interrupted run loses
+    at most the pair being written. A truncated last line is ignored.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self._file: Any = None
+        self._torn = False
+        self._lock = threading.Lock()
+
+    def load(self) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None, []
+        self._torn = bool(content) and not content.endswith("\n")
+        entries: list[dict[str, Any]] = []
+        for line in content.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # interrupted mid-write
+        if not entries:
+            return None, []
+        return entries[0], entries[1:]
+
+    def open(self, header: dict[str, Any] | None) -> None:
+        """Open for appending, or start a new log with ``header``."""
+        mode = "a" if header is None else "w"
+        self._file = open(self.path, mode, encoding="utf-8")  # noqa: SIM115
+        if header is not None:
+            self.write(header)
+        elif self._torn:
+            self._file.write("\n")  # end the torn line so it does not swallow the next one
+
+    def write(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def plan_matrix(
+    client: Client,
+    stops: Sequence[str],
+    *,
+    time: datetime | None = None,
+    arrival: bool = False,
+    max_workers: int = 8,
+    rate_limiter: RateLimiter | None = None,
+    checkpoint: str | os.PathLike[str] | None = None,
+    keep_routes: bool = False,
+) -> ODMatrix:
+    """Plan the fastest connection between every ordered pair of ``stops``.
+
+    Every stop is resolved once, then one ``tr/trips`` request per pair is
+    run on a thread pool of ``max_workers``. Map data is never decoded. With
+    a ``checkpoint`` file, every finished pair is appended to it as soon as
+    it is known. Calling again with the same stops and checkpoint resumes
+    the matrix, only requesting the pairs that are missing or failed. The
+    departure time is stored in the checkpoint, so a resumed matrix is
+    planned for the same time.
+
+    Example::
+
+        matrix = plan_matrix(client, stop_names, checkpoint="matrix.jsonl")
+        matrix.duration("Postplatz", "Hauptbahnhof")  # minutes
+
+    Args:
+        client: Client used for the requests. Its own rate limiter, retry
+            policy and caches apply.
+        stops: Stop names or IDs, in matrix order.
+        time: Departure time, or arrival time with ``arrival=True``.
+            Defaults to now, or to the time stored in the checkpoint.
+        arrival: If True, plan connections arriving by ``time``.
+        max_workers: Maximum number of requests in flight at the same time.
+        rate_limiter: Additional ``RateLimiter`` for the matrix requests,
+            e.g. a slower budget than the client's for a background job.
+        checkpoint: Path of a JSON Lines file to record progress in.
+        keep_routes: If True, keep the fastest ``Route`` of each pair.
+
+    Raises:
+        ValueError: If the checkpoint belongs to different stops, time or mode.
+        APIError: If a stop cannot be resolved.
+        ConnectionError: If resolving a stop fails.
+    """
+    names = list(stops)
+    log = _Checkpoint(checkpoint) if checkpoint is not None else None
+    header, entries = log.load() if log is not None else (None, [])
+    if header is not None:
+        if header.get("version") != _FORMAT_VERSION or header.get("names") != names:
+            msg = f"Checkpoint {checkpoint} belongs to a different set of stops"
+            raise ValueError(msg)
+        saved_time = datetime.fromisoformat(header["time"])
+        if (time is not None and time != saved_time) or header.get("arrival") != arrival:
+            msg = f"Checkpoint {checkpoint} was planned for a different time"
+            raise ValueError(msg)
+        ids: list[str] = header["stops"]
+        time = saved_time
+    else:
+        time = time or datetime.now(tz=timezone.utc)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dvb-matrix") as pool:
+            ids = list(pool.map(client._resolve_stop_id, names))
+
+    n = len(names)
+    durations = array("i", [_MISSING]) * (n * n)
+    interchanges = array("i", [_MISSING]) * (n * n)
+    matrix = ODMatrix(names, ids, time, durations, interchanges)
+    done: set[tuple[int, int]] = set()
+    for entry in entries:
+        pair = (entry["o"], entry["d"])
+        durations[pair[0] * n + pair[1]] = entry["duration"]
+        interchanges[pair[0] * n + pair[1]] = entry["interchanges"]
+        done.add(pair)
+
+    pending = []
+    for i in range(n):
+        for j in range(n):
+            if (i, j) in done:
+                continue
+            if ids[i] == ids[j]:
+                durations[i * n + j] = interchanges[i * n + j] = 0
+            else:
+                pending.append((i, j))
+
+    def plan(pair: tuple[int, int]) -> Route | None:
+        if rate_limiter is not None:
+            wait = rate_limiter.reserve("tr/trips")
+            if wait > 0:
+                sleep(wait)
+        routes = client.route(
+            ids[pair[0]], ids[pair[1]], time=time, arrival=arrival, lazy_paths=True
+        )
+        return _best_route(cast(list[Route], routes))
+
+    if log is not None:
+        log.open(
+            None
+            if header is not None
+            else {
+                "version": _FORMAT_VERSION,
+                "names": names,
+                "stops": ids,
+                "time": time.isoformat(),
+                "arrival": arrival,
+            }
+        )
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dvb-matrix")
+    try:
+        futures = {executor.submit(plan, pair): pair for pair in pending}
+        for future in as_completed(futures):
+            i, j = pair = futures[future]
+            try:
+                best = future.result()
+            except DVBError as e:
+                matrix.errors[pair] = str(e)
+                continue
+            if best is not None:
+                durations[i * n + j] = best.duration
+                interchanges[i * n + j] = best.interchanges
+                if keep_routes:
+                    matrix.routes[pair] = best
+            if log is not None:
+                k = i * n + j
+                log.write(
+                    {"o": i, "d": j, "duration": durations[k], "interchanges": interchanges[k]}
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if log is not None:
+            log.close()
+    return matrix
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, overload
+
+from .exceptions import DVBError
 
 
 @dataclass(frozen=True, slots=True)
@@ -57,6 +62,149 @@ class RegularStop:
     occupancy: str = "Unknown"  # "Unknown", "ManySeats", "StandingOnly", "Full"
 
 
+@dataclass(frozen=True, slots=True)
+class DepartureTrip:
+    """A departure together with the stops of its trip."""
+
+    departure: Departure
+    stops: list[RegularStop]  # empty if the trip details could not be fetched
+    error: DVBError | None = None
+
+
+class Polyline(Sequence[Coords]):
+    """A compact geographic polyline.
+
+    Vertices are stored as interleaved ``lat, lng`` doubles in a single
+    ``array('d')`` instead of one ``Coords`` object each, which takes about a
+    quarter of the memory. ``Coords`` are created on access. The underlying
+    buffer can be exported without copying via :attr:`buffer` or
+    :meth:`to_numpy`.
+
+    A polyline created with :meth:`lazy` defers decoding until its vertices
+    are first accessed.
+    """
+
+    __slots__ = ("_data", "_loader")
+
+    def __init__(self, coords: Iterable[Coords] = ()) -> None:
+        data: array[float] = array("d")
+        for c in coords:
+            data.append(c.lat)
+            data.append(c.lng)
+        self._data: array[float] | None = data
+        self._loader: Callable[[], tuple[Sequence[float], Sequence[float]]] | None = None
+
+    @classmethod
+    def from_arrays(cls, lats: Sequence[float], lngs: Sequence[float]) -> Polyline:
+        """Build a polyline from parallel latitude and longitude sequences."""
+        return cls._wrap(_interleave(lats, lngs))
+
+    @classmethod
+    def lazy(cls, loader: Callable[[], tuple[Sequence[float], Sequence[float]]]) -> Polyline:
+        """Build a polyline whose ``(lats, lngs)`` are produced by ``loader`` on first access."""
+        self = cls.__new__(cls)
+        self._data = None
+        self._loader = loader
+        return self
+
+    @classmethod
+    def _wrap(cls, data: array[float]) -> Polyline:
+        self = cls.__new__(cls)
+        self._data = data
+        self._loader = None
+        return self
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the vertices have been decoded yet."""
+        return self._data is not None
+
+    def _values(self) -> array[float]:
+        data = self._data
+        if data is None:
+            assert self._loader is not None
+            data = _interleave(*self._loader())
+            self._data = data
+            self._loader = None
+        return data
+
+    @property
+    def buffer(self) -> memoryview:
+        """Read-only view of the interleaved ``lat, lng`` doubles."""
+        return memoryview(self._values()).toreadonly()
+
+    @property
+    def lats(self) -> array[float]:
+        return self._values()[0::2]
+
+    @property
+    def lngs(self) -> array[float]:
+        return self._values()[1::2]
+
+    def to_numpy(self) -> Any:
+        """Return an ``(n, 2)`` read-only NumPy view of ``lat, lng`` rows without copying."""
+        try:
+            import numpy as np
+        except ImportError as e:
+            msg = "Polyline.to_numpy() requires numpy"
+            raise ImportError(msg) from e
+        return np.frombuffer(self.buffer, dtype=np.float64).reshape(-1, 2)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.buffer
+
+    def __len__(self) -> int:
+        return len(self._values()) // 2
+
+    @overload
+    def __getitem__(self, index: int) -> Coords: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Polyline: ...
+
+    def __getitem__(self, index: int | slice) -> Coords | Polyline:
+        data = self._values()
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return Polyline._wrap(data[2 * start : 2 * stop])
+            return Polyline(self[i] for i in range(start, stop, step))
+        n = len(data) // 2
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            msg = "Polyline index out of range"
+            raise IndexError(msg)
+        return Coords(lat=data[2 * index], lng=data[2 * index + 1])
+
+    def __iter__(self) -> Iterator[Coords]:
+        data = self._values()
+        for i in range(0, len(data), 2):
+            yield Coords(lat=data[i], lng=data[i + 1])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Polyline):
+            return self._values() == other._values()
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other, strict=True))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Polyline({list(self)!r})"
+
+
+def _interleave(lats: Sequence[float], lngs: Sequence[float]) -> array[float]:
+    if len(lats) != len(lngs):
+        msg = "lats and lngs must have the same length"
+        raise ValueError(msg)
+    data: array[float] = array("d", bytes(16 * len(lats)))
+    data[0::2] = lats if isinstance(lats, array) else array("d", lats)
+    data[1::2] = lngs if isinstance(lngs, array) else array("d", lngs)
+    return data
+
+
 @dataclass(frozen=True, slots=True)
 class PartialRoute:
     """A single leg of a planned route, e.g. one tram ride within a multi-transfer journey."""
@@ -68,7 +216,7 @@ class PartialRoute:
     stops: list[RegularStop]
     cancelled: bool = False
     changeover_endangered: bool = False  # transfer to the next leg is at risk
-    path: list[Coords] | None = None  # geographic polyline of this leg
+    path: Polyline | None = None  # geographic polyline of this leg
 
 
 @dataclass(frozen=True, slots=True)
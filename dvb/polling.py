@@ -0,0 +1,282 @@
+"""Adaptive polling of departure monitors with change events."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Literal
+
+from .exceptions import DVBError
+from .instrumentation import logger
+from .models import Departure
+
+if TYPE_CHECKING:
+    from .aio import AsyncClient
+    from .dvb import Client
+
+ChangeKind = Literal["new", "shifted", "state", "platform", "gone"]
+
+
+@dataclass(frozen=True, slots=True)
+class DepartureEvent:
+    """A change of one departure between two polls of a stop.
+
+    Attributes:
+        kind: ``"new"`` for a departure not seen before, ``"shifted"`` if its
+            real-time estimate changed, ``"state"`` if its real-time state
+            changed (e.g. to ``"Cancelled"``), ``"platform"`` if its platform
+            changed, and ``"gone"`` if it is no longer listed.
+        stop: The watched stop, as given to the poller.
+        departure: The current departure, or the last known one for ``"gone"``.
+        previous: The departure as of the previous poll; None for ``"new"``.
+    """
+
+    kind: ChangeKind
+    stop: str
+    departure: Departure
+    previous: Departure | None = None
+
+
+def diff_departures(
+    stop: str, previous: Mapping[str, Departure], current: Iterable[Departure]
+) -> list[DepartureEvent]:
+    """Compare two departure lists of a stop, keyed by ``Departure.id``.
+
+    A departure that changed in several ways gives one event per change.
+    """
+    events: list[DepartureEvent] = []
+    seen: set[str] = set()
+    for dep in current:
+        seen.add(dep.id)
+        old = previous.get(dep.id)
+        if old is None:
+            events.append(DepartureEvent("new", stop, dep))
+            continue
+        if old == dep:
+            continue
+        if old.real_time != dep.real_time:
+            events.append(DepartureEvent("shifted", stop, dep, old))
+        if old.state != dep.state:
+            events.append(DepartureEvent("state", stop, dep, old))
+        if old.platform != dep.platform:
+            events.append(DepartureEvent("platform", stop, dep, old))
+    for dep_id, old in previous.items():
+        if dep_id not in seen:
+            events.append(DepartureEvent("gone", stop, old, old))
+    return events
+
+
+@dataclass(frozen=True, slots=True)
+class PollSchedule:
+    """How often to poll a stop, based on its next departure.
+
+    A stop is polled every ``min_interval`` seconds while a departure is
+    less than ``imminent`` seconds away. Otherwise the interval is
+    ``factor`` times the time until the next departure, capped at
+    ``max_interval``, so stops are polled rarely at night. A stop without
+    departures, or whose request failed, is polled again after
+    ``max_interval`` or twice its previous interval, whichever is shorter.
+    """
+
+    min_interval: float = 15.0
+    max_interval: float = 300.0
+    imminent: float = 120.0
+    factor: float = 0.25
+
+    def interval(self, departures: Iterable[Departure], now: datetime) -> float:
+        """Seconds until the next poll of a stop with ``departures``."""
+        leads = [((dep.real_time or dep.scheduled) - now).total_seconds() for dep in departures]
+        if not leads:
+            return self.max_interval
+        lead = max(0.0, min(leads))
+        if lead <= self.imminent:
+            return self.min_interval
+        return min(self.max_interval, max(self.min_interval, lead * self.factor))
+
+    def backoff(self, previous: float) -> float:
+        return min(self.max_interval, max(self.min_interval, 2 * previous))
+
+
+class _PollState:
+    """Snapshots and schedule shared by the sync and async pollers."""
+
+    def __init__(
+        self,
+        stops: Iterable[str],
+        limit: int,
+        schedule: PollSchedule | None,
+        clock: Callable[[], float],
+    ) -> None:
+        self.limit = limit
+        self.schedule = schedule or PollSchedule()
+        self._clock = clock
+        self._snapshots: dict[str, dict[str, Departure]] = {}
+        self._intervals: dict[str, float] = {}
+        self._due: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.errors: dict[str, DVBError] = {}
+        for stop in stops:
+            self.add(stop)
+
+    @property
+    def stops(self) -> list[str]:
+        return list(self._due)
+
+    def add(self, stop: str) -> None:
+        """Start watching ``stop``; it is polled on the next call."""
+        with self._lock:
+            self._due.setdefault(stop, 0.0)
+
+    def remove(self, stop: str) -> None:
+        """Stop watching ``stop`` and forget its snapshot."""
+        with self._lock:
+            self._due.pop(stop, None)
+            self._snapshots.pop(stop, None)
+            self._intervals.pop(stop, None)
+            self.errors.pop(stop, None)
+
+    def snapshot(self, stop: str) -> list[Departure]:
+        """Return the departures of ``stop`` as of its last successful poll."""
+        return list(self._snapshots.get(stop, {}).values())
+
+    @property
+    def next_poll(self) -> float:
+        """Clock time at which the next stop is due, or ``inf`` if none is watched."""
+        return min(self._due.values(), default=float("inf"))
+
+    def _wait_time(self) -> float:
+        return min(max(0.0, self.next_poll - self._clock()), self.schedule.max_interval)
+
+    def _due_stops(self) -> list[str]:
+        now = self._clock()
+        with self._lock:
+            return [stop for stop, due in self._due.items() if due <= now]
+
+    def _update(self, results: Mapping[str, list[Departure] | DVBError]) -> list[DepartureEvent]:
+        now = self._clock()
+        wall = datetime.fromtimestamp(now, tz=timezone.utc)
+        events: list[DepartureEvent] = []
+        with self._lock:
+            for stop, result in results.items():
+                if stop not in self._due:
+                    continue  # removed while the request was in flight
+                if isinstance(result, DVBError):
+                    logger.warning("Polling departures of %r failed: %s", stop, result)
+                    self.errors[stop] = result
+                    interval = self.schedule.backoff(self._intervals.get(stop, 0.0))
+                else:
+                    self.errors.pop(stop, None)
+                    events.extend(diff_departures(stop, self._snapshots.get(stop, {}), result))
+                    self._snapshots[stop] = {dep.id: dep for dep in result}
+                    interval = self.schedule.interval(result, wall)
+                self._intervals[stop] = interval
+                self._due[stop] = now + interval
+        return events
+
+
+class DeparturePoller(_PollState):
+    """Watches departure monitors and reports only what changed.
+
+    Each stop is polled on its own adaptive schedule (see
+    :class:`PollSchedule`). The previous departures of each stop are kept by
+    ``Departure.id`` and compared with every new result, so consumers
+    receive a :class:`DepartureEvent` per change instead of full boards. The
+    first poll of a stop reports all its departures as ``"new"``. Failed
+    polls are logged to the ``dvb`` logger, kept in :attr:`errors`, and
+    retried later without emitting events.
+
+    Example::
+
+        poller = DeparturePoller(client, ["Postplatz", "Albertplatz"])
+        for event in poller.events():
+            if event.kind == "state" and event.departure.state == "Cancelled":
+                print(f"{event.departure.line} to {event.departure.direction} cancelled")
+
+    Args:
+        client: Client used for the requests.
+        stops: Stop names or IDs to watch.
+        limit: Departures requested per stop.
+        schedule: Polling intervals. Defaults to ``PollSchedule()``.
+        max_workers: Maximum number of stops polled at the same time.
+        clock: Wall-clock time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        stops: Iterable[str] = (),
+        *,
+        limit: int = 10,
+        schedule: PollSchedule | None = None,
+        max_workers: int = 8,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(stops, limit, schedule, clock)
+        self.client = client
+        self.max_workers = max_workers
+        self._closed = threading.Event()
+
+    def poll(self) -> list[DepartureEvent]:
+        """Poll every stop that is due and return the changes."""
+        due = self._due_stops()
+        if not due:
+            return []
+        results = self.client.monitor_many(due, limit=self.limit, max_workers=self.max_workers)
+        return self._update(results)
+
+    def events(self) -> Iterator[DepartureEvent]:
+        """Poll forever, yielding changes as they are found, until :meth:`close`."""
+        while not self._closed.is_set():
+            yield from self.poll()
+            self._closed.wait(self._wait_time())
+
+    def close(self) -> None:
+        """Make :meth:`events` return after its current wait."""
+        self._closed.set()
+
+
+class AsyncDeparturePoller(_PollState):
+    """Asynchronous counterpart of :class:`DeparturePoller` for :class:`dvb.AsyncClient`.
+
+    At most ``concurrency`` stops are polled at the same time.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        stops: Iterable[str] = (),
+        *,
+        limit: int = 10,
+        schedule: PollSchedule | None = None,
+        concurrency: int = 8,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(stops, limit, schedule, clock)
+        self.client = client
+        self.concurrency = concurrency
+        self._closed = False
+
+    async def poll(self) -> list[DepartureEvent]:
+        """Poll every stop that is due and return the changes."""
+        due = self._due_stops()
+        if not due:
+            return []
+        results = await self.client.monitor_many(
+            due, limit=self.limit, concurrency=self.concurrency
+        )
+        return self._update(results)
+
+    async def events(self) -> AsyncIterator[DepartureEvent]:
+        """Poll forever, yielding changes, until :meth:`close` or cancellation."""
+        while not self._closed:
+            for event in await self.poll():
+                yield event
+            await asyncio.sleep(self._wait_time())
+
+    def close(self) -> None:
+        """Make :meth:`events` return after its current wait."""
+        self._closed = True
@@ -0,0 +1,186 @@
+"""Client-side rate limiting with per-endpoint token buckets."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Protocol
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class RateLimiter(Protocol):
+    """Minimal interface for a client rate limiter.
+
+    ``reserve`` takes a token for one request to ``endpoint`` and returns the
+    number of seconds the caller has to wait before sending it. The clients
+    do the waiting, so the same limiter works for threads and coroutines.
+    """
+
+    def reserve(self, endpoint: str) -> float: ...
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitStats:
+    requests: int
+    delayed: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class _TokenBuckets:
+    """Bucket arithmetic and wait statistics shared by the limiters."""
+
+    def __init__(
+        self, rate: float, burst: float, endpoint_rates: Mapping[str, float] | None
+    ) -> None:
+        if rate <= 0:
+            msg = "rate must be > 0"
+            raise ValueError(msg)
+        if burst < 1:
+            msg = "burst must be >= 1"
+            raise ValueError(msg)
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_rates: dict[str, float] = dict(endpoint_rates or {})
+        self._stats: dict[str, list[float]] = {}  # endpoint -> [requests, delayed, total, max]
+        self._stats_lock = threading.Lock()
+
+    def _take(self, endpoint: str, tokens: float, last: float, now: float) -> tuple[float, float]:
+        """Take a token from a bucket; return the new token count and the wait.
+
+        The count goes negative when requests are queued, so later callers
+        wait behind earlier ones instead of racing for the next token.
+        """
+        rate = self.endpoint_rates.get(endpoint, self.rate)
+        tokens = min(self.burst, tokens + max(0.0, now - last) * rate) - 1
+        return tokens, max(0.0, -tokens / rate)
+
+    def _record(self, endpoint: str, wait: float) -> None:
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = [0, 0, 0.0, 0.0]
+            stats[0] += 1
+            if wait > 0:
+                stats[1] += 1
+                stats[2] += wait
+                stats[3] = max(stats[3], wait)
+
+    def stats(self) -> dict[str, RateLimitStats]:
+        """Return how long requests waited for a token, per endpoint."""
+        with self._stats_lock:
+            return {
+                endpoint: RateLimitStats(int(s[0]), int(s[1]), s[2], s[3])
+                for endpoint, s in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats.clear()
+
+
+class TokenBucketLimiter(_TokenBuckets):
+    """In-process rate limiter with one token bucket per endpoint.
+
+    Every endpoint may be called ``rate`` times per second on average, with
+    bursts of up to ``burst`` requests. Safe to share between threads and
+    between clients.
+
+    Args:
+        rate: Requests per second allowed per endpoint.
+        burst: Bucket size, i.e. requests allowed back to back after a pause.
+        endpoint_rates: Rates overriding ``rate`` for individual endpoints,
+            e.g. ``{"tr/trips": 1}``.
+        clock: Monotonic time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        *,
+        endpoint_rates: Mapping[str, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(rate, burst, endpoint_rates)
+        self._clock = clock
+        self._buckets: dict[str, tuple[float, float]] = {}  # endpoint -> (tokens, last)
+        self._lock = threading.Lock()
+
+    def reserve(self, endpoint: str) -> float:
+        with self._lock:
+            now = self._clock()
+            tokens, last = self._buckets.get(endpoint, (self.burst, now))
+            tokens, wait = self._take(endpoint, tokens, last, now)
+            self._buckets[endpoint] = (tokens, now)
+        self._record(endpoint, wait)
+        return wait
+
+
+class FileTokenBucketLimiter(_TokenBuckets):
+    """Rate limiter whose token buckets are shared by all processes using one file.
+
+    The bucket state is kept in a small JSON file guarded by an exclusive
+    ``flock``, so worker processes on one machine pointing at the same
+    ``path`` share a single budget per endpoint. Requires a POSIX system.
+    :meth:`stats` only covers the requests of the current process.
+
+    Args:
+        path: State file, created if missing.
+        rate: Requests per second allowed per endpoint, across all processes.
+        burst: Bucket size.
+        endpoint_rates: Rates overriding ``rate`` for individual endpoints.
+        clock: Wall-clock time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        rate: float = 5.0,
+        burst: float = 10.0,
+        *,
+        endpoint_rates: Mapping[str, float] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if fcntl is None:
+            msg = "FileTokenBucketLimiter requires fcntl, which is only available on POSIX"
+            raise ImportError(msg)
+        super().__init__(rate, burst, endpoint_rates)
+        self.path = os.fspath(path)
+        self._clock = clock
+        self._lock = threading.Lock()  # flock does not exclude threads sharing a descriptor
+
+    def reserve(self, endpoint: str) -> float:
+        with self._lock, open(self.path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                try:
+                    state = json.loads(content) if content else {}
+                except ValueError:
+                    state = {}  # a torn or foreign file only resets the budget
+                now = self._clock()
+                tokens, last = state.get(endpoint, (self.burst, now))
+                tokens, wait = self._take(endpoint, tokens, last, now)
+                state[endpoint] = (tokens, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state, separators=(",", ":")).encode())
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        self._record(endpoint, wait)
+        return wait
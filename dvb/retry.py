@@ -0,0 +1,190 @@
+"""Retry policy and circuit breaker for API requests."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Literal
+
+from .exceptions import ConnectionError as DVBConnectionError
+
+# Every endpoint the clients use only queries data, so repeating a request is safe
+DEFAULT_IDEMPOTENT_ENDPOINTS = frozenset(
+    {"dm", "dm/trip", "tr/trips", "tr/prevnext", "tr/pointfinder", "map/pins", "stt/lines", "rc"}
+)
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+def parse_retry_after(value: str | None, *, now: datetime | None = None) -> float | None:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(tz=timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def is_server_failure(error: DVBConnectionError) -> bool:
+    """Whether ``error`` indicates an unavailable server rather than a bad request."""
+    return error.status is None or error.status >= 500 or error.status == 429
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Only connection errors are retried: network failures, timeouts and the
+    HTTP statuses in ``retry_statuses``. A request that may have reached the
+    server is only repeated if it is a GET or goes to one of the
+    ``idempotent_endpoints``. Delays grow exponentially from ``backoff`` up to
+    ``max_backoff`` with full jitter, so clients that failed together do not
+    retry together. A ``Retry-After`` header takes precedence; if it asks for
+    more than ``max_retry_after`` seconds the request is not retried.
+
+    Attributes:
+        max_attempts: Total number of attempts, including the first one.
+        backoff: Delay before the first retry in seconds, before jitter.
+        max_backoff: Upper bound for the delay before jitter.
+        jitter: If True, wait a random time between 0 and the delay.
+        retry_statuses: HTTP statuses worth retrying.
+        idempotent_endpoints: Endpoints whose POST requests may be repeated.
+        max_retry_after: Longest ``Retry-After`` delay to honour.
+    """
+
+    max_attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    jitter: bool = True
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    idempotent_endpoints: frozenset[str] = DEFAULT_IDEMPOTENT_ENDPOINTS
+    max_retry_after: float = 60.0
+
+    def should_retry(
+        self, error: DVBConnectionError, method: str, endpoint: str, attempt: int
+    ) -> bool:
+        """Whether to retry after ``attempt`` (counting from 1) failed with ``error``."""
+        if attempt >= self.max_attempts:
+            return False
+        if error.status is not None and error.status not in self.retry_statuses:
+            return False
+        if error.retry_after is not None and error.retry_after > self.max_retry_after:
+            return False
+        return not error.sent or method == "GET" or endpoint in self.idempotent_endpoints
+
+    def delay(
+        self,
+        attempt: int,
+        error: DVBConnectionError,
+        rand: Callable[[], float] = random.random,
+    ) -> float:
+        """Seconds to wait before the attempt following ``attempt``."""
+        if error.retry_after is not None:
+            return error.retry_after
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * rand() if self.jitter else delay
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "trial")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker.
+
+    After ``failure_threshold`` consecutive server failures of an endpoint its
+    circuit opens and requests fail immediately with ``CircuitOpenError``
+    (or are answered from the response cache, if possible). After
+    ``recovery_time`` seconds a single trial request is let through: if it
+    succeeds the circuit closes, otherwise it stays open for another
+    ``recovery_time``. Safe to share between threads and clients.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit.
+        recovery_time: Seconds before a trial request is allowed.
+        clock: Monotonic time source, overridable for testing.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            msg = "failure_threshold must be >= 1"
+            raise ValueError(msg)
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self._clock = clock
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint: str) -> _Circuit:
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit()
+        return circuit
+
+    def state(self, endpoint: str) -> CircuitState:
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.opened_at is None:
+                return "closed"
+            if circuit.trial or self._clock() - circuit.opened_at >= self.recovery_time:
+                return "half_open"
+            return "open"
+
+    def allow(self, endpoint: str) -> bool:
+        """Whether a request to ``endpoint`` may be sent now."""
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.opened_at is None:
+                return True
+            if circuit.trial or self._clock() - circuit.opened_at < self.recovery_time:
+                return False
+            circuit.trial = True
+            return True
+
+    def record_success(self, endpoint: str) -> None:
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            circuit.failures = 0
+            circuit.opened_at = None
+            circuit.trial = False
+
+    def release(self, endpoint: str) -> None:
+        """Give up a trial request without an answer, leaving the state unchanged."""
+        with self._lock:
+            self._circuit(endpoint).trial = False
+
+    def record_failure(self, endpoint: str) -> None:
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            circuit.failures += 1
+            if circuit.trial or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = self._clock()
+            circuit.trial = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._circuits.clear()
@@ -0,0 +1,212 @@
+"""Grid-based spatial index for nearest-stop lookups."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Generic, Protocol, TypeVar
+
+from ._utils import coords_wgs_to_gk4, coords_wgs_to_gk4_many
+from .models import Coords, Pin, Stop
+
+
+class _Located(Protocol):
+    @property
+    def id(self) -> str: ...
+
+    @property
+    def coords(self) -> Coords | None: ...
+
+
+L = TypeVar("L", bound=_Located)
+
+
+@dataclass(frozen=True, slots=True)
+class Neighbor(Generic[L]):
+    item: L
+    distance: float  # in meters
+
+
+class SpatialIndex(Generic[L]):
+    """In-memory index of stops or pins for nearest-neighbour queries.
+
+    Items are bucketed into square cells of a uniform grid over their GK4
+    (Gauss-Krüger zone 4) coordinates. GK4 is a metric projection, so
+    distances are plain Euclidean distances in meters and no reprojection is
+    needed per item; each query converts only its own point. Items without
+    coordinates are skipped. The index is safe to share between threads.
+
+    Args:
+        items: Initial ``Stop`` or ``Pin`` objects.
+        cell_size: Edge length of a grid cell in meters. Roughly the typical
+            distance between neighbouring stops works best.
+        max_distance: Maximum distance in meters for :meth:`dvb.Client.address`
+            to accept the nearest indexed item as a local answer.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[L] = (),
+        *,
+        cell_size: float = 250.0,
+        max_distance: float = 1000.0,
+    ) -> None:
+        if cell_size <= 0:
+            msg = "cell_size must be > 0"
+            raise ValueError(msg)
+        self.cell_size = cell_size
+        self.max_distance = max_distance
+        self._cells: dict[tuple[int, int], dict[str, tuple[int, int, L]]] = {}
+        self._cell_of: dict[str, tuple[int, int]] = {}
+        self._bounds = (0, 0, -1, -1)  # (min x, min y, max x, max y) of occupied cells
+        self._lock = threading.Lock()
+        self.add(items)
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._cell_of
+
+    def __iter__(self) -> Iterator[L]:
+        with self._lock:
+            return iter([entry[2] for cell in self._cells.values() for entry in cell.values()])
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add(self, items: Iterable[L]) -> None:
+        """Add or replace items, keyed by ID. All coordinates are projected in one batch."""
+        located = [(item, item.coords) for item in items if item.coords is not None]
+        points = coords_wgs_to_gk4_many(
+            [coords.lat for _, coords in located], [coords.lng for _, coords in located]
+        )
+        with self._lock:
+            for (item, _), (northing, easting) in zip(located, points, strict=True):
+                self._discard(item.id)
+                cell = self._cell(easting, northing)
+                self._cells.setdefault(cell, {})[item.id] = (easting, northing, item)
+                self._cell_of[item.id] = cell
+                self._extend_bounds(cell)
+
+    def _extend_bounds(self, cell: tuple[int, int]) -> None:
+        x0, y0, x1, y1 = self._bounds
+        if x0 > x1:
+            self._bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            ix, iy = cell
+            self._bounds = (min(x0, ix), min(y0, iy), max(x1, ix), max(y1, iy))
+
+    def remove(self, item_id: str) -> None:
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id: str) -> None:
+        cell = self._cell_of.pop(item_id, None)
+        if cell is not None:
+            entries = self._cells[cell]
+            del entries[item_id]
+            if not entries:
+                del self._cells[cell]
+
+    def nearest(
+        self, lat: float, lng: float, k: int = 1, *, max_distance: float | None = None
+    ) -> list[Neighbor[L]]:
+        """Return the ``k`` items closest to a WGS84 point, closest first.
+
+        Args:
+            lat: Latitude (WGS84).
+            lng: Longitude (WGS84).
+            k: Number of items to return.
+            max_distance: Ignore items farther away than this many meters.
+        """
+        northing, easting = coords_wgs_to_gk4(lat, lng)
+        with self._lock:
+            return self._nearest(easting, northing, k, max_distance)
+
+    def _nearest(self, x: int, y: int, k: int, max_distance: float | None) -> list[Neighbor[L]]:
+        if k <= 0 or not self._cells:
+            return []
+        cx, cy = self._cell(x, y)
+        x0, y0, x1, y1 = self._bounds
+        # Beyond this ring every occupied cell has been visited
+        max_ring = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        if max_distance is not None:
+            max_ring = min(max_ring, math.ceil(max_distance / self.cell_size) + 1)
+        best: list[tuple[float, str, L]] = []  # the k nearest so far, as a max-heap
+        limit = math.inf if max_distance is None else max_distance
+
+        def visit(entries: Iterable[tuple[int, int, L]]) -> None:
+            for ex, ey, item in entries:
+                d = math.hypot(ex - x, ey - y)
+                if d > limit:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-d, item.id, item))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, item.id, item))
+
+        # Rings closer than the bounding box of all occupied cells are empty
+        first_ring = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)
+        for ring in range(first_ring, max_ring + 1):
+            # Items in this ring or beyond are at least this far away
+            if len(best) == k and (ring - 1) * self.cell_size >= -best[0][0]:
+                break
+            if 8 * ring > len(self._cells):
+                # Sparse neighbourhood: scanning every occupied cell is cheaper
+                for cell, entries in self._cells.items():
+                    if max(abs(cell[0] - cx), abs(cell[1] - cy)) >= ring:
+                        visit(entries.values())
+                break
+            for cell in _ring(cx, cy, ring):
+                ring_entries = self._cells.get(cell)
+                if ring_entries:
+                    visit(ring_entries.values())
+        return [Neighbor(item, -neg) for neg, _, item in sorted(best, reverse=True)]
+
+    def within_radius(self, lat: float, lng: float, radius: float) -> list[Neighbor[L]]:
+        """Return all items within ``radius`` meters of a WGS84 point, closest first."""
+        northing, easting = coords_wgs_to_gk4(lat, lng)
+        x0, y0 = self._cell(easting - radius, northing - radius)
+        x1, y1 = self._cell(easting + radius, northing + radius)
+        found: list[Neighbor[L]] = []
+        with self._lock:
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+                cells = [e for c, e in self._cells.items() if x0 <= c[0] <= x1 and y0 <= c[1] <= y1]
+            else:
+                cells = [
+                    self._cells[(ix, iy)]
+                    for ix in range(x0, x1 + 1)
+                    for iy in range(y0, y1 + 1)
+                    if (ix, iy) in self._cells
+                ]
+            for entries in cells:
+                for ex, ey, item in entries.values():
+                    d = math.hypot(ex - easting, ey - northing)
+                    if d <= radius:
+                        found.append(Neighbor(item, d))
+        found.sort(key=lambda n: (n.distance, n.item.id))
+        return found
+
+
+def _ring(cx: int, cy: int, ring: int) -> Iterator[tuple[int, int]]:
+    """Yield the cells at Chebyshev distance ``ring`` from ``(cx, cy)``."""
+    if ring == 0:
+        yield cx, cy
+        return
+    for ix in range(cx - ring, cx + ring + 1):
+        yield ix, cy - ring
+        yield ix, cy + ring
+    for iy in range(cy - ring + 1, cy + ring):
+        yield cx - ring, iy
+        yield cx + ring, iy
+
+
+def as_stop(item: Stop | Pin) -> Stop:
+    """Return ``item`` as a ``Stop``, converting pins."""
+    if isinstance(item, Stop):
+        return item
+    return Stop(id=item.id, name=item.name, city=item.city, coords=item.coords)
@@ -0,0 +1,261 @@
+"""Local stop index with fuzzy name search."""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from .models import Coords, Pin, Stop
+
+_NON_WORD = re.compile(r"[\W_]+")
+_UMLAUT_DIGRAPHS = (("ae", "a"), ("oe", "o"), ("ue", "u"))
+_ABBREVIATIONS = {"str": "strasse", "hbf": "hauptbahnhof", "bf": "bahnhof", "pl": "platz"}
+_DEFAULT_CITY = "dresden"  # the API leaves the city empty for stops in Dresden
+_FORMAT_VERSION = 1
+
+
+def fold_name(text: str) -> str:
+    """Reduce a stop name to a canonical search key.
+
+    Case, accents, punctuation and the common spelling variants of German
+    names are folded together, so ``"Münchner Platz"``, ``"muenchner-platz"``
+    and ``"Munchner Pl."`` all give the same key. ``ß`` becomes ``ss`` and
+    the abbreviations ``Str.``, ``Hbf``, ``Bf`` and ``Pl.`` are expanded.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    for digraph, vowel in _UMLAUT_DIGRAPHS:
+        text = text.replace(digraph, vowel)
+    tokens = []
+    for token in _NON_WORD.sub(" ", text).split():
+        if token in _ABBREVIATIONS:
+            token = _ABBREVIATIONS[token]
+        elif token.endswith("str") and len(token) > 3:
+            token += "asse"
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True, slots=True)
+class StopMatch:
+    stop: Stop
+    score: float  # 1.0 for an exact match, lower for prefix and fuzzy matches
+
+
+class StopIndex:
+    """In-memory index of stops for local name search.
+
+    Build it from ``find`` results or ``pins`` sweeps, save it to disk and
+    pass it to a client as ``stop_index=`` to answer :meth:`dvb.Client.find`
+    and stop name resolution without a ``tr/pointfinder`` round trip.
+
+    Lookups try an exact match of the folded name (see :func:`fold_name`),
+    then prefix matches of the name or any word in it, then fuzzy trigram
+    matches. A leading city name such as ``"Dresden,"`` is recognised and
+    used to prefer stops in that city. The index is safe to share between
+    threads.
+
+    Args:
+        stops: Initial stops.
+        min_score: Minimum score for a match to count as a local hit; weaker
+            matches fall back to the API.
+    """
+
+    def __init__(self, stops: Iterable[Stop] = (), *, min_score: float = 0.5) -> None:
+        self.min_score = min_score
+        self._stops: dict[str, Stop] = {}
+        self._keys: dict[str, str] = {}  # stop ID -> folded name
+        self._cities: dict[str, str] = {}  # stop ID -> folded city
+        self._exact: dict[str, set[str]] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._gram_counts: dict[str, int] = {}
+        self._known_cities: set[str] = {_DEFAULT_CITY}
+        self._prefixes: list[tuple[str, str]] = []  # (suffix of a folded name, stop ID)
+        self._prefixes_sorted = True
+        self._lock = threading.Lock()
+        self.add(stops)
+
+    def __len__(self) -> int:
+        return len(self._stops)
+
+    def __contains__(self, stop_id: object) -> bool:
+        return stop_id in self._stops
+
+    def __iter__(self) -> Iterator[Stop]:
+        with self._lock:
+            return iter(list(self._stops.values()))
+
+    def get(self, stop_id: str) -> Stop | None:
+        return self._stops.get(stop_id)
+
+    def add(self, stops: Iterable[Stop]) -> None:
+        """Add or replace stops, keyed by stop ID."""
+        with self._lock:
+            for stop in stops:
+                previous = self._stops.get(stop.id)
+                if previous == stop:
+                    continue
+                if previous is not None:
+                    self._remove(stop.id)
+                self._insert(stop)
+
+    def add_pins(self, pins: Iterable[Pin]) -> None:
+        """Add the stops among map pins, e.g. from a ``pins`` sweep over the network."""
+        self.add(
+            Stop(id=pin.id, name=pin.name, city=pin.city, coords=pin.coords)
+            for pin in pins
+            if pin.type == "Stop"
+        )
+
+    def _insert(self, stop: Stop) -> None:
+        key = fold_name(stop.name)
+        city = fold_name(stop.city)
+        self._stops[stop.id] = stop
+        self._keys[stop.id] = key
+        self._cities[stop.id] = city
+        if city:
+            self._known_cities.add(city)
+        self._exact.setdefault(key, set()).add(stop.id)
+        grams = _trigrams(key)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(stop.id)
+        self._gram_counts[stop.id] = len(grams)
+        self._prefixes.extend((key[start:], stop.id) for start in self._word_starts(key))
+        self._prefixes_sorted = False
+
+    def _remove(self, stop_id: str) -> None:
+        key = self._keys.pop(stop_id)
+        del self._stops[stop_id]
+        del self._cities[stop_id]
+        self._exact[key].discard(stop_id)
+        for gram in _trigrams(key):
+            self._grams[gram].discard(stop_id)
+        del self._gram_counts[stop_id]
+        self._prefixes = [entry for entry in self._prefixes if entry[1] != stop_id]
+
+    @staticmethod
+    def _word_starts(key: str) -> list[int]:
+        return [0] + [i + 1 for i, c in enumerate(key) if c == " "]
+
+    def _split_city(self, key: str) -> tuple[str, str]:
+        """Split a leading known city name off a folded query."""
+        for city in sorted(self._known_cities, key=len, reverse=True):
+            if key.startswith(city + " "):
+                return city, key[len(city) + 1 :]
+        return "", key
+
+    def search(self, query: str, *, limit: int = 10) -> list[StopMatch]:
+        """Return the best matches for ``query``, best first.
+
+        Args:
+            query: Stop name, optionally preceded by a city, e.g.
+                ``"Dresden, Hauptbahnhof"``.
+            limit: Maximum number of matches.
+        """
+        city, key = self._split_city(fold_name(query))
+        if not key:
+            return []
+        with self._lock:
+            scores: dict[str, float] = {stop_id: 1.0 for stop_id in self._exact.get(key, ())}
+            self._score_prefixes(key, scores)
+            if sum(1 for s in scores.values() if s >= self.min_score) < limit:
+                self._score_trigrams(key, scores)
+            matches = [
+                StopMatch(self._stops[stop_id], self._city_weight(stop_id, city) * score)
+                for stop_id, score in scores.items()
+            ]
+        matches.sort(key=lambda m: (-m.score, len(m.stop.name), m.stop.id))
+        return matches[:limit]
+
+    def _score_prefixes(self, key: str, scores: dict[str, float]) -> None:
+        if not self._prefixes_sorted:
+            self._prefixes.sort()
+            self._prefixes_sorted = True
+        i = bisect.bisect_left(self._prefixes, (key, ""))
+        while i < len(self._prefixes):
+            suffix, stop_id = self._prefixes[i]
+            if not suffix.startswith(key):
+                break
+            name = self._keys[stop_id]
+            ratio = len(key) / len(name)
+            score = (0.8 if suffix == name else 0.7) + 0.2 * ratio
+            if score > scores.get(stop_id, 0.0):
+                scores[stop_id] = score
+            i += 1
+
+    def _score_trigrams(self, key: str, scores: dict[str, float]) -> None:
+        grams = _trigrams(key)
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        for stop_id, count in shared.items():
+            dice = 2 * count / (len(grams) + self._gram_counts[stop_id])
+            score = 0.8 * dice
+            if score > scores.get(stop_id, 0.0):
+                scores[stop_id] = score
+
+    def _city_weight(self, stop_id: str, city: str) -> float:
+        stop_city = self._cities[stop_id] or _DEFAULT_CITY
+        if not city:
+            # Like the API, rank stops in Dresden first when no city is given
+            return 1.0 if stop_city == _DEFAULT_CITY else 0.95
+        return 1.0 if stop_city == city else 0.4
+
+    def find(self, query: str, *, limit: int = 10) -> list[Stop]:
+        """Return the stops matching ``query`` with at least ``min_score``, best first."""
+        return [m.stop for m in self.search(query, limit=limit) if m.score >= self.min_score]
+
+    def resolve(self, query: str) -> Stop | None:
+        """Return the best stop for ``query``, or None if there is no good enough match."""
+        matches = self.search(query, limit=1)
+        if matches and matches[0].score >= self.min_score:
+            return matches[0].stop
+        return None
+
+    def to_json(self) -> dict[str, Any]:
+        with self._lock:
+            stops = [
+                [s.id, s.name, s.city, *((s.coords.lat, s.coords.lng) if s.coords else ())]
+                for s in self._stops.values()
+            ]
+        return {"version": _FORMAT_VERSION, "stops": stops}
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], *, min_score: float = 0.5) -> StopIndex:
+        if data.get("version") != _FORMAT_VERSION:
+            msg = f"Unsupported stop index version: {data.get('version')}"
+            raise ValueError(msg)
+        stops = (
+            Stop(
+                id=row[0],
+                name=row[1],
+                city=row[2],
+                coords=Coords(lat=row[3], lng=row[4]) if len(row) > 3 else None,
+            )
+            for row in data["stops"]
+        )
+        return cls(stops, min_score=min_score)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Write the index to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], *, min_score: float = 0.5) -> StopIndex:
+        """Read an index written by :meth:`save`."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(json.load(f), min_score=min_score)
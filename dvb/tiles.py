@@ -0,0 +1,259 @@
+"""Tiled, cached fetching of map pins for arbitrary bounding boxes."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+from ._utils import coords_wgs_to_gk4_many
+from .cache import Cache, TTLCache
+from .dvb import _parse_pins
+from .models import Pin
+
+if TYPE_CHECKING:
+    from .aio import AsyncClient
+    from .dvb import Client
+
+Tile = tuple[int, int]
+
+_TILE_CACHE_SIZE = 4096
+_TILE_TTL = 24 * 60 * 60
+
+
+class _PinTileGrid:
+    def __init__(
+        self,
+        tile_size: float,
+        cache: Cache | None,
+        ttl: float,
+        max_tiles: int,
+    ) -> None:
+        if tile_size <= 0:
+            msg = "tile_size must be > 0"
+            raise ValueError(msg)
+        self.tile_size = tile_size
+        self.ttl = ttl
+        self.max_tiles = max_tiles
+        self.cache: Cache = (
+            cache if cache is not None else TTLCache(maxsize=_TILE_CACHE_SIZE, ttl=ttl)
+        )
+
+    def tiles(self, sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float) -> list[Tile]:
+        """Return the GK4 tiles covering a WGS84 bounding box."""
+        # The box is not axis-aligned in GK4, so cover the envelope of all four corners
+        northings, eastings = zip(
+            *coords_wgs_to_gk4_many(
+                [sw_lat, sw_lat, ne_lat, ne_lat], [sw_lng, ne_lng, sw_lng, ne_lng]
+            ),
+            strict=True,
+        )
+        x0 = math.floor(min(eastings) / self.tile_size)
+        x1 = math.floor(max(eastings) / self.tile_size)
+        y0 = math.floor(min(northings) / self.tile_size)
+        y1 = math.floor(max(northings) / self.tile_size)
+        count = (x1 - x0 + 1) * (y1 - y0 + 1)
+        if count > self.max_tiles:
+            msg = f"Bounding box spans {count} tiles, more than max_tiles={self.max_tiles}"
+            raise ValueError(msg)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def key(self, tile: Tile, pin_type: str) -> str:
+        return f"{self.tile_size:g}:{tile[0]}:{tile[1]}:{pin_type}"
+
+    def payload(self, tile: Tile, pin_type: str) -> dict[str, Any]:
+        size = self.tile_size
+        return {
+            "swlat": str(int(tile[1] * size)),
+            "swlng": str(int(tile[0] * size)),
+            "nelat": str(int((tile[1] + 1) * size)),
+            "nelng": str(int((tile[0] + 1) * size)),
+            "pintypes": [pin_type],
+        }
+
+    def lookup(
+        self, tiles: list[Tile], pin_types: tuple[str, ...]
+    ) -> tuple[list[list[Pin]], list[tuple[Tile, str]]]:
+        """Split the ``(tile, type)`` pairs into cached pin lists and missing pairs."""
+        found: list[list[Pin]] = []
+        missing: list[tuple[Tile, str]] = []
+        for tile in tiles:
+            for pin_type in pin_types:
+                pins = self.cache.get(self.key(tile, pin_type))
+                if pins is None:
+                    missing.append((tile, pin_type))
+                else:
+                    found.append(pins)
+        return found, missing
+
+    def store(self, tile: Tile, pin_type: str, pins: list[Pin]) -> None:
+        self.cache.set(self.key(tile, pin_type), pins, self.ttl)
+
+    @staticmethod
+    def merge(
+        pin_lists: Iterable[list[Pin]],
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+    ) -> list[Pin]:
+        """Merge tile results, dropping duplicates and pins outside the box."""
+        merged: dict[str, Pin] = {}
+        for pins in pin_lists:
+            for pin in pins:
+                coords = pin.coords
+                if coords is not None and not (
+                    sw_lat <= coords.lat <= ne_lat and sw_lng <= coords.lng <= ne_lng
+                ):
+                    continue
+                merged.setdefault(pin.id, pin)
+        return list(merged.values())
+
+
+class PinTiles(_PinTileGrid):
+    """Fetches map pins for any bounding box through a cache of fixed GK4 tiles.
+
+    Every box is split into square tiles of a fixed grid in GK4 space. Only
+    tiles missing from the cache (or expired) are requested, one ``map/pins``
+    request per tile and pin type, concurrently on a thread pool. The parsed
+    pin lists are cached per tile and pin type, so panning a map across the
+    city mostly hits the cache. The merged result holds each pin once and only
+    pins inside the requested box.
+
+    The worker threads are kept between calls, since the first coordinate
+    conversion in every new thread is expensive; call :meth:`close` or use
+    the instance as a context manager to shut them down.
+
+    Args:
+        client: Client used for the requests.
+        tile_size: Tile edge length in meters.
+        cache: Cache for the per-tile pin lists. Defaults to an in-memory
+            ``TTLCache``.
+        ttl: Seconds a tile stays cached.
+        max_workers: Maximum number of tile requests in flight at once.
+        max_tiles: Maximum number of tiles a single box may span.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        tile_size: float = 2000.0,
+        cache: Cache | None = None,
+        ttl: float = _TILE_TTL,
+        max_workers: int = 8,
+        max_tiles: int = 256,
+    ) -> None:
+        super().__init__(tile_size, cache, ttl, max_tiles)
+        self.client = client
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Shut down the worker threads. A later call to :meth:`pins` starts new ones."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> PinTiles:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def pins(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        *,
+        pin_types: tuple[str, ...] = ("Stop",),
+    ) -> list[Pin]:
+        """Get map pins within a bounding box. See :meth:`dvb.Client.pins`.
+
+        Raises:
+            ValueError: If the box spans more than ``max_tiles`` tiles.
+            APIError: If the API returns an error status for a tile.
+            ConnectionError: If a tile request fails.
+        """
+        tiles = self.tiles(sw_lat, sw_lng, ne_lat, ne_lng)
+        found, missing = self.lookup(tiles, pin_types)
+        if missing:
+            found.extend(self._fetch(missing))
+        return self.merge(found, sw_lat, sw_lng, ne_lat, ne_lng)
+
+    def _fetch_tile(self, tile: Tile, pin_type: str) -> list[Pin]:
+        pins: list[Pin] = self.client._post("map/pins", self.payload(tile, pin_type), _parse_pins)
+        self.store(tile, pin_type, pins)
+        return pins
+
+    def _fetch(self, missing: list[tuple[Tile, str]]) -> list[list[Pin]]:
+        if len(missing) == 1:
+            return [self._fetch_tile(*missing[0])]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="dvb-tiles"
+                )
+            executor = self._executor
+        futures = [executor.submit(self._fetch_tile, *pair) for pair in missing]
+        return [future.result() for future in futures]
+
+
+class AsyncPinTiles(_PinTileGrid):
+    """Asynchronous counterpart of :class:`PinTiles` for :class:`dvb.AsyncClient`.
+
+    At most ``concurrency`` tile requests are in flight at the same time.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        *,
+        tile_size: float = 2000.0,
+        cache: Cache | None = None,
+        ttl: float = _TILE_TTL,
+        concurrency: int = 8,
+        max_tiles: int = 256,
+    ) -> None:
+        super().__init__(tile_size, cache, ttl, max_tiles)
+        self.client = client
+        self.concurrency = concurrency
+
+    async def pins(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        *,
+        pin_types: tuple[str, ...] = ("Stop",),
+    ) -> list[Pin]:
+        """Get map pins within a bounding box. See :meth:`PinTiles.pins`."""
+        tiles = self.tiles(sw_lat, sw_lng, ne_lat, ne_lng)
+        found, missing = self.lookup(tiles, pin_types)
+        if missing:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(tile: Tile, pin_type: str) -> list[Pin]:
+                async with semaphore:
+                    pins: list[Pin] = await self.client._post(
+                        "map/pins", self.payload(tile, pin_type), _parse_pins
+                    )
+                self.store(tile, pin_type, pins)
+                return pins
+
+            found.extend(await asyncio.gather(*(fetch(*pair) for pair in missing)))
+        return self.merge(found, sw_lat, sw_lng, ne_lat, ne_lng)
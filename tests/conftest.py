@@ -65,3 +65,16 @@ def mock_post(
 def mock_find_helmholtzstrasse(rsps: responses.RequestsMock) -> None:
     """Mock the pointfinder endpoint to resolve 'Helmholtzstraße'."""
     mock_get(rsps, "tr/pointfinder", fixture="pointfinder.json")
+
+
+def async_transport(routes: dict[str, dict[str, Any]]) -> Any:
+    """Build an httpx mock transport answering each endpoint path with a JSON body."""
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = routes.get(request.url.path.lstrip("/"))
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json=body)
+
+    return httpx.MockTransport(handler)
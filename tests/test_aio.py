@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import pytest
+
+from dvb import AsyncClient, ResponseCache
+from dvb.exceptions import APIError, ConnectionError
+from dvb.models import Departure, Line, Pin, RegularStop, Route, RouteChange, Stop
+
+from .conftest import async_transport, load_fixture
+
+
+def make_client(routes: dict[str, dict[str, Any]]) -> AsyncClient:
+    return AsyncClient(
+        user_agent="dvb-test-suite/1.0 (test@test)", transport=async_transport(routes)
+    )
+
+
+async def _call(client: AsyncClient, method: str, *args: Any, **kwargs: Any) -> Any:
+    async with client:
+        return await getattr(client, method)(*args, **kwargs)
+
+
+class TestAsyncClient:
+    def test_requires_user_agent(self) -> None:
+        with pytest.raises(ValueError, match="user_agent"):
+            AsyncClient(user_agent=" ")
+
+    def test_find(self) -> None:
+        client = make_client({"tr/pointfinder": load_fixture("pointfinder.json")})
+        results = asyncio.run(_call(client, "find", "Helmholtz"))
+        assert isinstance(results, list)
+        assert len(results) == 3
+        assert isinstance(results[0], Stop)
+        assert results[0].id == "33000742"
+
+    def test_monitor_resolves_stop_name(self) -> None:
+        client = make_client(
+            {
+                "tr/pointfinder": load_fixture("pointfinder.json"),
+                "dm": load_fixture("departure_monitor.json"),
+            }
+        )
+        results = asyncio.run(_call(client, "monitor", "Helmholtzstraße"))
+        assert isinstance(results, list)
+        assert len(results) == 2
+        assert isinstance(results[0], Departure)
+        assert results[0].line == "3"
+
+    def test_route(self) -> None:
+        client = make_client({"tr/trips": load_fixture("trips.json")})
+        results = asyncio.run(_call(client, "route", "33000028", "33000016"))
+        assert isinstance(results, list)
+        assert isinstance(results[0], Route)
+        assert results[0].session_id == "367417461:efa4"
+
+    def test_earlier_later(self) -> None:
+        client = make_client({"tr/prevnext": load_fixture("trips.json")})
+        results = asyncio.run(_call(client, "earlier_later", "33000028", "33000016", "abc"))
+        assert isinstance(results, list)
+        assert len(results) == 1
+
+    def test_pins(self) -> None:
+        client = make_client({"map/pins": load_fixture("pins.json")})
+        results = asyncio.run(_call(client, "pins", 51.0, 13.7, 51.1, 13.8))
+        assert isinstance(results, list)
+        assert all(isinstance(p, Pin) for p in results)
+        assert [p.type for p in results] == ["Stop", "Platform", "ParkAndRide"]
+
+    def test_address(self) -> None:
+        client = make_client({"tr/pointfinder": load_fixture("pointfinder.json")})
+        result = asyncio.run(_call(client, "address", 51.04, 13.70))
+        assert isinstance(result, Stop)
+
+    def test_lines(self) -> None:
+        client = make_client({"stt/lines": load_fixture("lines.json")})
+        results = asyncio.run(_call(client, "lines", "33000742"))
+        assert isinstance(results, list)
+        assert all(isinstance(line, Line) for line in results)
+
+    def test_route_changes(self) -> None:
+        client = make_client({"rc": load_fixture("route_changes.json")})
+        results = asyncio.run(_call(client, "route_changes"))
+        assert isinstance(results, list)
+        assert all(isinstance(c, RouteChange) for c in results)
+
+    def test_trip_details(self) -> None:
+        client = make_client({"dm/trip": load_fixture("trip_details.json")})
+        time = datetime(2017, 12, 6, 13, 24, 41, tzinfo=timezone.utc)
+        results = asyncio.run(_call(client, "trip_details", "71313709", time, "33000077"))
+        assert isinstance(results, list)
+        assert isinstance(results[0], RegularStop)
+
+    def test_raw_returns_dict(self) -> None:
+        client = make_client({"dm": load_fixture("departure_monitor.json")})
+        result = asyncio.run(_call(client, "monitor", "33000742", raw=True))
+        assert isinstance(result, dict)
+        assert "Departures" in result
+
+    def test_api_error(self) -> None:
+        client = make_client({"tr/pointfinder": {"Status": {"Code": "InvalidRequest"}}})
+        with pytest.raises(APIError, match="InvalidRequest"):
+            asyncio.run(_call(client, "find", "test"))
+
+    def test_http_error_raises_connection_error(self) -> None:
+        client = make_client({})
+        with pytest.raises(ConnectionError):
+            asyncio.run(_call(client, "find", "test"))
+
+    def test_transport_error_raises_connection_error(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectTimeout("timeout", request=request)
+
+        client = AsyncClient(user_agent="test/1.0", transport=httpx.MockTransport(handler))
+        with pytest.raises(ConnectionError):
+            asyncio.run(_call(client, "find", "test"))
+
+    def test_concurrent_requests(self) -> None:
+        client = make_client({"dm": load_fixture("departure_monitor.json")})
+
+        async def run() -> list[Any]:
+            async with client:
+                return await asyncio.gather(*(client.monitor(str(33000000 + i)) for i in range(50)))
+
+        results = asyncio.run(run())
+        assert len(results) == 50
+        assert all(len(r) == 2 for r in results)
+
+
+class TestAsyncMonitorMany:
+    def test_fetches_and_deduplicates(self) -> None:
+        requested: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            stop_id = json.loads(request.content)["stopid"]
+            requested.append(stop_id)
+            if stop_id == "1":
+                return httpx.Response(200, json={"Status": {"Code": "ServiceError"}})
+            return httpx.Response(200, json=load_fixture("departure_monitor.json"))
+
+        client = AsyncClient(user_agent="test/1.0", transport=httpx.MockTransport(handler))
+        results = asyncio.run(_call(client, "monitor_many", ["1", "2", "2", "3"], concurrency=2))
+        assert list(results) == ["1", "2", "3"]
+        assert sorted(requested) == ["1", "2", "3"]
+        assert isinstance(results["1"], APIError)
+        assert isinstance(results["2"], list)
+        assert len(results["3"]) == 2  # type: ignore[arg-type]
+
+    def test_malformed_stop_does_not_fail_batch(self) -> None:
+        bad = load_fixture("departure_monitor.json")
+        bad["Departures"][0]["ScheduledTime"] = "garbage"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if json.loads(request.content)["stopid"] == "1":
+                return httpx.Response(200, json=bad)
+            return httpx.Response(200, json=load_fixture("departure_monitor.json"))
+
+        client = AsyncClient(user_agent="test/1.0", transport=httpx.MockTransport(handler))
+        results = asyncio.run(_call(client, "monitor_many", ["1", "2"]))
+        assert isinstance(results["1"], APIError)
+        assert isinstance(results["2"], list)
+
+    def test_timeout_marks_slow_stops(self) -> None:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if json.loads(request.content)["stopid"] == "2":
+                await asyncio.sleep(5)
+            return httpx.Response(200, json=load_fixture("departure_monitor.json"))
+
+        client = AsyncClient(user_agent="test/1.0", transport=httpx.MockTransport(handler))
+        results = asyncio.run(_call(client, "monitor_many", ["1", "2"], timeout=0.2))
+        assert isinstance(results["1"], list)
+        assert isinstance(results["2"], ConnectionError)
+
+
+class TestAsyncResponseCache:
+    def test_stale_entry_refreshed_in_background(self) -> None:
+        now = [0.0]
+        bodies = [
+            load_fixture("route_changes.json"),
+            {"Changes": [], "Status": {"Code": "Ok"}},
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=bodies.pop(0))
+
+        cache = ResponseCache({"rc": 10}, stale_ttl=60, clock=lambda: now[0])
+        client = AsyncClient(
+            user_agent="test/1.0", transport=httpx.MockTransport(handler), response_cache=cache
+        )
+
+        async def run() -> tuple[Any, Any, Any]:
+            async with client:
+                fresh = await client.route_changes()
+                now[0] = 20
+                stale = await client.route_changes()
+            return fresh, stale, await client.route_changes()
+
+        fresh, stale, refreshed = asyncio.run(run())
+        assert stale == fresh
+        assert refreshed == []
+        assert bodies == []
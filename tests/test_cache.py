@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from dvb import Client, Pin, ResponseCache, SQLiteCache, TTLCache
+
+from .conftest import mock_get, mock_post
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_set(self) -> None:
+        cache = TTLCache()
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_expiry(self) -> None:
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        clock.now = 11
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert "a" not in cache
+
+    def test_lru_eviction(self) -> None:
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+
+    def test_stats(self) -> None:
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+        stats = cache.stats
+        assert stats.hits == 2
+        assert stats.misses == 1
+        assert stats.size == 1
+        assert stats.hit_rate == pytest.approx(2 / 3)
+
+    def test_disabled(self) -> None:
+        cache = TTLCache(maxsize=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_update_and_items(self) -> None:
+        cache = TTLCache()
+        cache.update({"a": 1, "b": 2})
+        cache.update([("c", 3)])
+        assert sorted(cache.items()) == [("a", 1), ("b", 2), ("c", 3)]
+
+    def test_negative_maxsize(self) -> None:
+        with pytest.raises(ValueError, match="maxsize"):
+            TTLCache(maxsize=-1)
+
+
+def _fill(path: str) -> None:
+    SQLiteCache(path).set("child", "written by another process")
+
+
+class TestSQLiteCache:
+    def test_get_set(self, tmp_path: Path) -> None:
+        cache = SQLiteCache(tmp_path / "cache.db")
+        cache.set("a", (1.5, {"Lines": []}))
+        assert cache.get("a") == (1.5, {"Lines": []})
+        assert cache.get("b") is None
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.size) == (1, 1, 1)
+
+    def test_persists_across_instances(self, tmp_path: Path) -> None:
+        pins = [Pin("33000742", "Helmholtzstraße", "Dresden", (51.0, 13.7), "stop")]
+        SQLiteCache(tmp_path / "cache.db").set("tile", pins)
+        assert SQLiteCache(tmp_path / "cache.db").get("tile") == pins
+
+    def test_expiry(self, tmp_path: Path) -> None:
+        clock = FakeClock()
+        cache = SQLiteCache(tmp_path / "cache.db", ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        clock.now = 11
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert "a" not in cache
+        assert len(cache) == 1
+        assert cache.purge() == 1
+
+    def test_lru_eviction(self, tmp_path: Path) -> None:
+        clock = FakeClock()
+        cache = SQLiteCache(tmp_path / "cache.db", maxsize=2, touch_interval=0, clock=clock)
+        cache.set("a", 1)
+        clock.now = 1
+        cache.set("b", 2)
+        clock.now = 2
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+
+    def test_expired_entries_are_evicted_first(self, tmp_path: Path) -> None:
+        clock = FakeClock()
+        cache = SQLiteCache(tmp_path / "cache.db", maxsize=2, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=1)
+        clock.now = 5
+        cache.set("c", 3)
+        assert sorted(cache.items()) == [("a", 1), ("c", 3)]
+        assert cache.stats.evictions == 0
+
+    def test_namespaces(self, tmp_path: Path) -> None:
+        stops = SQLiteCache(tmp_path / "cache.db", namespace="stops")
+        tiles = SQLiteCache(tmp_path / "cache.db", namespace="tiles")
+        stops.set("postplatz", "33000037")
+        assert tiles.get("postplatz") is None
+        tiles.update({"a": 1, "b": 2})
+        tiles.clear()
+        assert len(tiles) == 0
+        assert stops.get("postplatz") == "33000037"
+
+    def test_disabled(self, tmp_path: Path) -> None:
+        cache = SQLiteCache(tmp_path / "cache.db", maxsize=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_unpicklable_value_is_skipped(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        cache = SQLiteCache(tmp_path / "cache.db")
+        with caplog.at_level(logging.WARNING, logger="dvb"):
+            cache.set("lock", threading.Lock())
+        assert cache.get("lock") is None
+        assert "Cannot cache 'lock'" in caplog.text
+
+    def test_shared_between_processes(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteCache(path)
+        process = multiprocessing.get_context("spawn").Process(target=_fill, args=(path,))
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+        assert cache.get("child") == "written by another process"
+
+    def test_shared_between_threads(self, tmp_path: Path) -> None:
+        cache = SQLiteCache(tmp_path / "cache.db")
+
+        def work(n: int) -> None:
+            for i in range(20):
+                cache.set(f"{n}:{i}", i)
+                assert cache.get(f"{n}:{i}") == i
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache) == 80
+        cache.close()
+        assert cache.get("0:0") == 0
+
+    def test_locked_database(self, tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+        clock = FakeClock()
+        cache = SQLiteCache(tmp_path / "cache.db", timeout=0.05, clock=clock)
+        cache.set("a", 1)
+        clock.now = 120  # due for an access time update
+        writer = sqlite3.connect(tmp_path / "cache.db", isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            with caplog.at_level(logging.WARNING, logger="dvb"):
+                assert cache.get("a") == 1  # the failed touch does not turn it into a miss
+                cache.set("b", 2)
+                cache.delete("a")
+                cache.clear()
+                assert cache.purge() == 0
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        assert "Deleting from cache" in caplog.text
+        assert cache.get("a") == 1
+        assert cache.stats.hits == 2
+
+    def test_failed_commit_is_rolled_back(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        cache = SQLiteCache(tmp_path / "cache.db")
+        conn = cache._connect()
+
+        class FailingCommit:
+            fail = True
+            in_transaction = property(lambda self: conn.in_transaction)
+
+            def execute(self, sql: str, *args: Any) -> sqlite3.Cursor:
+                if sql == "COMMIT" and self.fail:
+                    self.fail = False
+                    raise sqlite3.OperationalError("disk I/O error")
+                return conn.execute(sql, *args)
+
+            def executemany(self, sql: str, rows: Any) -> sqlite3.Cursor:
+                return conn.executemany(sql, rows)
+
+        failing = FailingCommit()
+        monkeypatch.setattr(cache, "_connect", lambda: failing)
+        cache.set("a", 1)  # logged and rolled back
+        assert not conn.in_transaction
+        cache.set("b", 2)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_negative_maxsize(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="maxsize"):
+            SQLiteCache(tmp_path / "cache.db", maxsize=-1)
+
+
+class TestStopCache:
+    def test_resolution_is_cached(self, mocked_responses: object, client: Client) -> None:
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        client.monitor("Helmholtzstraße")
+        client.monitor("  HELMHOLTZSTRASSE ")
+        calls = [c.request.url for c in mocked_responses.calls]  # type: ignore[attr-defined]
+        assert sum("pointfinder" in url for url in calls) == 1
+        assert sum(url.endswith("/dm") for url in calls) == 2
+
+    def test_warm_from_mapping(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        client.warm_stop_cache({"Helmholtzstraße": "33000742"})
+        client.monitor("helmholtzstraße")
+        body = json.loads(mocked_responses.calls[0].request.body)  # type: ignore[attr-defined]
+        assert body["stopid"] == "33000742"
+
+    def test_warm_from_file(self, mocked_responses: object, client: Client, tmp_path: Path) -> None:
+        path = tmp_path / "stops.json"
+        path.write_text(json.dumps({"Postplatz": "33000037"}))
+        mock_post(mocked_responses, "stt/lines", fixture="lines.json")  # type: ignore[arg-type]
+        client.warm_stop_cache(path)
+        client.lines("Postplatz")
+        body = json.loads(mocked_responses.calls[0].request.body)  # type: ignore[attr-defined]
+        assert body["stopid"] == "33000037"
+
+    def test_custom_cache(self, mocked_responses: object) -> None:
+        cache = TTLCache(maxsize=0)
+        client = Client(user_agent="test/1.0", stop_cache=cache)
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")  # type: ignore[arg-type]
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        client.monitor("Helmholtzstraße")
+        client.monitor("Helmholtzstraße")
+        assert client.stop_cache is cache
+        assert len(mocked_responses.calls) == 4  # type: ignore[attr-defined]
+
+
+class TestResponseCache:
+    def test_key_is_canonical(self) -> None:
+        a = ResponseCache.key("dm", {"stopid": "1", "limit": 10})
+        b = ResponseCache.key("dm", {"limit": 10, "stopid": "1"})
+        assert a == b
+        assert a != ResponseCache.key("dm", {"stopid": "2", "limit": 10})
+
+    def test_only_configured_endpoints(self) -> None:
+        cache = ResponseCache({"stt/lines": 60})
+        assert cache.caches("stt/lines")
+        assert not cache.caches("dm")
+
+    def test_fresh_stale_and_expired(self) -> None:
+        clock = FakeClock()
+        cache = ResponseCache({"rc": 10}, stale_ttl=5, clock=clock)
+        key = cache.key("rc", {})
+        assert cache.lookup("rc", key) == (None, False)
+        cache.store("rc", key, {"Changes": []})
+        assert cache.lookup("rc", key) == ({"Changes": []}, True)
+        clock.now = 12
+        assert cache.lookup("rc", key) == ({"Changes": []}, False)
+        clock.now = 16
+        assert cache.lookup("rc", key) == (None, False)
+        stats = cache.stats
+        assert (stats.hits, stats.stale_hits, stats.misses) == (1, 1, 2)
+
+    def test_claim_refresh_once(self) -> None:
+        cache = ResponseCache()
+        assert cache.claim_refresh("k")
+        assert not cache.claim_refresh("k")
+        cache.release_refresh("k")
+        assert cache.claim_refresh("k")
+
+
+class TestClientResponseCache:
+    def test_cached_endpoint_hits_network_once(self, mocked_responses: object) -> None:
+        client = Client(user_agent="test/1.0", response_cache=ResponseCache())
+        mock_post(mocked_responses, "stt/lines", fixture="lines.json")  # type: ignore[arg-type]
+        first = client.lines("33000742")
+        second = client.lines("33000742")
+        assert first == second
+        assert len(mocked_responses.calls) == 1  # type: ignore[attr-defined]
+        assert client.response_cache is not None
+        assert client.response_cache.stats.hits == 1
+
+    def test_uncached_endpoint(self, mocked_responses: object) -> None:
+        client = Client(user_agent="test/1.0", response_cache=ResponseCache())
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        client.monitor("33000742")
+        client.monitor("33000742")
+        assert len(mocked_responses.calls) == 2  # type: ignore[attr-defined]
+
+    def test_stale_while_revalidate(self, mocked_responses: object) -> None:
+        clock = FakeClock()
+        cache = ResponseCache({"rc": 10}, stale_ttl=60, clock=clock)
+        client = Client(user_agent="test/1.0", response_cache=cache)
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "rc", body={"Changes": [], "Status": {"Code": "Ok"}})  # type: ignore[arg-type]
+        fresh = client.route_changes()
+        clock.now = 20
+        stale = client.route_changes()
+        assert stale == fresh
+        for thread in threading.enumerate():
+            if thread.name == "dvb-refresh":
+                thread.join()
+        assert len(mocked_responses.calls) == 2  # type: ignore[attr-defined]
+        assert client.route_changes() == []
+        assert cache.stats.refreshes == 1
+
+    def test_persistent_backend(self, mocked_responses: object, tmp_path: Path) -> None:
+        mock_post(mocked_responses, "stt/lines", fixture="lines.json")  # type: ignore[arg-type]
+        path = tmp_path / "cache.db"
+        for _ in range(2):  # e.g. a restarted worker
+            cache = ResponseCache(backend=SQLiteCache(path, namespace="responses"))
+            client = Client(user_agent="test/1.0", response_cache=cache)
+            assert client.lines("33000742")
+        assert len(mocked_responses.calls) == 1  # type: ignore[attr-defined]
+        assert cache.stats.hits == 1
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, DepartureBatch
+from dvb.columnar import _STRING_COLUMNS, _TIME_COLUMNS, MISSING
+from dvb.dvb import _parse_departures
+from dvb.exceptions import APIError
+
+from .conftest import async_transport, load_fixture, mock_get, mock_post
+
+FETCHED = datetime(2017, 2, 22, 15, 40, tzinfo=timezone.utc)
+
+
+def _response() -> dict[str, Any]:
+    data: dict[str, Any] = load_fixture("departure_monitor.json")
+    return data
+
+
+class TestDepartureBatch:
+    def test_matches_departures(self) -> None:
+        data = _response()
+        batch = DepartureBatch.from_response(data, stop="33000742", fetched=FETCHED)
+        assert len(batch) == 2
+        assert list(batch) == _parse_departures(data)
+        assert batch[-1] == batch[1]
+
+    def test_columns(self) -> None:
+        batch = DepartureBatch.from_response(_response(), stop="33000742", fetched=FETCHED)
+        assert batch.column("scheduled")[0] == 1487778060000
+        assert batch.column("fetched")[0] == 1487778000000
+        assert batch.strings_of("stop") == ["33000742", "33000742"]
+        assert batch.strings_of("line")[0] == "3"
+
+    def test_missing_real_time_and_platform(self) -> None:
+        data = _response()
+        del data["Departures"][1]["Platform"]
+        batch = DepartureBatch.from_response(data)
+        assert batch.column("real_time")[1] == MISSING
+        assert batch.strings_of("platform")[1] is None
+        assert batch[1].real_time is None
+        assert batch[1].platform is None
+
+    def test_strings_are_interned(self) -> None:
+        archive = DepartureBatch()
+        for _ in range(3):
+            archive.extend(DepartureBatch.from_response(_response(), stop="33000742"))
+        assert len(archive) == 6
+        assert len(archive.strings) == len(set(archive.strings))
+        assert list(archive)[4:] == _parse_departures(_response())
+
+    def test_invalid_row_keeps_columns_aligned(self, tmp_path: Path) -> None:
+        data = _response()
+        data["Departures"][1]["ScheduledTime"] = "garbage"
+        batch = DepartureBatch()
+        with pytest.raises(APIError, match="ScheduledTime"):
+            batch.add(data)
+        del data["Departures"][1]["ScheduledTime"]
+        with pytest.raises(APIError, match="ScheduledTime"):
+            batch.add(data)
+        assert len(batch) == 2
+        assert {len(batch.column(name)) for name in (*_TIME_COLUMNS, *_STRING_COLUMNS)} == {2}
+        batch.save(tmp_path / "snapshot.deps")
+        with DepartureBatch.load(tmp_path / "snapshot.deps") as loaded:
+            assert list(loaded) == list(batch) == _parse_departures(_response())[:1] * 2
+
+    def test_save_and_load(self, tmp_path: Path) -> None:
+        batch = DepartureBatch()
+        batch.add(_response(), stop="Helmholtzstraße", fetched=FETCHED)
+        batch.add({"Departures": []}, stop="33000028")
+        path = tmp_path / "snapshot.deps"
+        batch.save(path)
+        with DepartureBatch.load(path) as loaded:
+            assert len(loaded) == 2
+            assert list(loaded) == list(batch)
+            assert "Helmholtzstraße" in loaded.strings
+            assert isinstance(loaded.column("scheduled"), memoryview)
+            with pytest.raises(TypeError, match="read-only"):
+                loaded.add(_response())
+        assert len(loaded) == 0
+
+    def test_save_empty(self, tmp_path: Path) -> None:
+        DepartureBatch().save(tmp_path / "empty.deps")
+        with DepartureBatch.load(tmp_path / "empty.deps") as loaded:
+            assert len(loaded) == 0
+            assert list(loaded) == []
+
+    def test_extend_from_loaded(self, tmp_path: Path) -> None:
+        DepartureBatch.from_response(_response(), fetched=FETCHED).save(tmp_path / "a.deps")
+        archive = DepartureBatch.from_response({"Departures": []})
+        with DepartureBatch.load(tmp_path / "a.deps") as loaded:
+            archive.extend(loaded)
+        assert list(archive) == _parse_departures(_response())
+
+    def test_to_numpy(self) -> None:
+        np = pytest.importorskip("numpy")
+        arrays = DepartureBatch.from_response(_response()).to_numpy()
+        delays = arrays["real_time"] - arrays["scheduled"]
+        assert delays[0] == np.timedelta64(170, "s")
+        assert np.isnat(delays[1])
+        assert arrays["line"].dtype == np.int32
+
+    def test_invalid_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "other.deps"
+        path.write_bytes(b"not a batch" * 10)
+        with pytest.raises(ValueError, match="not a version 1"):
+            DepartureBatch.load(path)
+        path.write_bytes(b"")
+        with pytest.raises(ValueError, match="not a departure batch"):
+            DepartureBatch.load(path)
+
+    def test_truncated_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "snapshot.deps"
+        DepartureBatch.from_response(_response()).save(path)
+        path.write_bytes(path.read_bytes()[:-3])
+        with pytest.raises(ValueError, match="truncated"):
+            DepartureBatch.load(path)
+
+
+class TestMonitorBatch:
+    def test_client(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")  # type: ignore[arg-type]
+        batch = client.monitor_batch("33000742", limit=5)
+        assert list(batch) == _parse_departures(_response())
+        assert batch.strings_of("stop") == ["33000742", "33000742"]
+
+    def test_stop_column_holds_resolved_id(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        batch = client.monitor_batch("Helmholtzstraße")
+        assert batch.strings_of("stop") == ["33000742", "33000742"]
+
+    def test_invalid_departure(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        data = _response()
+        del data["Departures"][0]["ScheduledTime"]
+        mock_post(mocked_responses, "dm", body=data)
+        with pytest.raises(APIError, match="ScheduledTime"):
+            client.monitor_batch("33000742")
+
+    def test_async_client(self) -> None:
+        transport = async_transport({"dm": _response()})
+
+        async def run() -> DepartureBatch:
+            async with AsyncClient(user_agent="test/1.0", transport=transport) as client:
+                return await client.monitor_batch("33000742")
+
+        assert list(asyncio.run(run())) == _parse_departures(_response())
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import warnings
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import httpx
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, RetryPolicy
+from dvb.exceptions import ConnectionError
+
+from .conftest import BASE_URL, FIXTURES
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive
+    wbufsize = -1  # send headers and body in one write
+    server: _Server
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        endpoint = self.path.lstrip("/")
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            self.server.requests += 1
+        time.sleep(self.server.delays.get(endpoint, 0.005))
+        body = self.server.bodies.get(endpoint, b"{}")
+        self.send_response(self.server.statuses.get(endpoint, 200))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.connections: set[tuple[str, int]] = set()
+        self.requests = 0
+        self.delays: dict[str, float] = {}
+        self.statuses: dict[str, int] = {}
+        self.bodies = {
+            "dm": (FIXTURES / "departure_monitor.json").read_bytes(),
+            "rc": (FIXTURES / "route_changes.json").read_bytes(),
+        }
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture()
+def server() -> Iterator[_Server]:
+    srv = _Server()
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+class TestConnectionPool:
+    def test_shared_across_threads_with_bounded_pool(self, server: _Server) -> None:
+        client = Client(user_agent="test/1.0", base_url=server.url, pool_maxsize=4, pool_block=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # "Connection pool is full" would fail the test
+            with client, ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(lambda i: client.monitor(str(i)), range(200)))
+
+        assert all(len(r) == 2 for r in results)  # type: ignore[arg-type]
+        assert server.requests == 200
+        assert len(server.connections) <= 4
+
+    def test_keep_alive_reuses_connection(self, server: _Server) -> None:
+        with Client(user_agent="test/1.0", base_url=server.url) as client:
+            for _ in range(5):
+                client.route_changes()
+        assert len(server.connections) == 1
+
+    def test_keep_alive_disabled(self, server: _Server) -> None:
+        with Client(user_agent="test/1.0", base_url=server.url, keep_alive=False) as client:
+            for _ in range(3):
+                client.route_changes()
+        assert len(server.connections) == 3
+
+    def test_failed_stream_releases_connection(
+        self, server: _Server, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr("dvb.dvb.sleep", lambda _: None)
+        server.statuses["dm/trip"] = 503
+        client = Client(
+            user_agent="test/1.0",
+            base_url=server.url,
+            pool_maxsize=1,
+            pool_block=True,
+            retry=RetryPolicy(max_attempts=2),
+        )
+        when = datetime(2017, 12, 6, 13, 24, 41, tzinfo=timezone.utc)
+        results: list[object] = []
+
+        def run() -> None:
+            with pytest.raises(ConnectionError):
+                client.stream_trip_details("71313709", when, "33000077")
+            results.append(client.route_changes())
+
+        # With a leaked connection, the retry and the next request wait for the pool forever.
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert results
+        assert server.requests == 3
+        client.close()
+
+    def test_concurrent_calls_share_caches_safely(self, server: _Server) -> None:
+        client = Client(user_agent="test/1.0", base_url=server.url)
+        client.warm_stop_cache({f"stop {i}": str(33000000 + i) for i in range(10)})
+        with client, ThreadPoolExecutor(max_workers=8) as executor:
+            names = [f"Stop {i % 10}" for i in range(100)]
+            results = list(executor.map(lambda n: client.monitor(n), names))
+        assert len(results) == 100
+        assert client.stop_cache.stats.hits == 100  # type: ignore[attr-defined]
+
+
+class TestTimeouts:
+    def test_endpoint_timeout_overrides_default(self, server: _Server) -> None:
+        server.delays["dm"] = 0.5
+        client = Client(user_agent="test/1.0", base_url=server.url, endpoint_timeouts={"dm": 0.1})
+        with client:
+            assert client.route_changes()
+            with pytest.raises(ConnectionError):
+                client.monitor("33000742")
+
+    def test_timeout_passed_to_requests(self, mocked_responses: responses.RequestsMock) -> None:
+        mocked_responses.add(
+            responses.POST,
+            f"{BASE_URL}/rc",
+            json=json.loads((FIXTURES / "route_changes.json").read_text()),
+        )
+        client = Client(user_agent="test/1.0", timeout=3, endpoint_timeouts={"dm": 1})
+        client.route_changes()
+        assert mocked_responses.calls[0].request.req_kwargs["timeout"] == 3
+
+    def test_async_endpoint_timeout(self) -> None:
+        seen: list[Any] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.extensions["timeout"])
+            return httpx.Response(200, content=(FIXTURES / "route_changes.json").read_bytes())
+
+        client = AsyncClient(
+            user_agent="test/1.0",
+            transport=httpx.MockTransport(handler),
+            timeout=20,
+            endpoint_timeouts={"rc": 2},
+        )
+
+        async def run() -> None:
+            async with client:
+                await client.route_changes()
+
+        asyncio.run(run())
+        assert seen[0]["read"] == 2
+
+
+class TestAsyncConnectionPool:
+    def test_keep_alive_reuses_connection(self, server: _Server) -> None:
+        async def run() -> None:
+            async with AsyncClient(user_agent="test/1.0", base_url=server.url) as client:
+                for _ in range(5):
+                    await client.route_changes()
+
+        asyncio.run(run())
+        assert len(server.connections) == 1
+
+    def test_http2_requires_h2(self) -> None:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            with pytest.raises(ImportError, match="h2"):
+                AsyncClient(user_agent="test/1.0", http2=True)
+        else:
+            AsyncClient(user_agent="test/1.0", http2=True)
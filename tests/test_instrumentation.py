@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, Histogram, RequestEvent, RequestStats, ResponseCache
+from dvb.exceptions import APIError
+
+from .conftest import async_transport, load_fixture, mock_get, mock_post
+
+
+def _event(endpoint: str = "dm", **kwargs: object) -> RequestEvent:
+    fields: dict[str, object] = {
+        "endpoint": endpoint,
+        "method": "POST",
+        "cache": "bypass",
+        "latency": 0.01,
+        "response_bytes": 1000,
+        "decode_time": 0.001,
+        "parse_time": 0.002,
+        "total_time": 0.015,
+    }
+    fields.update(kwargs)
+    return RequestEvent(**fields)  # type: ignore[arg-type]
+
+
+class TestRequestHooks:
+    def test_event_per_call(self, mocked_responses: responses.RequestsMock) -> None:
+        events: list[RequestEvent] = []
+        client = Client(user_agent="test/1.0", hooks=[events.append])
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        client.monitor("33000742")
+
+        assert len(events) == 1
+        event = events[0]
+        assert event.endpoint == "dm"
+        assert event.method == "POST"
+        assert event.cache == "bypass"
+        assert event.ok
+        assert event.response_bytes == len(mocked_responses.calls[0].response.content)
+        assert event.latency > 0
+        assert event.decode_time > 0
+        assert event.parse_time > 0
+        assert event.total_time >= event.latency + event.decode_time + event.parse_time
+
+    def test_name_resolution_reported_separately(
+        self, mocked_responses: responses.RequestsMock
+    ) -> None:
+        events: list[RequestEvent] = []
+        client = Client(user_agent="test/1.0", hooks=[events.append])
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        client.monitor("Helmholtzstraße")
+        assert [e.endpoint for e in events] == ["tr/pointfinder", "dm"]
+
+    def test_raw_has_no_parse_time(self, mocked_responses: responses.RequestsMock) -> None:
+        events: list[RequestEvent] = []
+        client = Client(user_agent="test/1.0", hooks=[events.append])
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")
+        client.route_changes(raw=True)
+        assert events[0].parse_time == 0
+
+    def test_error_reported(self, mocked_responses: responses.RequestsMock) -> None:
+        events: list[RequestEvent] = []
+        client = Client(user_agent="test/1.0", hooks=[events.append])
+        mock_post(mocked_responses, "rc", body={"Status": {"Code": "ServiceError"}})
+        with pytest.raises(APIError):
+            client.route_changes()
+        assert not events[0].ok
+        assert isinstance(events[0].error, APIError)
+
+    def test_cache_status(self, mocked_responses: responses.RequestsMock) -> None:
+        events: list[RequestEvent] = []
+        client = Client(
+            user_agent="test/1.0", response_cache=ResponseCache(), hooks=[events.append]
+        )
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")
+        client.route_changes()
+        client.route_changes()
+        assert [e.cache for e in events] == ["miss", "hit"]
+        assert events[1].latency == 0
+        assert events[1].response_bytes == 0
+
+    def test_failing_hook_is_logged(
+        self, mocked_responses: responses.RequestsMock, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        def broken(event: RequestEvent) -> None:
+            raise RuntimeError("boom")
+
+        client = Client(user_agent="test/1.0", hooks=[broken])
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")
+        with caplog.at_level(logging.ERROR, logger="dvb"):
+            assert len(client.route_changes()) == 2  # type: ignore[arg-type]
+        assert "Request hook" in caplog.text
+
+    def test_async_client(self) -> None:
+        events: list[RequestEvent] = []
+        client = AsyncClient(
+            user_agent="test/1.0",
+            transport=async_transport({"stt/lines": load_fixture("lines.json")}),
+            hooks=[events.append],
+        )
+
+        async def run() -> None:
+            async with client:
+                await client.lines("33000742")
+
+        asyncio.run(run())
+        assert [e.endpoint for e in events] == ["stt/lines"]
+        assert events[0].response_bytes > 0
+        assert events[0].parse_time > 0
+
+
+class TestHistogram:
+    def test_percentiles(self) -> None:
+        hist = Histogram()
+        for ms in range(1, 101):
+            hist.add(ms / 1000)
+        assert hist.count == 100
+        assert hist.mean == pytest.approx(0.0505)
+        assert hist.percentile(50) == pytest.approx(0.050, rel=0.06)
+        assert hist.percentile(99) == pytest.approx(0.099, rel=0.06)
+        assert hist.percentile(100) == pytest.approx(0.100, rel=0.06)
+        assert hist.percentile(0) == pytest.approx(0.001, rel=0.06)
+
+    def test_zeros_and_empty(self) -> None:
+        hist = Histogram()
+        assert hist.percentile(50) == 0.0
+        hist.add(0)
+        hist.add(0)
+        hist.add(5)
+        assert hist.percentile(50) == 0.0
+        assert hist.percentile(100) == pytest.approx(5, rel=0.06)
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError, match="growth"):
+            Histogram(growth=1)
+        with pytest.raises(ValueError, match="q must be"):
+            Histogram().percentile(101)
+
+
+class TestRequestStats:
+    def test_aggregates_per_endpoint(self) -> None:
+        stats = RequestStats()
+        for latency in (0.01, 0.02, 0.03):
+            stats(_event(latency=latency))
+        stats(_event(cache="hit", latency=0, response_bytes=0))
+        stats(_event("rc", error=APIError("x")))
+
+        summary = stats.summary(percentiles=(50, 95))
+        assert set(summary) == {"dm", "rc"}
+        dm = summary["dm"]
+        assert dm["count"] == 4
+        assert dm["errors"] == 0
+        assert dm["cache"] == {"bypass": 3, "hit": 1}
+        # cache hits do not count towards network latency
+        assert dm["latency"]["p50"] == pytest.approx(0.02, rel=0.06)
+        assert dm["latency"]["p95"] == pytest.approx(0.03, rel=0.06)
+        assert dm["response_bytes"]["mean"] == 1000
+        assert summary["rc"]["errors"] == 1
+
+    def test_snapshot_is_independent(self) -> None:
+        stats = RequestStats()
+        stats(_event())
+        snapshot = stats.snapshot()
+        stats(_event())
+        assert snapshot["dm"].count == 1
+        stats.reset()
+        assert stats.summary() == {}
+
+    def test_as_client_hook(self, mocked_responses: responses.RequestsMock) -> None:
+        stats = RequestStats()
+        client = Client(user_agent="test/1.0", hooks=[stats])
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")
+        client.route_changes()
+        client.route_changes()
+        assert stats.summary()["rc"]["count"] == 2
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+import responses
+
+from dvb import Client
+from dvb._utils import available_json_backends, default_json_loads, load_json_backend
+from dvb.exceptions import APIError
+
+from .conftest import BASE_URL, mock_get
+
+
+class TestJSONBackends:
+    def test_stdlib_always_available(self) -> None:
+        assert available_json_backends()["json"] is json.loads
+        assert load_json_backend("json") is json.loads
+
+    def test_default_prefers_installed_fast_backend(self) -> None:
+        backends = available_json_backends()
+        fast = [name for name in ("orjson", "ujson") if name in backends]
+        expected = backends[fast[0]] if fast else json.loads
+        assert default_json_loads() is expected
+
+    def test_unknown_backend(self) -> None:
+        with pytest.raises(ImportError):
+            load_json_backend("definitely_not_a_json_module")
+
+    def test_every_backend_decodes_fixture(self) -> None:
+        raw = b'{"Status": {"Code": "Ok"}, "Name": "Helmholtzstra\\u00dfe"}'
+        for loads in available_json_backends().values():
+            assert loads(raw) == {"Status": {"Code": "Ok"}, "Name": "Helmholtzstraße"}
+
+
+class TestClientJSONLoads:
+    def test_custom_decoder_is_used(self, mocked_responses: object) -> None:
+        calls: list[bytes] = []
+
+        def loads(raw: bytes) -> Any:
+            calls.append(raw)
+            return json.loads(raw)
+
+        client = Client(user_agent="test/1.0", json_loads=loads)
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")  # type: ignore[arg-type]
+        results = client.find("Helmholtz")
+        assert isinstance(results, list)
+        assert len(results) == 3
+        assert len(calls) == 1
+
+    def test_backend_by_name(self, mocked_responses: object) -> None:
+        client = Client(user_agent="test/1.0", json_loads="json")
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")  # type: ignore[arg-type]
+        results = client.find("Helmholtz")
+        assert isinstance(results, list)
+        assert len(results) == 3
+
+    def test_invalid_json_raises_api_error(self, mocked_responses: object, client: Client) -> None:
+        mocked_responses.add(  # type: ignore[attr-defined]
+            responses.GET, f"{BASE_URL}/tr/pointfinder", body="<html>oops</html>"
+        )
+        with pytest.raises(APIError, match="Invalid JSON"):
+            client.find("test")
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+import responses
+
+from dvb import Client, ODMatrix, TokenBucketLimiter, plan_matrix
+
+from .conftest import BASE_URL, load_fixture
+from .test_cache import FakeClock
+
+TIME = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+STOPS = ["33000001", "33000002", "33000003"]
+
+
+class _Trips:
+    """Answers tr/trips with a route whose duration encodes origin and destination."""
+
+    def __init__(self, failing: set[tuple[str, str]] = frozenset()) -> None:  # type: ignore[assignment]
+        self.failing = failing
+        self.pairs: list[tuple[str, str]] = []
+
+    def __call__(self, request: Any) -> tuple[int, dict[str, str], str]:
+        payload = json.loads(request.body)
+        pair = (payload["origin"], payload["destination"])
+        self.pairs.append(pair)
+        if pair in self.failing:
+            return 503, {}, ""
+        body = load_fixture("trips.json")
+        fast = {**body["Routes"][0], "Duration": int(pair[0][-1]) * 10 + int(pair[1][-1])}
+        slow = {**fast, "Duration": 99, "Interchanges": 3}
+        return 200, {}, json.dumps({**body, "Routes": [slow, fast]})
+
+
+@pytest.fixture()
+def trips(mocked_responses: responses.RequestsMock) -> _Trips:
+    handler = _Trips()
+    mocked_responses.add_callback(responses.POST, f"{BASE_URL}/tr/trips", handler)
+    return handler
+
+
+class TestPlanMatrix:
+    def test_full_matrix(self, trips: _Trips, client: Client) -> None:
+        matrix = plan_matrix(client, STOPS, time=TIME, max_workers=3)
+        assert len(trips.pairs) == 6
+        assert matrix.duration("33000001", "33000003") == 13
+        assert matrix.duration("33000003", "33000001") == 31
+        assert matrix.duration("33000002", "33000002") == 0
+        assert matrix.interchange_count("33000001", "33000002") == 0
+        assert matrix.route("33000001", "33000002") is None
+        assert list(matrix.durations) == [0, 12, 13, 21, 0, 23, 31, 32, 0]
+
+    def test_keep_routes_and_numpy(self, trips: _Trips, client: Client) -> None:
+        matrix = plan_matrix(client, STOPS[:2], time=TIME, keep_routes=True)
+        route = matrix.route("33000002", "33000001")
+        assert route is not None
+        assert route.duration == 21
+        durations, interchanges = matrix.to_numpy()
+        assert durations.shape == (2, 2)
+        assert durations[1, 0] == 21
+
+    def test_names_are_resolved_once(
+        self, mocked_responses: responses.RequestsMock, trips: _Trips, client: Client
+    ) -> None:
+        mocked_responses.add(
+            responses.GET, f"{BASE_URL}/tr/pointfinder", json=load_fixture("pointfinder.json")
+        )
+        matrix = plan_matrix(client, ["Helmholtzstraße", "33000002"], time=TIME)
+        lookups = [c for c in mocked_responses.calls if "pointfinder" in c.request.url]
+        assert len(lookups) == 1
+        assert matrix.stops == ["33000742", "33000002"]
+        assert matrix.duration("Helmholtzstraße", "33000002") == 22
+
+    def test_failed_pairs(self, mocked_responses: responses.RequestsMock, client: Client) -> None:
+        handler = _Trips(failing={("33000001", "33000002")})
+        mocked_responses.add_callback(responses.POST, f"{BASE_URL}/tr/trips", handler)
+        matrix = plan_matrix(client, STOPS, time=TIME)
+        assert matrix.duration("33000001", "33000002") is None
+        assert list(matrix.errors) == [(0, 1)]
+        assert matrix.duration("33000002", "33000001") == 21
+
+    def test_rate_limiter(
+        self, trips: _Trips, client: Client, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        sleeps: list[float] = []
+        monkeypatch.setattr("dvb.matrix.sleep", sleeps.append)
+        limiter = TokenBucketLimiter(rate=10, burst=1, clock=FakeClock())
+        plan_matrix(client, STOPS, time=TIME, rate_limiter=limiter, max_workers=1)
+        assert limiter.stats()["tr/trips"].requests == 6
+        assert len(sleeps) == 5
+
+
+class TestCheckpoint:
+    def test_resume_after_failures(
+        self, mocked_responses: responses.RequestsMock, client: Client, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "matrix.jsonl"
+        handler = _Trips(failing={("33000001", "33000002"), ("33000003", "33000002")})
+        mocked_responses.add_callback(responses.POST, f"{BASE_URL}/tr/trips", handler)
+        first = plan_matrix(client, STOPS, time=TIME, checkpoint=path)
+        assert len(first.errors) == 2
+
+        handler.failing = set()
+        handler.pairs.clear()
+        second = plan_matrix(client, STOPS, checkpoint=path)
+        assert sorted(handler.pairs) == [("33000001", "33000002"), ("33000003", "33000002")]
+        assert second.time == TIME
+        assert second.errors == {}
+        assert list(second.durations) == [0, 12, 13, 21, 0, 23, 31, 32, 0]
+
+    def test_resume_after_interruption(self, trips: _Trips, client: Client, tmp_path: Path) -> None:
+        path = tmp_path / "matrix.jsonl"
+        header = {
+            "version": 1,
+            "names": STOPS,
+            "stops": STOPS,
+            "time": TIME.isoformat(),
+            "arrival": False,
+        }
+        lines = [
+            json.dumps(header),
+            json.dumps({"o": 0, "d": 1, "duration": 12, "interchanges": 0}),
+            '{"o": 0, "d": 2, "dura',  # torn write
+        ]
+        path.write_text("\n".join(lines))
+        matrix = plan_matrix(client, STOPS, checkpoint=path)
+        assert len(trips.pairs) == 5
+        assert list(matrix.durations) == [0, 12, 13, 21, 0, 23, 31, 32, 0]
+
+        trips.pairs.clear()
+        plan_matrix(client, STOPS, checkpoint=path)
+        assert trips.pairs == []  # everything is in the checkpoint now
+
+    def test_mismatched_checkpoint(self, trips: _Trips, client: Client, tmp_path: Path) -> None:
+        path = tmp_path / "matrix.jsonl"
+        plan_matrix(client, STOPS[:2], time=TIME, checkpoint=path)
+        with pytest.raises(ValueError):
+            plan_matrix(client, STOPS, checkpoint=path)
+        with pytest.raises(ValueError):
+            plan_matrix(client, STOPS[:2], time=datetime.now(tz=timezone.utc), checkpoint=path)
+
+
+def test_matrix_index() -> None:
+    from array import array
+
+    matrix = ODMatrix(["A", "B"], ["1", "2"], TIME, array("i", [0, 5, 7, 0]), array("i", [0] * 4))
+    assert matrix.index("B") == matrix.index("2") == 1
+    assert matrix.duration("2", "A") == 7
@@ -9,6 +9,7 @@ from dvb.models import (
     PartialRoute,
     Pin,
     Platform,
+    Polyline,
     RegularStop,
     Route,
     RouteChange,
@@ -110,6 +111,70 @@ class TestPartialRoute:
         assert pr.path is None
 
 
+class TestPolyline:
+    def test_from_coords(self) -> None:
+        coords = [Coords(lat=51.0, lng=13.7), Coords(lat=51.1, lng=13.8)]
+        path = Polyline(coords)
+        assert len(path) == 2
+        assert path[0] == coords[0]
+        assert path[-1] == coords[1]
+        assert list(path) == coords
+        assert path == coords
+
+    def test_from_arrays(self) -> None:
+        path = Polyline.from_arrays([51.0, 51.1], [13.7, 13.8])
+        assert path == Polyline([Coords(lat=51.0, lng=13.7), Coords(lat=51.1, lng=13.8)])
+        assert list(path.lats) == [51.0, 51.1]
+        assert list(path.lngs) == [13.7, 13.8]
+
+    def test_mismatched_arrays(self) -> None:
+        with pytest.raises(ValueError, match="same length"):
+            Polyline.from_arrays([51.0], [])
+
+    def test_index_out_of_range(self) -> None:
+        with pytest.raises(IndexError):
+            Polyline()[0]
+
+    def test_slicing(self) -> None:
+        path = Polyline.from_arrays([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])
+        assert path[1:] == [Coords(lat=2.0, lng=5.0), Coords(lat=3.0, lng=6.0)]
+        assert isinstance(path[1:], Polyline)
+        assert path[::2] == [Coords(lat=1.0, lng=4.0), Coords(lat=3.0, lng=6.0)]
+
+    def test_buffer_is_read_only(self) -> None:
+        path = Polyline.from_arrays([1.0, 2.0], [3.0, 4.0])
+        view = path.buffer
+        assert view.readonly
+        assert view.tolist() == [1.0, 3.0, 2.0, 4.0]
+
+    def test_to_numpy_zero_copy(self) -> None:
+        np = pytest.importorskip("numpy")
+        path = Polyline.from_arrays([1.0, 2.0], [3.0, 4.0])
+        arr = path.to_numpy()
+        assert arr.shape == (2, 2)
+        assert arr.tolist() == [[1.0, 3.0], [2.0, 4.0]]
+        assert np.shares_memory(arr, np.frombuffer(path.buffer))
+
+    def test_lazy(self) -> None:
+        calls: list[int] = []
+
+        def loader() -> tuple[list[float], list[float]]:
+            calls.append(1)
+            return [1.0, 2.0], [3.0, 4.0]
+
+        path = Polyline.lazy(loader)
+        assert not path.is_loaded
+        assert calls == []
+        assert len(path) == 2
+        assert path[1] == Coords(lat=2.0, lng=4.0)
+        assert path.is_loaded
+        assert calls == [1]
+
+    def test_unhashable(self) -> None:
+        with pytest.raises(TypeError):
+            hash(Polyline())
+
+
 class TestRoute:
     def test_construction(self) -> None:
         r = Route(
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import json
+
+import responses
+from requests import PreparedRequest
+
 from dvb import Client
+from dvb.exceptions import APIError
 from dvb.models import Departure
 
-from .conftest import mock_get, mock_post
+from .conftest import BASE_URL, load_fixture, mock_get, mock_post
 
 
 class TestMonitor:
@@ -67,3 +73,58 @@ class TestMonitor:
         results = client.monitor("33000742")
         assert isinstance(results, list)
         assert len(results) == 0
+
+
+class TestMonitorMany:
+    def test_fetches_each_stop(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        for _ in range(3):
+            mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        results = client.monitor_many(["33000742", "33000028", "33000016"], max_workers=3)
+        assert list(results) == ["33000742", "33000028", "33000016"]
+        for departures in results.values():
+            assert isinstance(departures, list)
+            assert len(departures) == 2
+
+    def test_deduplicates_stops(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        results = client.monitor_many(["33000742", "33000742", "33000742"])
+        assert list(results) == ["33000742"]
+        assert len(mocked_responses.calls) == 1
+
+    def test_per_stop_errors(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        def callback(request: PreparedRequest) -> tuple[int, dict[str, str], str]:
+            payload = json.loads(request.body or b"{}")
+            if payload["stopid"] == "1":
+                return 200, {}, json.dumps({"Status": {"Code": "ServiceError"}})
+            return 200, {}, json.dumps(load_fixture("departure_monitor.json"))
+
+        mocked_responses.add_callback(responses.POST, f"{BASE_URL}/dm", callback=callback)
+        results = client.monitor_many(["1", "2"])
+        assert isinstance(results["1"], APIError)
+        assert isinstance(results["2"], list)
+
+    def test_malformed_stop_does_not_fail_batch(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        bad = load_fixture("departure_monitor.json")
+        bad["Departures"][0]["ScheduledTime"] = "garbage"
+
+        def callback(request: PreparedRequest) -> tuple[int, dict[str, str], str]:
+            payload = json.loads(request.body or b"{}")
+            body = bad if payload["stopid"] == "1" else load_fixture("departure_monitor.json")
+            return 200, {}, json.dumps(body)
+
+        mocked_responses.add_callback(responses.POST, f"{BASE_URL}/dm", callback=callback)
+        results = client.monitor_many(["1", "2"])
+        assert isinstance(results["1"], APIError)
+        assert "ScheduledTime" in str(results["1"])
+        assert isinstance(results["2"], list)
+
+    def test_empty(self, client: Client) -> None:
+        assert client.monitor_many([]) == {}
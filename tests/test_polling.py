@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from dvb import (
+    AsyncDeparturePoller,
+    DepartureEvent,
+    DeparturePoller,
+    PollSchedule,
+    diff_departures,
+)
+from dvb.exceptions import ConnectionError, DVBError
+from dvb.models import Departure, Platform
+
+from .conftest import mock_post
+from .test_cache import FakeClock
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def dep(dep_id: str, minutes: float, **kwargs: Any) -> Departure:
+    return Departure(
+        id=dep_id,
+        line="3",
+        direction="Wilder Mann",
+        scheduled=NOW + timedelta(minutes=minutes),
+        **kwargs,
+    )
+
+
+def kinds(events: list[DepartureEvent]) -> list[tuple[str, str]]:
+    return [(e.kind, e.departure.id) for e in events]
+
+
+class FakeClient:
+    def __init__(self, boards: list[dict[str, list[Departure] | DVBError]]) -> None:
+        self.boards = boards
+        self.polled: list[list[str]] = []
+
+    def monitor_many(
+        self, stops: list[str], **kwargs: Any
+    ) -> dict[str, list[Departure] | DVBError]:
+        self.polled.append(list(stops))
+        board = self.boards.pop(0)
+        return {stop: board[stop] for stop in stops}
+
+
+class TestDiffDepartures:
+    def test_changes(self) -> None:
+        a, b, c = dep("a", 1), dep("b", 5), dep("c", 9)
+        previous = {d.id: d for d in (a, b, c)}
+        current = [
+            dep("a", 1, real_time=NOW + timedelta(minutes=3)),
+            dep("b", 5, state="Cancelled", platform=Platform(name="2", type="Platform")),
+            dep("d", 12),
+        ]
+        assert kinds(diff_departures("s", previous, current)) == [
+            ("shifted", "a"),
+            ("state", "b"),
+            ("platform", "b"),
+            ("new", "d"),
+            ("gone", "c"),
+        ]
+
+    def test_unchanged(self) -> None:
+        a = dep("a", 1)
+        assert diff_departures("s", {"a": a}, [dep("a", 1)]) == []
+
+    def test_event_holds_previous(self) -> None:
+        old = dep("a", 1, state="InTime")
+        new = dep("a", 1, state="Delayed")
+        (event,) = diff_departures("s", {"a": old}, [new])
+        assert (event.departure, event.previous, event.stop) == (new, old, "s")
+
+
+class TestPollSchedule:
+    def test_intervals(self) -> None:
+        schedule = PollSchedule(min_interval=15, max_interval=300, imminent=120, factor=0.25)
+        assert schedule.interval([dep("a", 1)], NOW) == 15
+        assert schedule.interval([dep("a", 20), dep("b", 8)], NOW) == 120
+        assert schedule.interval([dep("a", 180)], NOW) == 300
+        assert schedule.interval([], NOW) == 300
+
+    def test_real_time_counts(self) -> None:
+        late = dep("a", 1, real_time=NOW + timedelta(minutes=10))
+        assert PollSchedule().interval([late], NOW) == 150
+
+    def test_backoff(self) -> None:
+        schedule = PollSchedule(min_interval=10, max_interval=100)
+        assert schedule.backoff(0) == 10
+        assert schedule.backoff(40) == 80
+        assert schedule.backoff(80) == 100
+
+
+class TestDeparturePoller:
+    def test_polls_due_stops_and_emits_changes(self) -> None:
+        clock = FakeClock()
+        clock.now = NOW.timestamp()
+        client = FakeClient(
+            [
+                {"a": [dep("1", 1)], "b": [dep("2", 60)]},
+                {"a": [dep("1", 1, state="Delayed")]},
+            ]
+        )
+        poller = DeparturePoller(client, ["a", "b"], clock=clock)  # type: ignore[arg-type]
+        assert kinds(poller.poll()) == [("new", "1"), ("new", "2")]
+        assert poller.poll() == []  # nothing due yet
+        clock.now += 15
+        assert kinds(poller.poll()) == [("state", "1")]
+        assert client.polled == [["a", "b"], ["a"]]
+        assert poller.next_poll == NOW.timestamp() + 30  # "b" is due in 15 minutes
+        assert poller.snapshot("a")[0].state == "Delayed"
+
+    def test_failed_poll_keeps_snapshot(self) -> None:
+        clock = FakeClock()
+        clock.now = NOW.timestamp()
+        client = FakeClient(
+            [
+                {"a": [dep("1", 1)]},
+                {"a": ConnectionError("down")},
+                {"a": []},
+            ]
+        )
+        poller = DeparturePoller(client, ["a"], clock=clock)  # type: ignore[arg-type]
+        poller.poll()
+        clock.now += 15
+        assert poller.poll() == []
+        assert isinstance(poller.errors["a"], ConnectionError)
+        assert poller.snapshot("a") == [dep("1", 1)]
+        clock.now += 30  # the failed stop backs off
+        assert kinds(poller.poll()) == [("gone", "1")]
+        assert poller.errors == {}
+
+    def test_add_and_remove(self) -> None:
+        client = FakeClient([{"a": [], "b": []}])
+        poller = DeparturePoller(client, ["a"])  # type: ignore[arg-type]
+        poller.add("b")
+        assert poller.stops == ["a", "b"]
+        poller.poll()
+        poller.remove("a")
+        assert poller.stops == ["b"]
+        assert poller.snapshot("a") == []
+
+    def test_events_until_closed(self) -> None:
+        client = FakeClient([{"a": [dep("1", 1), dep("2", 2)]}])
+        poller = DeparturePoller(client, ["a"])  # type: ignore[arg-type]
+        seen = []
+        for event in poller.events():
+            seen.append(event.departure.id)
+            poller.close()
+        assert seen == ["1", "2"]
+
+    def test_with_client(self, mocked_responses: Any) -> None:
+        from dvb import Client
+
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        poller = DeparturePoller(Client(user_agent="test/1.0"), ["33000742"])
+        events = poller.poll()
+        assert events
+        assert {e.kind for e in events} == {"new"}
+
+
+class TestAsyncDeparturePoller:
+    def test_poll(self) -> None:
+        class AsyncFakeClient(FakeClient):
+            async def monitor_many(  # type: ignore[override]
+                self, stops: list[str], **kwargs: Any
+            ) -> dict[str, list[Departure] | DVBError]:
+                return FakeClient.monitor_many(self, stops)
+
+        client = AsyncFakeClient([{"a": [dep("1", 1)]}, {"a": []}])
+        clock = FakeClock()
+
+        async def run() -> list[DepartureEvent]:
+            poller = AsyncDeparturePoller(client, ["a"], clock=clock)  # type: ignore[arg-type]
+            events = [event async for event in _take(poller.events(), 1)]
+            clock.now += 300
+            return events + await poller.poll()
+
+        assert kinds(asyncio.run(run())) == [("new", "1"), ("gone", "1")]
+
+
+async def _take(events: Any, n: int) -> Any:
+    async for event in events:
+        yield event
+        n -= 1
+        if not n:
+            return
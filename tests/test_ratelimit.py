@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, FileTokenBucketLimiter, RequestEvent, TokenBucketLimiter
+
+from .conftest import async_transport, load_fixture, mock_post
+from .test_cache import FakeClock
+
+USER_AGENT = "dvb-test-suite/1.0 (test@test)"
+
+
+class TestTokenBucketLimiter:
+    def test_burst_then_rate(self) -> None:
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=2, burst=3, clock=clock)
+        assert [limiter.reserve("dm") for _ in range(3)] == [0, 0, 0]
+        assert limiter.reserve("dm") == 0.5
+        assert limiter.reserve("dm") == 1.0  # queued behind the previous request
+
+    def test_refills_over_time(self) -> None:
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=1, burst=1, clock=clock)
+        assert limiter.reserve("dm") == 0
+        clock.now = 1
+        assert limiter.reserve("dm") == 0
+        clock.now = 100
+        assert limiter.reserve("dm") == 0
+        assert limiter.reserve("dm") == 1.0  # refilling stops at the burst size
+
+    def test_per_endpoint_buckets(self) -> None:
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=1, burst=1, endpoint_rates={"rc": 4}, clock=clock)
+        assert limiter.reserve("dm") == 0
+        assert limiter.reserve("rc") == 0
+        assert limiter.reserve("dm") == 1.0
+        assert limiter.reserve("rc") == 0.25
+
+    def test_stats(self) -> None:
+        limiter = TokenBucketLimiter(rate=2, burst=1, clock=FakeClock())
+        for _ in range(3):
+            limiter.reserve("dm")
+        stats = limiter.stats()["dm"]
+        assert (stats.requests, stats.delayed, stats.total_wait, stats.max_wait) == (3, 2, 1.5, 1.0)
+        assert stats.mean_wait == 0.5
+        limiter.reset_stats()
+        assert limiter.stats() == {}
+
+    def test_threads_share_budget(self) -> None:
+        limiter = TokenBucketLimiter(rate=10, burst=5, clock=FakeClock())
+        waits: list[float] = []
+        lock = threading.Lock()
+
+        def worker() -> None:
+            for _ in range(5):
+                wait = limiter.reserve("dm")
+                with lock:
+                    waits.append(wait)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(waits) == pytest.approx([0] * 5 + [n / 10 for n in range(1, 16)])
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(rate=0)
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(burst=0.5)
+
+
+class TestFileTokenBucketLimiter:
+    def test_instances_share_state(self, tmp_path: Path) -> None:
+        clock = FakeClock()
+        path = tmp_path / "buckets.json"
+        a = FileTokenBucketLimiter(path, rate=1, burst=2, clock=clock)
+        b = FileTokenBucketLimiter(path, rate=1, burst=2, clock=clock)
+        assert a.reserve("dm") == 0
+        assert b.reserve("dm") == 0
+        assert a.reserve("dm") == 1.0
+        assert b.reserve("dm") == 2.0
+        assert b.reserve("rc") == 0
+        assert a.stats()["dm"].requests == 2
+
+    def test_corrupt_file_resets(self, tmp_path: Path) -> None:
+        path = tmp_path / "buckets.json"
+        path.write_text("not json")
+        limiter = FileTokenBucketLimiter(path, rate=1, burst=1, clock=FakeClock())
+        assert limiter.reserve("dm") == 0
+        assert limiter.reserve("dm") == 1.0
+
+
+class TestClientRateLimit:
+    def test_requests_wait_for_tokens(
+        self, mocked_responses: responses.RequestsMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        sleeps: list[float] = []
+        monkeypatch.setattr("dvb.dvb.sleep", sleeps.append)
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        events: list[RequestEvent] = []
+        limiter = TokenBucketLimiter(rate=4, burst=1, clock=FakeClock())
+        client = Client(user_agent=USER_AGENT, rate_limiter=limiter, hooks=[events.append])
+        client.monitor("33000742")
+        client.monitor("33000742")
+        assert sleeps == [0.25]
+        assert [e.rate_limit_wait for e in events] == [0, 0.25]
+        assert limiter.stats()["dm"].delayed == 1
+
+    def test_async_file_lock_does_not_block_loop(self, tmp_path: Path) -> None:
+        fcntl = pytest.importorskip("fcntl")
+        path = tmp_path / "buckets.json"
+        limiter = FileTokenBucketLimiter(path, rate=100, burst=10)
+        transport = async_transport({"dm": load_fixture("departure_monitor.json")})
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def run() -> int:
+            ticker = asyncio.create_task(tick())
+            async with AsyncClient(
+                user_agent=USER_AGENT, transport=transport, rate_limiter=limiter
+            ) as client:
+                await client.monitor("33000742")
+            ticker.cancel()
+            return ticks
+
+        with open(path, "a+b") as held:
+            fcntl.flock(held, fcntl.LOCK_EX)  # as if another process were reserving
+            timer = threading.Timer(0.3, fcntl.flock, (held, fcntl.LOCK_UN))
+            timer.start()
+            assert asyncio.run(run()) >= 10
+            timer.join()
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import pytest
+import requests
+import responses
+
+from dvb import (
+    AsyncClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    Client,
+    RequestEvent,
+    ResponseCache,
+    RetryPolicy,
+)
+from dvb.exceptions import ConnectionError
+from dvb.retry import parse_retry_after
+
+from .conftest import BASE_URL, load_fixture, mock_post
+from .test_cache import FakeClock
+
+USER_AGENT = "dvb-test-suite/1.0 (test@test)"
+
+
+@pytest.fixture()
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    delays: list[float] = []
+    monkeypatch.setattr("dvb.dvb.sleep", delays.append)
+    return delays
+
+
+class TestRetryPolicy:
+    def test_exponential_backoff(self) -> None:
+        policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+        error = ConnectionError("boom")
+        assert [policy.delay(n, error) for n in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+    def test_full_jitter(self) -> None:
+        policy = RetryPolicy(backoff=1)
+        assert policy.delay(3, ConnectionError("boom"), rand=lambda: 0.25) == 1.0
+
+    def test_retry_after_takes_precedence(self) -> None:
+        policy = RetryPolicy()
+        assert policy.delay(1, ConnectionError("busy", status=503, retry_after=7)) == 7
+
+    def test_should_retry(self) -> None:
+        policy = RetryPolicy(max_attempts=3)
+        error = ConnectionError("boom", status=503)
+        assert policy.should_retry(error, "POST", "dm", 1)
+        assert policy.should_retry(error, "POST", "dm", 2)
+        assert not policy.should_retry(error, "POST", "dm", 3)
+
+    def test_client_errors_are_not_retried(self) -> None:
+        assert not RetryPolicy().should_retry(ConnectionError("nope", status=404), "GET", "rc", 1)
+
+    def test_idempotency(self) -> None:
+        policy = RetryPolicy()
+        sent = ConnectionError("reset")
+        unsent = ConnectionError("refused", sent=False)
+        assert policy.should_retry(sent, "GET", "unknown", 1)
+        assert policy.should_retry(sent, "POST", "tr/trips", 1)
+        assert not policy.should_retry(sent, "POST", "unknown", 1)
+        assert policy.should_retry(unsent, "POST", "unknown", 1)
+
+    def test_long_retry_after_gives_up(self) -> None:
+        policy = RetryPolicy(max_retry_after=10)
+        error = ConnectionError("busy", status=429, retry_after=120)
+        assert not policy.should_retry(error, "POST", "dm", 1)
+
+
+class TestParseRetryAfter:
+    def test_seconds(self) -> None:
+        assert parse_retry_after("5") == 5.0
+
+    def test_http_date(self) -> None:
+        now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        assert parse_retry_after("Mon, 01 Jan 2024 12:00:30 GMT", now=now) == 30.0
+        assert parse_retry_after("Mon, 01 Jan 2024 11:00:00 GMT", now=now) == 0.0
+
+    def test_invalid(self) -> None:
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure("dm")
+        assert breaker.allow("dm")
+        breaker.record_failure("dm")
+        assert breaker.state("dm") == "open"
+        assert not breaker.allow("dm")
+        assert breaker.allow("rc")
+
+    def test_success_resets_count(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure("dm")
+        breaker.record_success("dm")
+        breaker.record_failure("dm")
+        assert breaker.state("dm") == "closed"
+
+    def test_half_open_allows_one_trial(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30, clock=clock)
+        breaker.record_failure("dm")
+        clock.now = 30
+        assert breaker.state("dm") == "half_open"
+        assert breaker.allow("dm")
+        assert not breaker.allow("dm")
+        breaker.record_success("dm")
+        assert breaker.state("dm") == "closed"
+
+    def test_failed_trial_reopens(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, recovery_time=30, clock=clock)
+        for _ in range(3):
+            breaker.record_failure("dm")
+        clock.now = 30
+        assert breaker.allow("dm")
+        breaker.record_failure("dm")
+        assert breaker.state("dm") == "open"
+        clock.now = 59
+        assert not breaker.allow("dm")
+
+    def test_release_keeps_state(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30, clock=clock)
+        breaker.record_failure("dm")
+        clock.now = 30
+        assert breaker.allow("dm")
+        breaker.release("dm")
+        assert breaker.state("dm") == "half_open"
+        assert breaker.allow("dm")
+
+    def test_invalid_threshold(self) -> None:
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+
+
+class TestClientRetry:
+    def test_retries_server_errors(
+        self, mocked_responses: responses.RequestsMock, sleeps: list[float]
+    ) -> None:
+        mocked_responses.add(
+            responses.POST, f"{BASE_URL}/dm", status=503, headers={"Retry-After": "2"}
+        )
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        events: list[RequestEvent] = []
+        client = Client(user_agent=USER_AGENT, retry=RetryPolicy(), hooks=[events.append])
+        assert client.monitor("33000742")
+        assert len(mocked_responses.calls) == 2
+        assert sleeps == [2.0]
+        assert events[0].retries == 1
+
+    def test_gives_up_after_max_attempts(
+        self, mocked_responses: responses.RequestsMock, sleeps: list[float]
+    ) -> None:
+        mock_post(mocked_responses, "dm", status=502)
+        client = Client(user_agent=USER_AGENT, retry=RetryPolicy(max_attempts=3, jitter=False))
+        with pytest.raises(ConnectionError) as excinfo:
+            client.monitor("33000742")
+        assert excinfo.value.status == 502
+        assert len(mocked_responses.calls) == 3
+        assert sleeps == [0.5, 1.0]
+
+    def test_retries_network_errors(
+        self, mocked_responses: responses.RequestsMock, sleeps: list[float]
+    ) -> None:
+        mocked_responses.add(
+            responses.POST, f"{BASE_URL}/dm", body=requests.ConnectionError("reset")
+        )
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        client = Client(user_agent=USER_AGENT, retry=RetryPolicy())
+        assert client.monitor("33000742")
+        assert len(mocked_responses.calls) == 2
+
+    def test_client_errors_fail_immediately(
+        self, mocked_responses: responses.RequestsMock, sleeps: list[float]
+    ) -> None:
+        mock_post(mocked_responses, "dm", status=400)
+        client = Client(user_agent=USER_AGENT, retry=RetryPolicy())
+        with pytest.raises(ConnectionError):
+            client.monitor("33000742")
+        assert len(mocked_responses.calls) == 1
+        assert sleeps == []
+
+    def test_no_retries_by_default(self, mocked_responses: responses.RequestsMock) -> None:
+        mock_post(mocked_responses, "dm", status=503)
+        client = Client(user_agent=USER_AGENT)
+        with pytest.raises(ConnectionError):
+            client.monitor("33000742")
+        assert len(mocked_responses.calls) == 1
+
+
+class TestClientCircuitBreaker:
+    def test_open_circuit_fails_fast(self, mocked_responses: responses.RequestsMock) -> None:
+        mock_post(mocked_responses, "dm", status=500)
+        breaker = CircuitBreaker(failure_threshold=2)
+        client = Client(user_agent=USER_AGENT, circuit_breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                client.monitor("33000742")
+        with pytest.raises(CircuitOpenError):
+            client.monitor("33000742")
+        assert len(mocked_responses.calls) == 2
+        assert breaker.state("dm") == "open"
+
+    def test_client_errors_do_not_open(self, mocked_responses: responses.RequestsMock) -> None:
+        mock_post(mocked_responses, "dm", status=404)
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = Client(user_agent=USER_AGENT, circuit_breaker=breaker)
+        with pytest.raises(ConnectionError):
+            client.monitor("33000742")
+        assert breaker.state("dm") == "closed"
+
+    def test_open_circuit_stops_retries(
+        self, mocked_responses: responses.RequestsMock, sleeps: list[float]
+    ) -> None:
+        mock_post(mocked_responses, "dm", status=503)
+        client = Client(
+            user_agent=USER_AGENT,
+            retry=RetryPolicy(max_attempts=5),
+            circuit_breaker=CircuitBreaker(failure_threshold=2),
+        )
+        with pytest.raises(CircuitOpenError):
+            client.monitor("33000742")
+        assert len(mocked_responses.calls) == 2
+
+    def test_interrupted_trial_keeps_circuit_open(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30, clock=clock)
+        client = Client(user_agent=USER_AGENT, circuit_breaker=breaker)
+        breaker.record_failure("dm")
+        clock.now = 30
+
+        def interrupt(*args: Any, **kwargs: Any) -> Any:
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(client, "_send", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            client.monitor("33000742")
+        assert breaker.state("dm") == "half_open"
+        assert breaker.allow("dm")  # the trial slot was released
+
+    def test_serves_stale_on_error(self, mocked_responses: responses.RequestsMock) -> None:
+        clock = FakeClock()
+        cache = ResponseCache({"rc": 10}, stale_if_error=300, clock=clock)
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = Client(user_agent=USER_AGENT, response_cache=cache, circuit_breaker=breaker)
+        mock_post(mocked_responses, "rc", fixture="route_changes.json")
+        mock_post(mocked_responses, "rc", status=503)
+        fresh = client.route_changes()
+        clock.now = 60
+        assert client.route_changes() == fresh  # request failed, stale data served
+        assert client.route_changes() == fresh  # circuit open, no request
+        assert len(mocked_responses.calls) == 2
+        assert cache.stats.error_hits == 2
+        clock.now = 400
+        with pytest.raises(CircuitOpenError):
+            client.route_changes()
+
+
+class TestAsyncRetry:
+    def test_retries_and_breaks(self) -> None:
+        statuses = [503, 200]
+        body = load_fixture("departure_monitor.json")
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status = statuses.pop(0) if statuses else 500
+            return httpx.Response(status, json=body if status == 200 else None)
+
+        async def run() -> tuple[Any, BaseException]:
+            async with AsyncClient(
+                user_agent=USER_AGENT,
+                transport=httpx.MockTransport(handler),
+                retry=RetryPolicy(max_attempts=3, backoff=0),
+                circuit_breaker=CircuitBreaker(failure_threshold=2),
+            ) as client:
+                departures = await client.monitor("33000742")
+                with pytest.raises(CircuitOpenError) as excinfo:
+                    await client.monitor("33000742")
+                return departures, excinfo.value
+
+        departures, error = asyncio.run(run())
+        assert departures
+        assert isinstance(error, ConnectionError)
+
+    def test_cancelled_trial_keeps_circuit_open(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30, clock=clock)
+        breaker.record_failure("dm")
+        clock.now = 30
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.Event().wait()  # never answers
+            raise AssertionError
+
+        async def run() -> None:
+            async with AsyncClient(
+                user_agent=USER_AGENT,
+                transport=httpx.MockTransport(handler),
+                circuit_breaker=breaker,
+                coalesce=False,
+            ) as client:
+                task = asyncio.ensure_future(client.monitor("33000742"))
+                await asyncio.sleep(0.01)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+
+        asyncio.run(run())
+        assert breaker.state("dm") == "half_open"
+        assert breaker.allow("dm")
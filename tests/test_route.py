@@ -1,9 +1,21 @@
 from __future__ import annotations
 
-from dvb import Client
-from dvb.models import Route
+import asyncio
+import copy
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any
 
-from .conftest import mock_get, mock_post
+import httpx
+import pytest
+import responses
+
+import dvb._utils
+from dvb import AsyncClient, Client
+from dvb._utils import format_date
+from dvb.models import Polyline, Route
+
+from .conftest import load_fixture, mock_get, mock_post
 
 
 class TestRoute:
@@ -57,7 +69,7 @@ class TestRoute:
         assert isinstance(results, list)
 
         path = results[0].legs[0].path
-        assert path is not None
+        assert isinstance(path, Polyline)
         assert len(path) == 2
         assert abs(path[0].lat - 51.0) < 0.1
 
@@ -74,3 +86,159 @@ class TestRoute:
         result = client.route("33000028", "33000016", raw=True)
         assert isinstance(result, dict)
         assert "Routes" in result
+
+    def test_one_transform_per_route(
+        self, mocked_responses: object, client: Client, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        transformer = dvb._utils._gk4_to_wgs_transformer
+        calls: list[int] = []
+
+        class CountingTransformer:
+            def transform(self, xx: Any, yy: Any) -> Any:
+                calls.append(len(xx))
+                return transformer.transform(xx, yy)
+
+        monkeypatch.setattr(dvb._utils, "_gk4_to_wgs_transformer", CountingTransformer())
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")  # type: ignore[arg-type]
+        results = client.route("33000028", "33000016")
+        assert isinstance(results, list)
+        # two stops and two path vertices, converted together
+        assert calls == [4]
+
+    def test_lazy_paths(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")  # type: ignore[arg-type]
+        eager = client.route("33000028", "33000016")
+        lazy = client.route("33000028", "33000016", lazy_paths=True)
+        assert isinstance(eager, list)
+        assert isinstance(lazy, list)
+
+        path = lazy[0].legs[0].path
+        assert isinstance(path, Polyline)
+        assert not path.is_loaded
+        assert lazy[0].legs[0].stops == eager[0].legs[0].stops
+        assert path == eager[0].legs[0].path
+        assert path.is_loaded
+
+
+START = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _routes_page(minutes: list[int], session_id: str = "s1") -> dict[str, Any]:
+    """Build a trips response with one route departing at each START + minutes."""
+    template = load_fixture("trips.json")
+    routes = []
+    for m in minutes:
+        route = copy.deepcopy(template["Routes"][0])
+        for i, stop in enumerate(route["PartialRoutes"][0]["RegularStops"]):
+            stamp = format_date(START + timedelta(minutes=m + 11 * i))
+            for key in ("ArrivalTime", "DepartureTime", "ArrivalRealTime", "DepartureRealTime"):
+                stop[key] = stamp
+        routes.append(route)
+    return {**template, "Routes": routes, "SessionId": session_id}
+
+
+def _departures(routes: list[Route]) -> list[int]:
+    return [
+        int((r.legs[0].stops[0].departure - START).total_seconds() // 60)  # type: ignore[operator]
+        for r in routes
+    ]
+
+
+class TestIterRoutes:
+    def test_pages_until_window_is_covered(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0, 10]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([10, 20, 30]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([40, 50]))
+        routes = list(
+            client.iter_routes("33000028", "33000016", time=START, until=timedelta(minutes=45))
+        )
+        assert _departures(routes) == [0, 10, 20, 30, 40]
+        pages = [c for c in mocked_responses.calls if c.request.url.endswith("prevnext")]
+        assert len(pages) == 2
+        assert json.loads(pages[0].request.body)["previous"] is False
+
+    def test_naive_times_are_local(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0, 10]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([20, 30]))
+        naive = START.astimezone().replace(tzinfo=None)
+        for until in (timedelta(minutes=25), naive + timedelta(minutes=25)):
+            routes = list(client.iter_routes("33000028", "33000016", time=naive, until=until))
+            assert _departures(routes) == [0, 10, 20]
+
+    def test_resolves_stops_once(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([20]))
+        routes = list(
+            client.iter_routes(
+                "Helmholtzstraße", "Helmholtzstr.", time=START, until=START + timedelta(minutes=15)
+            )
+        )
+        assert len(routes) == 1
+        lookups = [c for c in mocked_responses.calls if "pointfinder" in c.request.url]
+        assert len(lookups) == 2
+
+    def test_earlier(self, mocked_responses: responses.RequestsMock, client: Client) -> None:
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([-40, -20]))
+        routes = client.iter_routes(
+            "33000028",
+            "33000016",
+            time=START,
+            until=timedelta(minutes=30),
+            direction="earlier",
+        )
+        assert _departures(list(routes)) == [0, -20]
+        assert json.loads(mocked_responses.calls[1].request.body)["previous"] is True
+
+    def test_stops_on_repeated_page(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0, 10]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([0, 10]))
+        routes = list(
+            client.iter_routes("33000028", "33000016", time=START, until=timedelta(hours=2))
+        )
+        assert _departures(routes) == [0, 10]
+        assert len(mocked_responses.calls) == 2
+
+    def test_max_pages(self, mocked_responses: responses.RequestsMock, client: Client) -> None:
+        mock_post(mocked_responses, "tr/trips", body=_routes_page([0]))
+        mock_post(mocked_responses, "tr/prevnext", body=_routes_page([10]))
+        routes = client.iter_routes(
+            "33000028", "33000016", time=START, until=timedelta(hours=2), max_pages=2
+        )
+        assert _departures(list(routes)) == [0, 10]
+        assert len(mocked_responses.calls) == 2
+
+    def test_invalid_window(self, client: Client) -> None:
+        with pytest.raises(ValueError):
+            client.iter_routes("33000028", "33000016", time=START, until=START - timedelta(hours=1))
+        with pytest.raises(ValueError):
+            client.iter_routes("a", "b", until=timedelta(hours=1), direction="up")  # type: ignore[arg-type]
+
+    def test_async(self) -> None:
+        pages = [_routes_page([10, 20]), _routes_page([30])]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("trips"):
+                return httpx.Response(200, json=_routes_page([0, 10]))
+            return httpx.Response(200, json=pages.pop(0))
+
+        async def run() -> list[Route]:
+            async with AsyncClient(
+                user_agent="test/1.0", transport=httpx.MockTransport(handler)
+            ) as client:
+                routes = client.iter_routes(
+                    "33000028", "33000016", time=START, until=timedelta(minutes=25)
+                )
+                return [route async for route in routes]
+
+        assert _departures(asyncio.run(run())) == [0, 10, 20]
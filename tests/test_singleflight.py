@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, RequestEvent
+from dvb._singleflight import SingleFlight
+from dvb.exceptions import ConnectionError
+
+from .conftest import BASE_URL, FIXTURES, load_fixture
+
+USER_AGENT = "dvb-test-suite/1.0 (test@test)"
+
+
+def _slow_callback(fixture: str, calls: list[int], delay: float = 0.3) -> Any:
+    body = (FIXTURES / fixture).read_text()
+
+    def callback(request: Any) -> tuple[int, dict[str, str], str]:
+        calls.append(1)
+        time.sleep(delay)
+        return 200, {}, body
+
+    return callback
+
+
+def _concurrently(n: int, fn: Any) -> list[Any]:
+    barrier = threading.Barrier(n)
+
+    def run(_: int) -> Any:
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return list(executor.map(run, range(n)))
+
+
+class TestSingleFlight:
+    def test_sequential_calls_run_again(self) -> None:
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == (1, True)
+        assert flight.do("k", lambda: 2) == (2, True)
+        assert len(flight) == 0
+
+    def test_exception_is_shared(self) -> None:
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def fail() -> None:
+            started.set()
+            time.sleep(0.2)
+            raise ValueError("boom")
+
+        errors: list[BaseException] = []
+
+        def call() -> None:
+            try:
+                flight.do("k", fail)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+        assert len(errors) == 2
+        assert errors[0] is errors[1]
+
+
+class TestClientCoalescing:
+    def test_identical_calls_share_one_request(
+        self, mocked_responses: responses.RequestsMock
+    ) -> None:
+        calls: list[int] = []
+        mocked_responses.add_callback(
+            responses.POST, f"{BASE_URL}/dm", _slow_callback("departure_monitor.json", calls)
+        )
+        events: list[RequestEvent] = []
+        client = Client(user_agent=USER_AGENT, hooks=[events.append])
+        results = _concurrently(8, lambda: client.monitor("33000742"))
+        assert len(calls) == 1
+        assert all(r == results[0] for r in results)
+        assert len({id(r) for r in results}) == 8  # every caller gets its own list
+        assert sorted(e.cache for e in events) == ["bypass"] + ["coalesced"] * 7
+
+    def test_batches_are_copied(self, mocked_responses: responses.RequestsMock) -> None:
+        calls: list[int] = []
+        mocked_responses.add_callback(
+            responses.POST, f"{BASE_URL}/dm", _slow_callback("departure_monitor.json", calls)
+        )
+        client = Client(user_agent=USER_AGENT)
+        results = _concurrently(4, lambda: client.monitor_batch("33000742"))
+        assert len(calls) == 1
+        results[0].add(load_fixture("departure_monitor.json"))
+        assert [len(r) for r in results] == [4, 2, 2, 2]
+
+    def test_different_output_formats_are_separate(
+        self, mocked_responses: responses.RequestsMock
+    ) -> None:
+        calls: list[int] = []
+        mocked_responses.add_callback(
+            responses.POST, f"{BASE_URL}/dm", _slow_callback("departure_monitor.json", calls)
+        )
+        client = Client(user_agent=USER_AGENT)
+        barrier = threading.Barrier(2)
+
+        def call(raw: bool) -> Any:
+            barrier.wait()
+            return client.monitor("33000742", raw=raw)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            parsed, raw = executor.map(call, [False, True])
+        assert isinstance(parsed, list)
+        assert isinstance(raw, dict)
+        assert len(calls) == 2
+
+    def test_stop_resolution_is_shared(self, mocked_responses: responses.RequestsMock) -> None:
+        lookups: list[int] = []
+        mocked_responses.add_callback(
+            responses.GET, f"{BASE_URL}/tr/pointfinder", _slow_callback("pointfinder.json", lookups)
+        )
+        client = Client(user_agent=USER_AGENT)
+        results = _concurrently(6, lambda: client._resolve_stop_id("Helmholtzstraße"))
+        assert len(lookups) == 1
+        assert set(results) == {"33000742"}
+
+    def test_errors_are_shared(self, mocked_responses: responses.RequestsMock) -> None:
+        calls: list[int] = []
+
+        def callback(request: Any) -> tuple[int, dict[str, str], str]:
+            calls.append(1)
+            time.sleep(0.3)
+            return 503, {}, ""
+
+        mocked_responses.add_callback(responses.POST, f"{BASE_URL}/dm", callback)
+        client = Client(user_agent=USER_AGENT)
+
+        def call() -> BaseException | None:
+            try:
+                client.monitor("33000742")
+            except ConnectionError as e:
+                return e
+            return None
+
+        errors = _concurrently(4, call)
+        assert len(calls) == 1
+        assert all(isinstance(e, ConnectionError) for e in errors)
+
+    def test_disabled(self, mocked_responses: responses.RequestsMock) -> None:
+        calls: list[int] = []
+        mocked_responses.add_callback(
+            responses.POST,
+            f"{BASE_URL}/dm",
+            _slow_callback("departure_monitor.json", calls, delay=0.05),
+        )
+        client = Client(user_agent=USER_AGENT, coalesce=False)
+        _concurrently(4, lambda: client.monitor("33000742"))
+        assert len(calls) == 4
+
+
+class TestAsyncCoalescing:
+    def test_identical_calls_share_one_request(self) -> None:
+        counts = {"dm": 0, "tr/pointfinder": 0}
+        bodies = {
+            "dm": load_fixture("departure_monitor.json"),
+            "tr/pointfinder": load_fixture("pointfinder.json"),
+        }
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            endpoint = request.url.path.lstrip("/")
+            counts[endpoint] += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=bodies[endpoint])
+
+        async def run() -> list[Any]:
+            async with AsyncClient(
+                user_agent=USER_AGENT, transport=httpx.MockTransport(handler)
+            ) as client:
+                return await asyncio.gather(*(client.monitor("Helmholtzstraße") for _ in range(10)))
+
+        results = asyncio.run(run())
+        assert counts == {"dm": 1, "tr/pointfinder": 1}
+        assert all(r == results[0] for r in results)
+
+    def test_cancelled_caller_does_not_cancel_others(self) -> None:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json=load_fixture("departure_monitor.json"))
+
+        async def run() -> Any:
+            async with AsyncClient(
+                user_agent=USER_AGENT, transport=httpx.MockTransport(handler)
+            ) as client:
+                first = asyncio.create_task(client.monitor("33000742"))
+                second = asyncio.create_task(client.monitor("33000742"))
+                await asyncio.sleep(0.01)
+                first.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await first
+                return await second
+
+        assert asyncio.run(run())
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+import responses
+
+from dvb import Client, SpatialIndex
+from dvb._utils import coords_wgs_to_gk4
+from dvb.models import Coords, Pin, Stop
+
+from .conftest import mock_get
+
+HBF = Stop(id="33000028", name="Hauptbahnhof", city="", coords=Coords(51.0405, 13.7320))
+WALPURGIS = Stop(id="33000031", name="Walpurgisstraße", city="", coords=Coords(51.0446, 13.7391))
+POSTPLATZ = Stop(id="33000037", name="Postplatz", city="", coords=Coords(51.0506, 13.7330))
+PIRNA = Stop(id="33002201", name="Hauptbahnhof", city="Pirna", coords=Coords(50.9623, 13.9426))
+NO_COORDS = Stop(id="1", name="Nowhere", city="")
+
+
+def _distance(a: Coords, b: Coords) -> float:
+    an, ae = coords_wgs_to_gk4(a.lat, a.lng)
+    bn, be = coords_wgs_to_gk4(b.lat, b.lng)
+    return math.hypot(ae - be, an - bn)
+
+
+@pytest.fixture()
+def index() -> SpatialIndex[Stop]:
+    return SpatialIndex([HBF, WALPURGIS, POSTPLATZ, PIRNA, NO_COORDS])
+
+
+class TestSpatialIndex:
+    def test_skips_items_without_coords(self, index: SpatialIndex[Stop]) -> None:
+        assert len(index) == 4
+        assert "1" not in index
+
+    def test_nearest(self, index: SpatialIndex[Stop]) -> None:
+        result = index.nearest(51.0410, 13.7325, k=2)
+        assert [n.item for n in result] == [HBF, WALPURGIS]
+        assert result[0].distance == pytest.approx(66, abs=2)
+        assert result[0].distance < result[1].distance
+
+    def test_nearest_respects_max_distance(self, index: SpatialIndex[Stop]) -> None:
+        result = index.nearest(51.0410, 13.7325, k=5, max_distance=1000)
+        assert [n.item for n in result] == [HBF, WALPURGIS]
+        assert index.nearest(50.5, 13.0, max_distance=1000) == []
+
+    def test_nearest_far_outside(self, index: SpatialIndex[Stop]) -> None:
+        assert index.nearest(52.52, 13.40)[0].item == POSTPLATZ
+
+    def test_within_radius(self, index: SpatialIndex[Stop]) -> None:
+        result = index.within_radius(51.0446, 13.7391, 700)
+        assert [n.item for n in result] == [WALPURGIS, HBF]
+        assert result[0].distance == pytest.approx(0, abs=1)
+
+    def test_replace_and_remove(self, index: SpatialIndex[Stop]) -> None:
+        moved = Stop(id=HBF.id, name=HBF.name, city="", coords=Coords(50.9620, 13.9420))
+        index.add([moved])
+        assert len(index) == 4
+        assert index.nearest(51.0410, 13.7325)[0].item == WALPURGIS
+        index.remove(PIRNA.id)
+        assert index.nearest(50.9623, 13.9426)[0].item == moved
+
+    @pytest.mark.parametrize("cell_size", [50, 250, 5000])
+    def test_matches_brute_force(self, cell_size: float) -> None:
+        rng = random.Random(42)
+        stops = [
+            Stop(str(i), "", "", Coords(51.0 + rng.random() * 0.1, 13.65 + rng.random() * 0.2))
+            for i in range(300)
+        ]
+        index = SpatialIndex(stops, cell_size=cell_size)
+        for _ in range(20):
+            query = Coords(50.98 + rng.random() * 0.14, 13.6 + rng.random() * 0.3)
+            expected = sorted(stops, key=lambda s: (_distance(query, s.coords), s.id))[:3]  # type: ignore[arg-type]
+            assert [n.item for n in index.nearest(query.lat, query.lng, k=3)] == expected
+
+    def test_pins(self) -> None:
+        pin = Pin(id="33000028", name="Hbf", city="Dresden", coords=HBF.coords, type="Stop")
+        index = SpatialIndex([pin])
+        assert index.nearest(51.0410, 13.7325)[0].item is pin
+
+
+class TestClientSpatialIndex:
+    def test_address_answered_locally(self, index: SpatialIndex[Stop]) -> None:
+        client = Client(user_agent="test/1.0", spatial_index=index)
+        with responses.RequestsMock():  # any request would fail the test
+            assert client.address(51.0410, 13.7325) == HBF
+
+    def test_pin_converted_to_stop(self) -> None:
+        pin = Pin(id="33000028", name="Hbf", city="Dresden", coords=HBF.coords, type="Stop")
+        client = Client(user_agent="test/1.0", spatial_index=SpatialIndex([pin]))
+        result = client.address(51.0410, 13.7325)
+        assert isinstance(result, Stop)
+        assert result.id == pin.id
+
+    def test_falls_back_and_learns(self, mocked_responses: responses.RequestsMock) -> None:
+        index: SpatialIndex[Stop] = SpatialIndex([PIRNA])
+        client = Client(user_agent="test/1.0", spatial_index=index)
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        result = client.address(51.0262, 13.7233)
+        assert isinstance(result, Stop)
+        assert result.id == "33000742"
+        assert result.id in index
+        assert client.address(51.0262, 13.7233) == result
+        assert len(mocked_responses.calls) == 1
+
+    def test_non_stops_are_not_indexed(self, mocked_responses: responses.RequestsMock) -> None:
+        index: SpatialIndex[Stop] = SpatialIndex()
+        client = Client(user_agent="test/1.0", spatial_index=index)
+        street = "streetID:1:2:3|s|Dresden|Hauptstraße|5655904|4621157|0||"
+        body = {"Status": {"Code": "Ok"}, "Points": [street]}
+        mock_get(mocked_responses, "tr/pointfinder", body=body)
+        result = client.address(51.0262, 13.7233)
+        assert isinstance(result, Stop)
+        assert result.name == "Hauptstraße"
+        assert len(index) == 0
+        client.address(51.0262, 13.7233)
+        assert len(mocked_responses.calls) == 2
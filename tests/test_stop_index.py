@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+import responses
+
+from dvb import AsyncClient, Client, StopIndex
+from dvb.models import Coords, Pin, Stop
+from dvb.stop_index import fold_name
+
+from .conftest import async_transport, load_fixture, mock_get, mock_post
+
+STOPS = [
+    Stop(id="33000028", name="Hauptbahnhof", city="", coords=Coords(51.04, 13.73)),
+    Stop(id="33000742", name="Helmholtzstraße", city=""),
+    Stop(id="33000144", name="Münchner Platz", city=""),
+    Stop(id="33000016", name="Bahnhof Neustadt", city=""),
+    Stop(id="33000037", name="Postplatz", city=""),
+    Stop(id="33002201", name="Hauptbahnhof", city="Pirna"),
+]
+
+
+@pytest.fixture()
+def index() -> StopIndex:
+    return StopIndex(STOPS)
+
+
+class TestFoldName:
+    @pytest.mark.parametrize(
+        "name",
+        ["Münchner Platz", "muenchner-platz", "MUNCHNER PL.", "  Münchner   Platz "],
+    )
+    def test_spelling_variants(self, name: str) -> None:
+        assert fold_name(name) == "munchner platz"
+
+    def test_sharp_s_and_street_abbreviation(self) -> None:
+        assert fold_name("Helmholtzstraße") == fold_name("Helmholtzstr.") == "helmholtzstrasse"
+        assert fold_name("Hbf") == "hauptbahnhof"
+
+
+class TestStopIndex:
+    def test_exact_match(self, index: StopIndex) -> None:
+        matches = index.search("Münchner Platz")
+        assert matches[0].stop.id == "33000144"
+        assert matches[0].score == 1.0
+
+    def test_prefix_and_word_prefix(self, index: StopIndex) -> None:
+        assert index.find("Helmholtz")[0].id == "33000742"
+        assert index.find("Post")[0].id == "33000037"
+        assert index.find("Neustadt")[0].id == "33000016"
+
+    def test_fuzzy_match(self, index: StopIndex) -> None:
+        assert index.resolve("Helmholzstrasse") == STOPS[1]
+
+    def test_city_prefix(self, index: StopIndex) -> None:
+        assert index.resolve("Dresden, Hauptbahnhof") == STOPS[0]
+        assert index.resolve("Pirna Hbf") == STOPS[5]
+
+    def test_miss(self, index: StopIndex) -> None:
+        assert index.resolve("Flughafen") is None
+        assert index.find("") == []
+
+    def test_replace_stop(self, index: StopIndex) -> None:
+        index.add([Stop(id="33000037", name="Wilsdruffer Kaitz", city="")])
+        assert len(index) == len(STOPS)
+        assert index.resolve("Postplatz") is None
+        assert index.resolve("Wilsdruffer Kaitz") is not None
+
+    def test_add_pins_keeps_only_stops(self) -> None:
+        index = StopIndex()
+        index.add_pins(
+            [
+                Pin(id="33000028", name="Hauptbahnhof", city="Dresden", coords=None, type="Stop"),
+                Pin(id="pr:1", name="P+R", city="Dresden", coords=None, type="ParkAndRide"),
+            ]
+        )
+        assert "33000028" in index
+        assert len(index) == 1
+
+    def test_save_and_load(self, index: StopIndex, tmp_path: Path) -> None:
+        path = tmp_path / "stops.json"
+        index.save(path)
+        loaded = StopIndex.load(path)
+        assert sorted(loaded, key=lambda s: s.id) == sorted(STOPS, key=lambda s: s.id)
+
+    def test_load_rejects_unknown_version(self) -> None:
+        with pytest.raises(ValueError, match="version"):
+            StopIndex.from_json({"version": 99, "stops": []})
+
+
+class TestClientStopIndex:
+    def test_find_answered_locally(self, index: StopIndex) -> None:
+        client = Client(user_agent="test/1.0", stop_index=index)
+        with responses.RequestsMock():  # any request would fail the test
+            results = client.find("Helmholtzstr")
+        assert results == [STOPS[1]]
+
+    def test_find_falls_back_and_learns(self, mocked_responses: responses.RequestsMock) -> None:
+        index = StopIndex()
+        client = Client(user_agent="test/1.0", stop_index=index)
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        results = client.find("Helmholtz")
+        assert isinstance(results, list)
+        assert len(index) == len(results)
+        assert client.find("Helmholtzstraße")[0].id == "33000742"  # type: ignore[union-attr]
+        assert len(mocked_responses.calls) == 1
+
+    def test_raw_always_uses_api(
+        self, mocked_responses: responses.RequestsMock, index: StopIndex
+    ) -> None:
+        client = Client(user_agent="test/1.0", stop_index=index)
+        mock_get(mocked_responses, "tr/pointfinder", fixture="pointfinder.json")
+        assert isinstance(client.find("Postplatz", raw=True), dict)
+
+    def test_monitor_resolves_locally(
+        self, mocked_responses: responses.RequestsMock, index: StopIndex
+    ) -> None:
+        client = Client(user_agent="test/1.0", stop_index=index)
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        client.monitor("Dresden Hauptbahnhof")
+        assert len(mocked_responses.calls) == 1
+        assert b'"stopid": "33000028"' in mocked_responses.calls[0].request.body
+
+    def test_async_resolves_locally(self, index: StopIndex) -> None:
+        client = AsyncClient(
+            user_agent="test/1.0",
+            transport=async_transport({"stt/lines": load_fixture("lines.json")}),
+            stop_index=index,
+        )
+
+        async def run() -> object:
+            async with client:
+                return await client.lines("Münchner Platz")
+
+        assert len(asyncio.run(run())) == 2  # type: ignore[arg-type]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from datetime import datetime, timezone
+
+import pytest
+import requests
+import responses
+
+from dvb import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Client,
+    RequestEvent,
+    RetryPolicy,
+    TokenBucketLimiter,
+)
+from dvb._stream import ResponseStream, iter_members
+from dvb.exceptions import APIError, ConnectionError
+from dvb.models import RegularStop, Route
+
+from .conftest import BASE_URL, FIXTURES, load_fixture, mock_post
+from .test_cache import FakeClock
+
+
+def chunked(data: bytes, size: int) -> Iterator[bytes]:
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+class TestIterMembers:
+    @pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+    @pytest.mark.parametrize(
+        "fixture", ["trips.json", "trip_details.json", "departure_monitor.json", "pins.json"]
+    )
+    def test_matches_json_loads(self, fixture: str, size: int) -> None:
+        raw = (FIXTURES / fixture).read_bytes()
+        expected = json.loads(raw)
+        streamed: dict[str, object] = {}
+        for key, value in iter_members(chunked(raw, size), ("Routes", "Stops")):
+            if key in ("Routes", "Stops"):
+                streamed.setdefault(key, []).append(value)  # type: ignore[union-attr]
+            else:
+                streamed[key] = value
+        assert streamed == expected
+
+    def test_number_split_across_chunks(self) -> None:
+        raw = b'{"Items": [12345, 678], "Count": 90}'
+        events = list(iter_members(chunked(raw, 3), ("Items",)))
+        assert events == [("Items", 12345), ("Items", 678), ("Count", 90)]
+
+    def test_multibyte_split_across_chunks(self) -> None:
+        raw = json.dumps({"Name": "Helmholtzstraße"}, ensure_ascii=False).encode()
+        assert list(iter_members(chunked(raw, 1), ())) == [("Name", "Helmholtzstraße")]
+
+    def test_empty_containers(self) -> None:
+        assert list(iter_members([b"{}"], ())) == []
+        assert list(iter_members([b'{"Items": [ ]}'], ("Items",))) == []
+
+    @pytest.mark.parametrize("raw", [b'{"a": 1', b'{"a" 1}', b"[1, 2]", b'{"a": [1, }'])
+    def test_malformed(self, raw: bytes) -> None:
+        with pytest.raises(APIError, match="JSON"):
+            list(iter_members(chunked(raw, 2), ("a",)))
+
+
+class TestResponseStream:
+    def test_collects_members_and_closes(self) -> None:
+        closed: list[bool] = []
+        raw = b'{"Items": [1, 2], "SessionId": "abc", "Status": {"Code": "Ok"}}'
+        stream = ResponseStream(
+            chunked(raw, 4), "Items", lambda v: v * 10, lambda e: closed.append(e is None)
+        )
+        assert list(stream) == [10, 20]
+        assert stream.session_id == "abc"
+        assert closed == [True]
+
+    def test_error_status(self) -> None:
+        stream = ResponseStream([b'{"Status": {"Code": "ServiceError"}}'], "Items", lambda v: v)
+        with pytest.raises(APIError, match="ServiceError"):
+            list(stream)
+
+    def test_missing_status(self) -> None:
+        with pytest.raises(APIError):
+            list(ResponseStream([b'{"Items": [1]}'], "Items", lambda v: v))
+
+
+class TestClientStreaming:
+    def test_stream_routes(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")  # type: ignore[arg-type]
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")  # type: ignore[arg-type]
+        expected = client.route("33000028", "33000016")
+        assert isinstance(expected, list)
+        with client.stream_routes("33000028", "33000016") as stream:
+            routes = list(stream)
+        assert all(isinstance(r, Route) for r in routes)
+        assert [r.legs for r in routes] == [r.legs for r in expected]
+        assert routes[0].session_id is None
+        assert stream.session_id == "367417461:efa4"
+
+    def test_stream_trip_details(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "dm/trip", fixture="trip_details.json")  # type: ignore[arg-type]
+        time = datetime(2017, 12, 6, 13, 24, 41, tzinfo=timezone.utc)
+        stops = list(client.stream_trip_details("71313709", time, "33000077"))
+        assert all(isinstance(s, RegularStop) for s in stops)
+        assert [s.id for s in stops] == [
+            s["Id"] for s in load_fixture("trip_details.json")["Stops"]
+        ]
+
+    def test_stream_api_error(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "tr/trips", body={"Status": {"Code": "ServiceError"}})  # type: ignore[arg-type]
+        with pytest.raises(APIError, match="ServiceError"):
+            list(client.stream_routes("33000028", "33000016"))
+
+    def test_stream_retries_and_reports(
+        self, mocked_responses: responses.RequestsMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        sleeps: list[float] = []
+        monkeypatch.setattr("dvb.dvb.sleep", sleeps.append)
+        mocked_responses.add(
+            responses.POST, f"{BASE_URL}/tr/trips", body=requests.ConnectionError("reset")
+        )
+        mock_post(mocked_responses, "tr/trips", fixture="trips.json")
+        events: list[RequestEvent] = []
+        limiter = TokenBucketLimiter(rate=4, burst=1, clock=FakeClock())
+        client = Client(
+            user_agent="test/1.0",
+            retry=RetryPolicy(jitter=False),
+            rate_limiter=limiter,
+            hooks=[events.append],
+        )
+        stream = client.stream_routes("33000028", "33000016")
+        assert events == []
+        routes = list(stream)
+        assert len(mocked_responses.calls) == 2
+        assert sleeps == [0.5, 0.25]
+        [event] = events
+        assert event.endpoint == "tr/trips"
+        assert event.ok
+        assert event.retries == 1
+        assert event.rate_limit_wait == 0.25
+        assert event.response_bytes > 0
+        assert event.parse_time > 0
+        assert len(routes) > 0
+
+    def test_stream_reports_errors(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "tr/trips", body={"Status": {"Code": "ServiceError"}})
+        events: list[RequestEvent] = []
+        client.hooks.append(events.append)
+        with pytest.raises(APIError):
+            list(client.stream_routes("33000028", "33000016"))
+        [event] = events
+        assert isinstance(event.error, APIError)
+
+    def test_stream_open_circuit(self, mocked_responses: responses.RequestsMock) -> None:
+        mock_post(mocked_responses, "tr/trips", status=503)
+        events: list[RequestEvent] = []
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = Client(user_agent="test/1.0", circuit_breaker=breaker, hooks=[events.append])
+        with pytest.raises(ConnectionError):
+            client.stream_routes("33000028", "33000016")
+        with pytest.raises(CircuitOpenError):
+            client.stream_routes("33000028", "33000016")
+        assert len(mocked_responses.calls) == 1
+        assert breaker.state("tr/trips") == "open"
+        assert [type(e.error) for e in events] == [ConnectionError, CircuitOpenError]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import httpx
+import pytest
+import responses
+
+from dvb import AsyncClient, AsyncPinTiles, Client, PinTiles
+from dvb.exceptions import ConnectionError
+
+from .conftest import BASE_URL, load_fixture
+
+# Around Dresden Hauptbahnhof, where all pins of the fixture are
+BOX = (51.035, 13.725, 51.045, 13.740)
+
+
+def _register(rsps: responses.RequestsMock, requests: list[dict[str, Any]]) -> None:
+    def callback(request: Any) -> tuple[int, dict[str, str], str]:
+        requests.append(json.loads(request.body))
+        return 200, {}, json.dumps(load_fixture("pins.json"))
+
+    rsps.add_callback(responses.POST, f"{BASE_URL}/map/pins", callback=callback)
+
+
+class TestPinTiles:
+    def test_tiles_cover_box(self, client: Client) -> None:
+        tiles = PinTiles(client, tile_size=1000)
+        covered = tiles.tiles(*BOX)
+        assert len(covered) == len(set(covered)) > 1
+        xs = {x for x, _ in covered}
+        ys = {y for _, y in covered}
+        assert len(covered) == len(xs) * len(ys)
+
+    def test_fetches_tiles_and_deduplicates(
+        self, client: Client, mocked_responses: responses.RequestsMock
+    ) -> None:
+        requests: list[dict[str, Any]] = []
+        _register(mocked_responses, requests)
+        tiles = PinTiles(client, tile_size=1000)
+
+        pins = tiles.pins(*BOX, pin_types=("Stop", "Platform"))
+        assert sorted(p.id for p in pins) == ["33000028", "pf:1234", "pr:5678"]
+        assert len(requests) == 2 * len(tiles.tiles(*BOX))
+        assert all(len(r["pintypes"]) == 1 for r in requests)
+        first = requests[0]
+        assert int(first["nelat"]) - int(first["swlat"]) == 1000
+        assert int(first["nelng"]) - int(first["swlng"]) == 1000
+
+    def test_second_call_served_from_cache(
+        self, client: Client, mocked_responses: responses.RequestsMock
+    ) -> None:
+        requests: list[dict[str, Any]] = []
+        _register(mocked_responses, requests)
+        tiles = PinTiles(client, tile_size=1000)
+        tiles.pins(*BOX)
+        count = len(requests)
+        assert len(tiles.pins(*BOX)) == 3
+        assert len(requests) == count
+
+    def test_panning_fetches_only_new_tiles(
+        self, client: Client, mocked_responses: responses.RequestsMock
+    ) -> None:
+        requests: list[dict[str, Any]] = []
+        _register(mocked_responses, requests)
+        tiles = PinTiles(client, tile_size=1000)
+        tiles.pins(*BOX)
+        before = set(tiles.tiles(*BOX))
+        count = len(requests)
+
+        panned = (BOX[0], BOX[1] + 0.01, BOX[2], BOX[3] + 0.01)
+        tiles.pins(*panned)
+        assert len(requests) - count == len(set(tiles.tiles(*panned)) - before)
+
+    def test_drops_pins_outside_box(
+        self, client: Client, mocked_responses: responses.RequestsMock
+    ) -> None:
+        _register(mocked_responses, [])
+        tiles = PinTiles(client, tile_size=5000)
+        # Box inside the tile of the Hauptbahnhof but north of it
+        assert tiles.pins(51.045, 13.725, 51.050, 13.740) == []
+
+    def test_too_many_tiles(self, client: Client) -> None:
+        tiles = PinTiles(client, tile_size=100, max_tiles=10)
+        with pytest.raises(ValueError, match="max_tiles"):
+            tiles.pins(*BOX)
+
+    def test_failed_tile_is_not_cached(
+        self, client: Client, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.add(responses.POST, f"{BASE_URL}/map/pins", status=500)
+        tiles = PinTiles(client, tile_size=5000)
+        with pytest.raises(ConnectionError):
+            tiles.pins(*BOX)
+        requests: list[dict[str, Any]] = []
+        mocked_responses.reset()
+        _register(mocked_responses, requests)
+        assert len(tiles.pins(*BOX)) == 3
+        assert requests
+
+
+class TestAsyncPinTiles:
+    def test_fetches_and_caches(self) -> None:
+        requests: list[dict[str, Any]] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, json=load_fixture("pins.json"))
+
+        client = AsyncClient(user_agent="test/1.0", transport=httpx.MockTransport(handler))
+        tiles = AsyncPinTiles(client, tile_size=500, concurrency=2)
+
+        async def run() -> tuple[Any, Any]:
+            async with client:
+                return await tiles.pins(*BOX), await tiles.pins(*BOX)
+
+        first, second = asyncio.run(run())
+        assert sorted(p.id for p in first) == ["33000028", "pf:1234", "pr:5678"]
+        assert first == second
+        assert len(requests) == len(tiles.tiles(*BOX))
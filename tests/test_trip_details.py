@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from datetime import datetime, timezone
 
-from dvb import Client
+import responses
+
+from dvb import AsyncClient, Client, DepartureTrip
+from dvb.exceptions import ConnectionError
 from dvb.models import RegularStop
 
-from .conftest import mock_post
+from .conftest import async_transport, load_fixture, mock_post
 
 
 class TestTripDetails:
@@ -97,3 +102,62 @@ class TestTripDetails:
         )
         assert isinstance(result, dict)
         assert "Stops" in result
+
+    def test_mapdata_flag(self, mocked_responses: object, client: Client) -> None:
+        mock_post(mocked_responses, "dm/trip", fixture="trip_details.json")  # type: ignore[arg-type]
+        client.trip_details(
+            trip_id="71313709",
+            time=datetime(2017, 12, 6, 13, 24, 41, tzinfo=timezone.utc),
+            stop_id="33000077",
+            mapdata=False,
+        )
+        body = json.loads(mocked_responses.calls[0].request.body)  # type: ignore[attr-defined]
+        assert body["mapdata"] is False
+
+
+class TestMonitorWithTrips:
+    def test_attaches_stops(self, mocked_responses: responses.RequestsMock, client: Client) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        mock_post(mocked_responses, "dm/trip", fixture="trip_details.json")
+        board = client.monitor_with_trips("33000742", concurrency=2)
+        assert [len(t.stops) for t in board] == [3, 3]
+        assert all(t.error is None for t in board)
+        assert board[0].departure.id == "voe:11003: :H:j26"
+        trip_calls = [c for c in mocked_responses.calls if c.request.url.endswith("/dm/trip")]
+        assert len(trip_calls) == 2
+        assert json.loads(trip_calls[0].request.body)["mapdata"] is False
+
+    def test_trips_are_cached(
+        self, mocked_responses: responses.RequestsMock, client: Client
+    ) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        mock_post(mocked_responses, "dm/trip", fixture="trip_details.json")
+        first = client.monitor_with_trips("33000742")
+        expected = list(first[0].stops)
+        first[0].stops.clear()  # must not reach the cache
+        second = client.monitor_with_trips("33000742")
+        assert second[0].stops == expected
+        assert len(mocked_responses.calls) == 4  # two boards, two trips
+
+    def test_failed_trip(self, mocked_responses: responses.RequestsMock, client: Client) -> None:
+        mock_post(mocked_responses, "dm", fixture="departure_monitor.json")
+        mock_post(mocked_responses, "dm/trip", status=500)
+        board = client.monitor_with_trips("33000742")
+        assert [t.stops for t in board] == [[], []]
+        assert all(isinstance(t.error, ConnectionError) for t in board)
+        assert client.monitor_with_trips("33000742")[0].error is not None  # errors are not cached
+
+    def test_async(self) -> None:
+        transport = async_transport(
+            {
+                "dm": load_fixture("departure_monitor.json"),
+                "dm/trip": load_fixture("trip_details.json"),
+            }
+        )
+
+        async def run() -> list[DepartureTrip]:
+            async with AsyncClient(user_agent="test/1.0", transport=transport) as client:
+                return await client.monitor_with_trips("33000742", concurrency=1)
+
+        board = asyncio.run(run())
+        assert [len(t.stops) for t in board] == [3, 3]
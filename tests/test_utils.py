@@ -2,7 +2,17 @@ from datetime import datetime, timezone
 
 import pytest
 
-from dvb._utils import coords_gk4_to_wgs, coords_wgs_to_gk4, format_date, parse_date, parse_point
+from dvb._utils import (
+    CoordBatch,
+    coords_gk4_to_wgs,
+    coords_gk4_to_wgs_many,
+    coords_wgs_to_gk4,
+    coords_wgs_to_gk4_many,
+    format_date,
+    parse_date,
+    parse_point,
+    parse_points,
+)
 from dvb.models import Coords
 
 
@@ -25,6 +35,29 @@ class TestParseDate:
         dt = parse_date('{"time": "/Date(1487778279147+0100)/"}')
         assert dt.year == 2017
 
+    def test_fast_path_matches_regex_path(self) -> None:
+        expected = datetime.fromtimestamp(1487778279.147, tz=timezone.utc)
+        assert parse_date("/Date(1487778279147+0100)/") == expected
+        assert parse_date(' "/Date(1487778279147+0100)/"') == expected
+
+    def test_memoized(self) -> None:
+        s = "/Date(1512769800000-0000)/"
+        assert parse_date(s) is parse_date(s)
+
+    @pytest.mark.parametrize(
+        "s",
+        [
+            "/Date()/",
+            "/Date(12a4+0100)/",
+            "/Date(1234)/",
+            "/Date(1487778279147+abcd)/",
+            "/Date(1487778279147+\uff10\uff11\uff10\uff10)/",
+        ],
+    )
+    def test_malformed(self, s: str) -> None:
+        with pytest.raises(ValueError, match="Invalid date string"):
+            parse_date(s)
+
 
 class TestFormatDate:
     def test_basic(self) -> None:
@@ -69,6 +102,23 @@ class TestParsePoint:
         assert "streetID" in stop.id
 
 
+class TestParsePoints:
+    def test_matches_single_parse(self) -> None:
+        strings = [
+            "33000742|||Helmholtzstraße|5655904|4621157|0||",
+            "9022020||Bonn|Helmholtzstraße|0|0|0||",
+            "36030083||Chemnitz|Helmholtzstr|5635837|4566835|0||",
+        ]
+        assert parse_points(strings) == [parse_point(s) for s in strings]
+
+    def test_wgs_coords_pass_through(self) -> None:
+        (stop,) = parse_points(["1||Dresden|Somewhere|51.05|13.74|0||"])
+        assert stop.coords == Coords(lat=51.05, lng=13.74)
+
+    def test_empty(self) -> None:
+        assert parse_points([]) == []
+
+
 class TestCoordsConversion:
     def test_gk4_to_wgs(self) -> None:
         coords = coords_gk4_to_wgs(5655904, 4621157)
@@ -86,3 +136,37 @@ class TestCoordsConversion:
         result = coords_gk4_to_wgs(gk4_lat, gk4_lng)
         assert abs(result.lat - original.lat) < 0.001
         assert abs(result.lng - original.lng) < 0.001
+
+    def test_gk4_to_wgs_many_matches_single(self) -> None:
+        lats = [5655904, 5657496, 5635837]
+        lngs = [4621157, 4621684, 4566835]
+        batch = coords_gk4_to_wgs_many(lats, lngs)
+        for coords, lat, lng in zip(batch, lats, lngs, strict=True):
+            single = coords_gk4_to_wgs(lat, lng)
+            assert abs(coords.lat - single.lat) < 1e-9
+            assert abs(coords.lng - single.lng) < 1e-9
+
+    def test_wgs_to_gk4_many_matches_single(self) -> None:
+        lats = [51.03, 51.05]
+        lngs = [13.73, 13.74]
+        assert coords_wgs_to_gk4_many(lats, lngs) == [
+            coords_wgs_to_gk4(lat, lng) for lat, lng in zip(lats, lngs, strict=True)
+        ]
+
+    def test_many_empty(self) -> None:
+        assert coords_gk4_to_wgs_many([], []) == []
+        assert coords_wgs_to_gk4_many([], []) == []
+
+
+class TestCoordBatch:
+    def test_positions(self) -> None:
+        batch = CoordBatch()
+        assert batch.add(5655904, 4621157) == 0
+        assert batch.add_many([5657496, 5657555], [4621684, 4621712]) == (1, 3)
+        assert len(batch) == 3
+        converted = batch.convert()
+        assert len(converted) == 3
+        assert converted[0] == coords_gk4_to_wgs(5655904, 4621157)
+
+    def test_empty(self) -> None:
+        assert CoordBatch().convert() == []